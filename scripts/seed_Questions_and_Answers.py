@@ -23,6 +23,7 @@ sys.path.append(PROJECT_ROOT)
 
 try:
     from src.question_app.services.database import DatabaseManager
+    from src.question_app.utils.text_utils import markdown_to_html
 except ImportError as e:
     print(f"ImportError: {e}")
     print("Failed to import DatabaseManager. Make sure you are in the 'questionapp' root folder.")
@@ -57,9 +58,10 @@ try:
 
         for q in questions:
             q_id = str(uuid.uuid4())
+            # Render the HTML now so the edit page never has to backfill it
             cursor.execute(
-                "INSERT INTO question (id, question_text, created_at) VALUES (?, ?, ?)",
-                (q_id, q['question_text'], datetime.now().isoformat())
+                "INSERT INTO question (id, question_text, question_text_html, created_at) VALUES (?, ?, ?, ?)",
+                (q_id, q['question_text'], markdown_to_html(q['question_text']), datetime.now().isoformat())
             )
 
             for a in q.get('answers', []):
@@ -67,10 +69,10 @@ try:
                 cursor.execute(
                     """
                     INSERT INTO answer
-                    (id, question_id, text, is_correct, feedback_text, feedback_approved) 
-                    VALUES (?, ?, ?, ?, ?, ?)
+                    (id, question_id, text, text_html, is_correct, feedback_text, feedback_approved) 
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
                     """,
-                    (a_id, q_id, a['text'], a['weight'] > 0, a.get('comments', ''), False)
+                    (a_id, q_id, a['text'], markdown_to_html(a['text']), a['weight'] > 0, a.get('comments', ''), False)
                 )
         
         conn.commit()
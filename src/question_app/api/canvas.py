@@ -20,13 +20,13 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from bs4 import BeautifulSoup, Comment
 
-from ..core import config, get_logger
+from ..core import ORJSONResponse, config, get_logger
 
 # Configure logging
 logger = get_logger(__name__)
 
 # Create router
-router = APIRouter(prefix="/api", tags=["canvas"])
+router = APIRouter(prefix="/api", tags=["canvas"], default_response_class=ORJSONResponse)
 
 
 class ConfigurationUpdate(BaseModel):
@@ -349,19 +349,16 @@ def load_questions() -> List[Dict[str, Any]]:
 
 def save_questions(questions: List[Dict[str, Any]]) -> bool:
     """Save questions to the data file."""
-    import json
     from pathlib import Path
 
-    try:
-        data_file = Path("data/quiz_questions.json")
-        data_file.parent.mkdir(exist_ok=True)
+    from ..utils.file_utils import DATA_FILE, save_questions as _save_questions
 
-        with open(data_file, "w", encoding="utf-8") as f:
-            json.dump(questions, f, indent=2, ensure_ascii=False)
-        return True
+    try:
+        Path(DATA_FILE).parent.mkdir(exist_ok=True)
     except Exception as e:
         logger.error(f"Error saving questions: {e}")
         return False
+    return _save_questions(questions)
 
 
 @router.get("/courses")
@@ -437,6 +434,8 @@ async def fetch_questions():
             }
         else:
             raise HTTPException(status_code=500, detail="Failed to save questions")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching questions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -3,61 +3,104 @@ Chat API module for the Question App.
 (This is the corrected version that fixes initialization and student creation)
 """
 
-from typing import Dict
-from fastapi.openapi.utils import status_code_ranges
-from pydantic import BaseModel
-import httpx
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-
-from ..core import config, get_logger
+import asyncio
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from pydantic import BaseModel, ConfigDict, Field
+from fastapi import APIRouter, Depends, Form, HTTPException, Request
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+
+from ..core import (
+    ORJSONResponse,
+    TokenBucket,
+    config,
+    etag_matches,
+    get_logger,
+    get_shared_templates,
+    log_exception,
+    make_etag,
+)
 from ..utils import (
     get_default_chat_system_prompt,
     get_default_welcome_message,
     load_chat_system_prompt,
-    load_welcome_message,       # <-- We will use this
+    load_welcome_message,
     save_chat_system_prompt,
     save_welcome_message,
 )
 from ..services.tutor.hybrid_system import HybridCrewAISocraticSystem
-from ..api.vector_store import ChromaVectorStoreService
+from ..models.tutor import StudentProfile
+from ..api.vector_store import get_vector_store_service
 
 
 logger = get_logger(__name__)
 
+# Bounds traceback capture during error storms (e.g. an Azure outage)
+_err_bucket = TokenBucket(rate=5, burst=10)
+
 # Create router for chat endpoints
-router = APIRouter(prefix="/chat", tags=["chat"])
+router = APIRouter(prefix="/chat", tags=["chat"], default_response_class=ORJSONResponse)
 
 # Templates setup
-templates = Jinja2Templates(directory="templates")
+templates = get_shared_templates("templates")
 
-# --- === (This initialization is correct) === ---
-try:
-    vector_service = ChromaVectorStoreService()
-    
-    azure_config = {
-        "api_key": config.AZURE_OPENAI_SUBSCRIPTION_KEY,
-        "endpoint": config.AZURE_OPENAI_ENDPOINT,
-        "deployment_name": config.AZURE_OPENAI_DEPLOYMENT_ID,
-        "api_version": config.AZURE_OPENAI_API_VERSION
-    }
-
-    tutor_system = HybridCrewAISocraticSystem(
-        azure_config=azure_config,
-        vector_store_service=vector_service,
-        db_path=config.db_path 
-    )
-    logger.info("Chat API: HybridCrewAISocraticSystem initialized successfully.")
+_tutor_system: Optional[HybridCrewAISocraticSystem] = None
+
+
+def get_tutor_system() -> Optional[HybridCrewAISocraticSystem]:
+    """
+    Get the process-wide tutor system, creating it on first use.
 
-except ValueError as e:
-    logger.critical(f"Failed to initialize ChromaDB client: {e}")
-    logger.critical("Please ensure the ChromaDB server is running. Try: 'chroma run'")
-    tutor_system = None
-except Exception as e:
-    logger.critical(f"Failed to initialize HybridCrewAISocraticSystem: {e}", exc_info=True)
-    tutor_system = None
-# --- === END OF INITIALIZATION === ---
+    Called from the application lifespan so the vector store connection and
+    agent setup happen once per worker at startup rather than on import.
+    Failures are logged and leave chat offline (503) until the worker is
+    restarted; nothing calls this again after startup.
+
+    Returns:
+        Shared HybridCrewAISocraticSystem instance, or None if it could not
+        be created (e.g. the Chroma server is down)
+    """
+    global _tutor_system
+    if _tutor_system is None:
+        try:
+            _tutor_system = HybridCrewAISocraticSystem(
+                azure_config=config.azure_openai_config,
+                vector_store_service=get_vector_store_service(),
+                db_path=config.db_path
+            )
+            logger.info("Chat API: HybridCrewAISocraticSystem initialized successfully.")
+        except ValueError as e:
+            logger.critical(f"Failed to initialize ChromaDB client: {e}")
+            logger.critical("Please ensure the ChromaDB server is running. Try: 'chroma run'")
+        except Exception as e:
+            logger.critical(f"Failed to initialize HybridCrewAISocraticSystem: {e}", exc_info=True)
+    return _tutor_system
+
+
+async def close_tutor_system() -> None:
+    """Release the shared tutor system, if one was created."""
+    global _tutor_system
+
+    tutor, _tutor_system = _tutor_system, None
+    if tutor is not None:
+        await tutor.aclose()
+        logger.info("Chat API: HybridCrewAISocraticSystem closed.")
+
+
+def get_tutor(request: Request) -> Optional[HybridCrewAISocraticSystem]:
+    """
+    FastAPI dependency returning the tutor system set up by the lifespan.
+
+    Returns:
+        The tutor system, or None if it is offline or the app was started
+        without its lifespan
+    """
+    return getattr(request.app.state, "tutor_system", None)
 
 
 # Chat endpoints
@@ -69,20 +112,207 @@ async def chat_page(request: Request):
 
 #Define a pydantic model for incoming request body
 class ChatMessage(BaseModel):
-    message : str
-    student_id: str | None = None 
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
+    message : str = Field(max_length=8192)
+    student_id: str | None = Field(default=None, max_length=128)
 
 # --- Constants for our new default student ---
 DEFAULT_STUDENT_ID = "default-student"
 DEFAULT_STUDENT_NAME = "Default Student"
 DEFAULT_TOPIC = "Web Accessibility"
 
+# Fixed part of the START_SESSION reply; only the session number varies.
+# The empty dicts are shared and must never be mutated.
+_START_SESSION_METADATA: Dict[str, Any] = {
+    "intent_executed": "start_session",
+    "analysis": {},
+    "progress": {},  # Send empty metadata
+}
+
+# Student ids whose profile is known to exist, least recently used first.
+# Profiles are never deleted, so ordinary messages from these students skip
+# the profile lookup; START_SESSION still loads the profile for its counter.
+_known_students: "OrderedDict[str, None]" = OrderedDict()
+_KNOWN_STUDENTS_MAX = 1024
+
+
+def _load_or_create_profile(
+    tutor_system: HybridCrewAISocraticSystem, student_id: str
+) -> StudentProfile:
+    """
+    Load a student's profile, creating a default one if it does not exist.
+
+    Raises:
+        HTTPException: 500 if the profile cannot be created
+    """
+    profile = tutor_system.get_student_profile(student_id)
+    if not profile:
+        logger.warning(f"Student profile '{student_id}' not found. Creating a default profile.")
+        try:
+            tutor_system.create_student_profile(
+                name=DEFAULT_STUDENT_NAME,
+                topic=DEFAULT_TOPIC,
+                student_id_override=student_id 
+            )
+            # After creating, we must load the profile again to use it
+            profile = tutor_system.get_student_profile(student_id)
+            if not profile: # Still not found? Something is wrong.
+                raise Exception("Failed to create or load default student profile.")
+        except Exception as create_e:
+            log_exception(logger, "Failed to create default student profile", create_e, _err_bucket)
+            raise HTTPException(status_code=500, detail="Failed to create student profile.")
+
+    _known_students[student_id] = None
+    _known_students.move_to_end(student_id)
+    if len(_known_students) > _KNOWN_STUDENTS_MAX:
+        _known_students.popitem(last=False)
+    return profile
+
+
+def _ensure_profile(tutor_system: HybridCrewAISocraticSystem, student_id: str) -> None:
+    """Make sure a student has a profile, hitting the database only for new ids."""
+    if student_id in _known_students:
+        _known_students.move_to_end(student_id)
+    else:
+        _load_or_create_profile(tutor_system, student_id)
+
+
+# Bounds concurrent tutor sessions so bursts queue here instead of piling
+# 429s onto Azure OpenAI
+_azure_semaphore = asyncio.Semaphore(config.AZURE_MAX_CONCURRENCY)
+
+
+async def _acquire_azure_slot() -> None:
+    """
+    Wait for a free tutor session slot.
+
+    Raises:
+        HTTPException: 503 with Retry-After if no slot frees up within
+            ``config.AZURE_QUEUE_TIMEOUT`` seconds
+    """
+    try:
+        await asyncio.wait_for(
+            _azure_semaphore.acquire(), timeout=config.AZURE_QUEUE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        logger.warning("All tutor session slots busy; rejecting chat message")
+        raise HTTPException(
+            status_code=503,
+            detail="The tutor is busy right now. Please try again shortly.",
+            headers={"Retry-After": str(max(1, round(config.AZURE_QUEUE_TIMEOUT)))},
+        )
+
+
+# Sessions currently running, keyed by (student_id, message), so identical
+# concurrent requests (double submits, client retries) share one session
+_inflight: Dict[Tuple[str, str], "asyncio.Task[Dict[str, Any]]"] = {}
+
+
+def _forget_session(key: Tuple[str, str], task: "asyncio.Task[Dict[str, Any]]") -> None:
+    _inflight.pop(key, None)
+    if not task.cancelled():
+        task.exception()  # Mark retrieved if every waiter has gone away
+
+
+async def _run_session(
+    tutor_system: HybridCrewAISocraticSystem, student_id: str, message: str
+) -> Dict[str, Any]:
+    await _acquire_azure_slot()
+    try:
+        return await tutor_system.conduct_socratic_session(
+            student_id=student_id,
+            student_response=message
+        )
+    finally:
+        _azure_semaphore.release()
+
+
+async def _run_session_coalesced(
+    tutor_system: HybridCrewAISocraticSystem, student_id: str, message: str
+) -> Dict[str, Any]:
+    """
+    Run a tutor session, or join an identical one that is already running.
+
+    The session runs in its own task and callers wait on it through
+    ``asyncio.shield``, so one client disconnecting does not cancel the
+    session for the others.
+
+    Args:
+        tutor_system: The tutor system to run the session on
+        student_id: The student's ID
+        message: The student's message
+
+    Returns:
+        The result of ``tutor_system.conduct_socratic_session``
+    """
+    key = (student_id, message)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_run_session(tutor_system, student_id, message))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _forget_session(key, t))
+    else:
+        logger.info("Joining in-flight tutor session for student_id: %s", student_id)
+    return await asyncio.shield(task)
+
+
+# Last completed reply per student, least recently used first, so a client
+# retry or double send of the same message shortly after the reply arrives
+# gets that reply again instead of starting another tutor session
+_recent_replies: "OrderedDict[str, Tuple[str, float, Dict[str, Any]]]" = OrderedDict()
+_RECENT_REPLIES_MAX = 256
+_RECENT_REPLY_TTL = 5.0
+
+
+def _get_recent_reply(student_id: str, message: str) -> Optional[Dict[str, Any]]:
+    """Return the student's last session result if it answered this same message just now."""
+    entry = _recent_replies.get(student_id)
+    if entry is None:
+        return None
+    last_message, finished_at, result = entry
+    if last_message != message or time.monotonic() - finished_at > _RECENT_REPLY_TTL:
+        return None
+    return result
+
+
+def _remember_reply(student_id: str, message: str, result: Dict[str, Any]) -> None:
+    _recent_replies[student_id] = (message, time.monotonic(), result)
+    _recent_replies.move_to_end(student_id)
+    if len(_recent_replies) > _RECENT_REPLIES_MAX:
+        _recent_replies.popitem(last=False)
+
+
+# Marking event streams as already encoded keeps GZipMiddleware (which on
+# older Starlette compresses streaming responses too) from buffering them
+_SSE_HEADERS = {"Content-Encoding": "identity"}
+
+
+def _sse_event(payload: Dict[str, Any]) -> str:
+    """Format a payload as a single server-sent event."""
+    return f"data: {orjson.dumps(payload).decode()}\n\n"
+
+
 @router.post("/message")
-async def handle_chat_message(chat_message : ChatMessage):
+async def handle_chat_message(
+    chat_message : ChatMessage,
+    request: Request,
+    stream: bool = False,
+    tutor_system: Optional[HybridCrewAISocraticSystem] = Depends(get_tutor),
+):
     """
     Handles a single chat message via POST request.
     (This is the updated, corrected version)
+
+    By default the full reply is returned as JSON. With ``?stream=1`` (or an
+    ``Accept: text/event-stream`` header) the reply is streamed as server-sent
+    events: ``{"delta": ...}`` chunks followed by a final event carrying
+    ``student_id`` and ``session_metadata``.
     """
+    stream = stream or "text/event-stream" in request.headers.get("accept", "")
+
+    if not chat_message.message:
+        raise HTTPException(status_code=400, detail="Message cannot be empty")
     
     if not tutor_system:
         logger.error("Tutor system is not initialized. ChromaDB might be offline.")
@@ -91,59 +321,99 @@ async def handle_chat_message(chat_message : ChatMessage):
     try:
         # --- (Default student logic is correct) ---
         student_id = chat_message.student_id or DEFAULT_STUDENT_ID
-        
-        profile = tutor_system.get_student_profile(student_id)
-        if not profile:
-            logger.warning(f"Student profile '{student_id}' not found. Creating a default profile.")
-            try:
-                tutor_system.create_student_profile(
-                    name=DEFAULT_STUDENT_NAME,
-                    topic=DEFAULT_TOPIC,
-                    student_id_override=student_id 
-                )
-                # After creating, we must load the profile again to use it
-                profile = tutor_system.get_student_profile(student_id)
-                if not profile: # Still not found? Something is wrong.
-                    raise Exception("Failed to create or load default student profile.")
-            except Exception as create_e:
-                logger.error(f"Failed to create default student profile: {create_e}", exc_info=True)
-                raise HTTPException(status_code=500, detail="Failed to create student profile.")
         # --- (End of default student logic) ---
 
         
         # --- === THIS IS THE NEW FIX === ---
         # If the message is "START_SESSION", just send the welcome message.
         if chat_message.message == "START_SESSION":
-            logger.info(f"Handling new conversation start for student_id: {student_id}")
-            welcome_message = load_welcome_message() # Use the existing utility
+            logger.info("Handling new conversation start for student_id: %s", student_id)
+            profile = _load_or_create_profile(tutor_system, student_id)
+            welcome_message = load_welcome_message()
             
-            # We increment the session count
-            if profile:
-                profile.total_sessions += 1
-                tutor_system.db.save_student_profile(profile)
-                
-            return {
-                "response": welcome_message,
-                "student_id": student_id,
-                "session_metadata": {
-                    "session_number": profile.total_sessions if profile else 1,
-                    "intent_executed": "start_session",
-                    "analysis": {}, "progress": {} # Send empty metadata
-                }
+            # We increment the session count in memory and persist it after
+            # the response is sent, as a single-column update
+            profile.total_sessions += 1
+            record_session = BackgroundTask(
+                tutor_system.db.increment_total_sessions, student_id
+            )
+
+            session_metadata = {
+                **_START_SESSION_METADATA, "session_number": profile.total_sessions
             }
+            if stream:
+                async def _welcome():
+                    yield _sse_event({"delta": welcome_message})
+                    yield _sse_event({"student_id": student_id, "session_metadata": session_metadata})
+
+                return StreamingResponse(
+                    _welcome(),
+                    media_type="text/event-stream",
+                    headers=_SSE_HEADERS,
+                    background=record_session,
+                )
+
+            return ORJSONResponse(
+                {
+                    "response": welcome_message,
+                    "student_id": student_id,
+                    "session_metadata": session_metadata
+                },
+                background=record_session,
+            )
         # --- === END OF NEW FIX === ---
 
         
         # If the message is not "START_SESSION", proceed with the normal AI workflow
-        logger.info(f"Received chat message for student_id: {student_id}")
-        
-        result = await tutor_system.conduct_socratic_session(
-            student_id=student_id,
-            student_response=chat_message.message
-        )
+        logger.info("Received chat message for student_id: %s", student_id)
+        _ensure_profile(tutor_system, student_id)
+
+        if stream:
+            await _acquire_azure_slot()
+            released = False
+
+            def _release_slot():
+                nonlocal released
+                if not released:
+                    released = True
+                    _azure_semaphore.release()
+
+            async def _gen():
+                # Headers are already sent once streaming starts, so failures
+                # are reported to the client as an error event. The slot is
+                # released here because a client disconnect aborts the
+                # response before any background task would run.
+                try:
+                    async for event in tutor_system.conduct_socratic_session_stream(
+                        student_id=student_id,
+                        student_response=chat_message.message
+                    ):
+                        if "session_metadata" in event:
+                            event = {"student_id": student_id, **event}
+                        yield _sse_event(event)
+                except Exception as e:
+                    log_exception(logger, "Unexpected error in streamed chat message", e, _err_bucket)
+                    yield _sse_event({"error": f"Failed to process chat message : {str(e)}"})
+                finally:
+                    _release_slot()
+
+            # The background task only covers a stream that never started
+            return StreamingResponse(
+                _gen(),
+                media_type="text/event-stream",
+                headers=_SSE_HEADERS,
+                background=BackgroundTask(_release_slot),
+            )
 
-        if result.get("status") == "error":
-            raise HTTPException(status_code=500 , detail = result.get("error" , "An unknown error occured in tutoring session"))
+        result = _get_recent_reply(student_id, chat_message.message)
+        if result is not None:
+            logger.info("Returning recent reply to repeated message from student_id: %s", student_id)
+        else:
+            result = await _run_session_coalesced(tutor_system, student_id, chat_message.message)
+
+            if result.get("status") == "error":
+                raise HTTPException(status_code=500 , detail = result.get("error" , "An unknown error occured in tutoring session"))
+            _remember_reply(student_id, chat_message.message, result)
         
         return {
             "response" : result.get("tutor_response"),
@@ -154,7 +424,7 @@ async def handle_chat_message(chat_message : ChatMessage):
         logger.error(f"HTTP Exception in handle_chat_message : {e.detail}")
         raise e
     except Exception as e:
-        logger.error(f"Unexpected error in handle_chat_message : {e}" , exc_info=True)
+        log_exception(logger, "Unexpected error in handle_chat_message", e, _err_bucket)
         raise HTTPException(
             status_code=500 , detail = f"Failed to process chat message : {str(e)}"
         )
@@ -165,7 +435,7 @@ async def handle_chat_message(chat_message : ChatMessage):
 async def chat_system_prompt_page(request: Request):
     """Chat system prompt edit page"""
     current_prompt = load_chat_system_prompt()
-    default_prompt = get_default_chat_system_prompt()
+    default_prompt, _ = _cached_default_prompt()
 
     return templates.TemplateResponse(
         "chat_system_prompt_edit.html",
@@ -178,17 +448,15 @@ async def chat_system_prompt_page(request: Request):
 
 
 @router.post("/system-prompt")
-async def save_chat_system_prompt_endpoint(request: Request):
+async def save_chat_system_prompt_endpoint(prompt: str = Form("")):
     """Save chat system prompt"""
     try:
-        form = await request.form()
-        prompt_value = form.get("prompt", "")
-        prompt = prompt_value.strip() if isinstance(prompt_value, str) else ""
+        prompt = prompt.strip()
 
         if not prompt:
             raise HTTPException(status_code=400, detail="System prompt cannot be empty")
 
-        if save_chat_system_prompt(prompt):
+        if await asyncio.to_thread(save_chat_system_prompt, prompt):
             logger.info("Chat system prompt saved successfully")
             return {"success": True, "message": "Chat system prompt saved successfully"}
         else:
@@ -199,67 +467,103 @@ async def save_chat_system_prompt_endpoint(request: Request):
     except HTTPException as e:
         raise e
     except Exception as e:
-        logger.error(f"Error saving chat system prompt: {e}")
+        log_exception(logger, "Error saving chat system prompt", e, _err_bucket)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _cacheable_json(
+    request: Request,
+    content: Dict[str, Any],
+    etag: str,
+    cache_control: str = "public, max-age=60",
+) -> Response:
+    """Return 304 if the client already has this payload, else the JSON body."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(content, headers=headers)
+
+
+# The defaults only change on redeploy, so compute them and their ETags once
+@lru_cache(maxsize=1)
+def _cached_default_prompt() -> Tuple[str, str]:
+    value = get_default_chat_system_prompt()
+    return value, make_etag(value)
+
+
+@lru_cache(maxsize=1)
+def _cached_default_welcome_message() -> Tuple[str, str]:
+    value = get_default_welcome_message()
+    return value, make_etag(value)
+
+
 @router.get("/system-prompt/default")
-async def get_default_chat_system_prompt_endpoint():
+async def get_default_chat_system_prompt_endpoint(request: Request):
     """Get default chat system prompt"""
-    return {"default_prompt": get_default_chat_system_prompt()}
+    default_prompt, etag = _cached_default_prompt()
+    return _cacheable_json(request, {"default_prompt": default_prompt}, etag)
 
 
 @router.get("/welcome-message")
-async def get_chat_welcome_message():
+async def get_chat_welcome_message(request: Request):
     """Get the current chat welcome message"""
     try:
         welcome_message = load_welcome_message()
-        return {"welcome_message": welcome_message}
+        # Editable, so clients revalidate every time rather than show a stale copy
+        return _cacheable_json(
+            request,
+            {"welcome_message": welcome_message},
+            make_etag(welcome_message),
+            cache_control="no-cache",
+        )
     except Exception as e:
         logger.error(f"Error loading welcome message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/welcome-message")
-async def save_chat_welcome_message(request: Request):
-    """Save chat welcome message"""
-    try:
-        content_type = request.headers.get("content-type", "")
+class WelcomeMessageUpdate(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True)
 
-        if "application/json" in content_type:
-            body = await request.json()
-            message = body.get("welcome_message", "").strip()
-        else:
-            form = await request.form()
-            message_value = form.get("welcome_message", "")
-            message = message_value.strip() if isinstance(message_value, str) else ""
+    welcome_message: str = ""
 
-        if not message:
-            raise HTTPException(
-                status_code=400, detail="Welcome message cannot be empty"
-            )
 
-        if save_welcome_message(message):
-            logger.info("Welcome message saved successfully")
-            return {"success": True, "message": "Welcome message saved successfully"}
-        else:
-            raise HTTPException(
-                status_code=500, detail="Failed to save welcome message"
-            )
+async def _save_welcome_message(message: str) -> Dict[str, Any]:
+    """Validate and persist a welcome message, raising HTTPException on failure."""
+    if not message:
+        raise HTTPException(status_code=400, detail="Welcome message cannot be empty")
 
-    except HTTPException as e:
-        raise e
+    try:
+        saved = await asyncio.to_thread(save_welcome_message, message)
     except Exception as e:
-        logger.error(f"Error saving welcome message: {e}")
+        log_exception(logger, "Error saving welcome message", e, _err_bucket)
         raise HTTPException(status_code=500, detail=str(e))
 
+    if not saved:
+        raise HTTPException(status_code=500, detail="Failed to save welcome message")
+    logger.info("Welcome message saved successfully")
+    return {"success": True, "message": "Welcome message saved successfully"}
+
+
+@router.post("/welcome-message")
+async def save_chat_welcome_message(body: Optional[WelcomeMessageUpdate] = None):
+    """Save chat welcome message from a JSON body"""
+    return await _save_welcome_message(body.welcome_message if body else "")
+
+
+@router.post("/welcome-message/form")
+async def save_chat_welcome_message_form(welcome_message: str = Form("")):
+    """Save chat welcome message from an HTML form post"""
+    return await _save_welcome_message(welcome_message.strip())
+
 
 @router.get("/welcome-message/default")
-async def get_default_chat_welcome_message():
+async def get_default_chat_welcome_message(request: Request):
     """Get default chat welcome message"""
     try:
-        default_message = get_default_welcome_message()
-        return {"default_welcome_message": default_message}
+        default_message, etag = _cached_default_welcome_message()
+        return _cacheable_json(
+            request, {"default_welcome_message": default_message}, etag
+        )
     except Exception as e:
         logger.error(f"Error loading default welcome message: {e}")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
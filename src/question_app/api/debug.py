@@ -7,19 +7,18 @@ This module contains all debugging and testing functionality including:
 - Ollama connection testing endpoints
 """
 
-import os
 from typing import Any, Dict  # noqa: F401
 
 import httpx
 from fastapi import APIRouter
 
-from ..core import config, get_logger
-from ..utils import load_questions, load_system_prompt
+from ..core import ORJSONResponse, config, get_http_client, get_logger
+from ..utils import cached_questions_count, load_questions_by_id, load_system_prompt
 
 logger = get_logger(__name__)
 
 # Create router for debug endpoints
-router = APIRouter(prefix="/debug", tags=["debug"])
+router = APIRouter(prefix="/debug", tags=["debug"], default_response_class=ORJSONResponse)
 
 # File paths
 DATA_FILE = "data/quiz_questions.json"
@@ -51,11 +50,11 @@ async def debug_question(question_id: int):
             - total_questions: Total number of questions in the dataset
     """
     try:
-        questions = load_questions()
-        question = next((q for q in questions if q.get("id") == question_id), None)
+        questions_by_id = load_questions_by_id()
+        question = questions_by_id.get(question_id)
 
         if not question:
-            return {"question_found": False, "total_questions": len(questions)}
+            return {"question_found": False, "total_questions": len(questions_by_id)}
 
         return {
             "question_found": True,
@@ -67,7 +66,7 @@ async def debug_question(question_id: int):
             "has_incorrect_comments": bool(question.get("incorrect_comments")),
             "has_neutral_comments": bool(question.get("neutral_comments")),
             "question_keys": list(question.keys()),
-            "total_questions": len(questions),
+            "total_questions": len(questions_by_id),
         }
     except Exception as e:
         return {
@@ -100,21 +99,20 @@ async def debug_config():
             - ollama_host_with_protocol: Full Ollama URL with protocol
     """
     # Configuration is now handled by the core config module
+    questions_count = cached_questions_count()
 
     return {
         "canvas_configured": config.validate_canvas_config(),
         "azure_configured": config.validate_azure_openai_config(),
         "has_system_prompt": bool(load_system_prompt()),
-        "data_file_exists": os.path.exists(DATA_FILE),
-        "questions_count": len(load_questions()) if os.path.exists(DATA_FILE) else 0,
+        "data_file_exists": questions_count is not None,
+        "questions_count": questions_count or 0,
         "azure_endpoint": config.AZURE_OPENAI_ENDPOINT,
         "azure_deployment_id": config.AZURE_OPENAI_DEPLOYMENT_ID,
         "azure_api_version": config.AZURE_OPENAI_API_VERSION,
         "ollama_host": config.OLLAMA_HOST,
         "ollama_embedding_model": config.OLLAMA_EMBEDDING_MODEL,
-        "ollama_host_with_protocol": config.OLLAMA_HOST
-        if config.OLLAMA_HOST.startswith(("http://", "https://"))
-        else f"http://{config.OLLAMA_HOST}",
+        "ollama_host_with_protocol": config.OLLAMA_BASE_URL,
     }
 
 
@@ -135,34 +133,30 @@ async def test_ollama_connection():
             - configured_model: The configured embedding model name
             - error: Error details if connection fails
     """
-    # Import environment variables from vector_store module
-    ollama_host = config.OLLAMA_HOST
-    if not ollama_host.startswith(("http://", "https://")):
-        ollama_host = f"http://{ollama_host}"
+    ollama_host = config.OLLAMA_BASE_URL
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Test basic connection
-            response = await client.get(f"{ollama_host}/api/tags")
-
-            if response.status_code == 200:
-                models = response.json()
-                model_names = [model["name"] for model in models.get("models", [])]
-
-                return {
-                    "ollama_connected": True,
-                    "ollama_host": ollama_host,
-                    "available_models": model_names,
-                    "embedding_model_available": config.OLLAMA_EMBEDDING_MODEL
-                    in model_names,
-                    "configured_model": config.OLLAMA_EMBEDDING_MODEL,
-                }
-            else:
-                return {
-                    "ollama_connected": False,
-                    "error": f"Ollama returned status {response.status_code}",
-                    "ollama_host": ollama_host,
-                }
+        # Test basic connection over the shared pooled client
+        response = await get_http_client().get(f"{ollama_host}/api/tags")
+
+        if response.status_code == 200:
+            models = response.json()
+            model_names = {model["name"] for model in models.get("models") or ()}
+
+            return {
+                "ollama_connected": True,
+                "ollama_host": ollama_host,
+                "available_models": sorted(model_names),
+                "embedding_model_available": config.OLLAMA_EMBEDDING_MODEL
+                in model_names,
+                "configured_model": config.OLLAMA_EMBEDDING_MODEL,
+            }
+        else:
+            return {
+                "ollama_connected": False,
+                "error": f"Ollama returned status {response.status_code}",
+                "ollama_host": ollama_host,
+            }
 
     except httpx.ConnectError as e:
         return {
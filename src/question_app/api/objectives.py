@@ -4,15 +4,16 @@ Learning objectives management API endpoints.
 (With the 'draft' endpoints and NEW LOGGING)
 """
 
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse
 from pydantic import BaseModel, ValidationError # Import ValidationError
-from typing import List
+from typing import Any, Dict, List
 
-from ..core import get_logger, config
-from ..services.database import DatabaseManager
-from ..services.ai_service import AIGeneratorService
+from ..core import ORJSONResponse, get_logger, get_shared_templates, config
+from ..services.database import get_database_manager
+from ..services.ai_service import get_ai_generator_service
 
 from ..models.objective import (
     ObjectiveCreate, 
@@ -22,17 +23,50 @@ from ..models.objective import (
 )
 
 logger = get_logger(__name__)
-router = APIRouter(prefix="/objectives", tags=["objectives"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(
+    prefix="/objectives", tags=["objectives"], default_response_class=ORJSONResponse
+)
+templates = get_shared_templates("templates")
+
+db = get_database_manager(config.db_path)
+ai_generator = get_ai_generator_service()
+
+# Draft generations currently running, keyed by objective id, so repeated
+# clicks or several educators on the same objective share one AI call
+_draft_inflight: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+
+def _forget_draft(objective_id: str, task: "asyncio.Task[Dict[str, Any]]") -> None:
+    _draft_inflight.pop(objective_id, None)
+    if not task.cancelled():
+        task.exception()  # Mark retrieved if every waiter has gone away
+
+
+async def _generate_draft_coalesced(objective_id: str, objective_text: str) -> Dict[str, Any]:
+    """
+    Generate a question draft, joining an identical generation already running.
+
+    The AI call runs in its own task and callers wait on it through
+    ``asyncio.shield``, so one client disconnecting does not cancel the
+    draft for the others.
+    """
+    task = _draft_inflight.get(objective_id)
+    if task is None:
+        task = asyncio.create_task(
+            ai_generator.generate_question_from_objective(objective_text)
+        )
+        _draft_inflight[objective_id] = task
+        task.add_done_callback(lambda t: _forget_draft(objective_id, t))
+    else:
+        logger.info("Joining in-flight question draft for objective %s", objective_id)
+    return await asyncio.shield(task)
 
-db = DatabaseManager(config.db_path)
-ai_generator = AIGeneratorService()
 
 @router.get("/", response_class=HTMLResponse)
 async def objectives_page(request: Request):
     """ (Unchanged) Learning objectives management page. """
     try:
-        objectives = db.list_all_objectives_with_counts() 
+        objectives = await asyncio.to_thread(db.list_all_objectives_with_counts)
         return templates.TemplateResponse(
             "objectives.html", {"request": request, "objectives": objectives}
         )
@@ -41,22 +75,23 @@ async def objectives_page(request: Request):
         raise HTTPException(status_code=500, detail="Could not load objectives.")
 
 
-@router.get("/list", response_class=JSONResponse)
+@router.get("/list", response_class=ORJSONResponse)
 async def list_all_objectives_json():
     """ Returns all objectives as JSON with full text. """
     try:
-        objectives = db.list_all_objectives()
+        objectives = await asyncio.to_thread(db.list_all_objectives)
         return {"objectives": objectives}
     except Exception as e:
         logger.error(f"Error listing objectives: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch objectives.")
 
 
-@router.post("/", response_class=JSONResponse)
+@router.post("/", response_class=ORJSONResponse)
 async def create_new_objective(objective_data: ObjectiveCreate):
     """ Creates a single new learning objective and returns it as JSON. """
     try:
-        new_obj_dict = db.create_objective(
+        new_obj_dict = await asyncio.to_thread(
+            db.create_objective,
             text=objective_data.text,
             blooms_level='understand',
             priority='medium'
@@ -68,11 +103,12 @@ async def create_new_objective(objective_data: ObjectiveCreate):
         raise HTTPException(status_code=500, detail="Failed to create objective.")
 
 
-@router.put("/{objective_id}", response_class=JSONResponse)
+@router.put("/{objective_id}", response_class=ORJSONResponse)
 async def update_existing_objective(objective_id: str, objective_data: ObjectiveUpdate):
     """ (Unchanged) Updates an existing objective. """
     try:
-        success = db.update_objective(
+        success = await asyncio.to_thread(
+            db.update_objective,
             objective_id,
             objective_data.text,
             objective_data.blooms_level,
@@ -81,48 +117,54 @@ async def update_existing_objective(objective_id: str, objective_data: Objective
         if not success:
             raise HTTPException(status_code=404, detail="Objective not found.")
         return {"success": True, "message": "Objective updated."}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error updating objective {objective_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to update objective.")
 
 
-@router.delete("/{objective_id}", response_class=JSONResponse)
+@router.delete("/{objective_id}", response_class=ORJSONResponse)
 async def delete_existing_objective(objective_id: str):
     """ (Unchanged) Deletes an existing objective. """
     try:
-        success = db.delete_objective(objective_id)
+        success = await asyncio.to_thread(db.delete_objective, objective_id)
         if not success:
             raise HTTPException(status_code=404, detail="Objective not found.")
         return {"success": True, "message": "Objective deleted."}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting objective {objective_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to delete objective.")
 
 
-@router.post("/{objective_id}/generate-question-draft", response_class=JSONResponse)
+@router.post("/{objective_id}/generate-question-draft", response_class=ORJSONResponse)
 async def generate_question_draft_for_objective(objective_id: str):
     """ (Unchanged) Calls the AI to generate a DRAFT of a question. """
     try:
-        objective = db.get_objective(objective_id)
+        objective = await asyncio.to_thread(db.get_objective, objective_id)
         if not objective:
             raise HTTPException(status_code=404, detail="Objective not found")
         
-        ai_draft_json = await ai_generator.generate_question_from_objective(objective['text'])
+        ai_draft_json = await _generate_draft_coalesced(objective_id, objective['text'])
         
         return ai_draft_json
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating question draft: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e)) # Pass full error
 
 
-@router.post("/{objective_id}/generate-and-create-question", response_class=JSONResponse)
+@router.post("/{objective_id}/generate-and-create-question", response_class=ORJSONResponse)
 async def generate_and_create_question_for_objective(objective_id: str):
     """
     Generates a question using AI and immediately creates it in the database.
     Returns the new question ID for redirect to edit page.
     """
     try:
-        objective = db.get_objective(objective_id)
+        objective = await asyncio.to_thread(db.get_objective, objective_id)
         if not objective:
             raise HTTPException(status_code=404, detail="Objective not found")
         
@@ -130,7 +172,8 @@ async def generate_and_create_question_for_objective(objective_id: str):
         ai_draft_json = await ai_generator.generate_question_from_objective(objective['text'])
         
         # Immediately create question in DB
-        new_question_id = db.create_question_from_ai(
+        new_question_id = await asyncio.to_thread(
+            db.create_question_from_ai,
             question_data=ai_draft_json,
             objective_id=objective_id
         )
@@ -140,12 +183,14 @@ async def generate_and_create_question_for_objective(objective_id: str):
             
         return {"new_question_id": new_question_id}
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating and creating question: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate question.")
 
 
-@router.post("/{objective_id}/create-question-from-draft", response_class=JSONResponse)
+@router.post("/{objective_id}/create-question-from-draft", response_class=ORJSONResponse)
 async def create_question_from_ai_draft(objective_id: str, question_draft: QuestionDraft):
     """
     Receives an EDUCATOR-APPROVED draft from the UI.
@@ -155,7 +200,8 @@ async def create_question_from_ai_draft(objective_id: str, question_draft: Quest
         # Pydantic has *already validated* the 'question_draft' data
         # If the data was bad, FastAPI would have already returned a 422.
         
-        new_question_id = db.create_question_from_ai(
+        new_question_id = await asyncio.to_thread(
+            db.create_question_from_ai,
             question_data=question_draft.model_dump(),
             objective_id=objective_id
         )
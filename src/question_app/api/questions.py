@@ -5,29 +5,55 @@ API endpoints for managing questions.
 - Includes the 'suggest-objectives' endpoint
 - FIX: Adds Markdown-to-HTML conversion for the preview
 """
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException, Request, Depends, BackgroundTasks
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse, Response
 import httpx 
-import markdown # <-- 1. ADD THIS IMPORT
-import uuid
+import orjson
 from datetime import datetime
 
 
-from ..core import config, get_logger
-from ..services.database import DatabaseManager
+from ..core import (
+    ORJSONResponse,
+    config,
+    etag_matches,
+    get_logger,
+    get_shared_templates,
+    load_template,
+    make_etag,
+    render_template,
+    template_fingerprint,
+)
+from ..services.database import get_database_manager, new_ids
 from ..models import QuestionUpdate
-from ..services.ai_service import AIGeneratorService 
+from ..services.ai_service import get_ai_generator_service
 from ..models import QuestionUpdate, NewQuestion
+from ..utils import markdown_to_html_many
 
 logger = get_logger(__name__)
-router = APIRouter(prefix="/questions", tags=["questions"])
-templates = Jinja2Templates(directory="templates")
+router = APIRouter(
+    prefix="/questions", tags=["questions"], default_response_class=ORJSONResponse
+)
+templates = get_shared_templates("templates")
+_EDIT_TEMPLATE = load_template(templates, "edit_question.html")
+
+# Blank question shown by the "new question" page. The template only reads
+# it, so every request renders the same instance.
+_EMPTY_QUESTION = {
+    'id': 'new',  # Special marker for new questions
+    'question_text': '',
+    'question_text_html': '',
+    'objective_ids': [],
+    'answers': [
+        {'id': f'new_{n}', 'text': '', 'text_html': '', 'is_correct': False, 'feedback_text': '', 'feedback_approved': False}
+        for n in range(1, 5)
+    ]
+}
 
 # Initialize services
-db = DatabaseManager(config.db_path)
-ai_generator = AIGeneratorService()
+db = get_database_manager(config.db_path)
+ai_generator = get_ai_generator_service()
 
 
 @router.get("/new", response_class=HTMLResponse)
@@ -37,27 +63,14 @@ async def new_question_page(request: Request):
     """
     logger.info("Loading new question creation page")
     try:
-        all_objectives = db.list_all_objectives()
-        
-        # Create an empty question structure
-        empty_question = {
-            'id': 'new',  # Special marker for new questions
-            'question_text': '',
-            'question_text_html': '',
-            'objective_ids': [],
-            'answers': [
-                {'id': 'new_1', 'text': '', 'text_html': '', 'is_correct': False, 'feedback_text': '', 'feedback_approved': False},
-                {'id': 'new_2', 'text': '', 'text_html': '', 'is_correct': False, 'feedback_text': '', 'feedback_approved': False},
-                {'id': 'new_3', 'text': '', 'text_html': '', 'is_correct': False, 'feedback_text': '', 'feedback_approved': False},
-                {'id': 'new_4', 'text': '', 'text_html': '', 'is_correct': False, 'feedback_text': '', 'feedback_approved': False},
-            ]
-        }
+        all_objectives = await asyncio.to_thread(db.list_all_objectives)
         
-        return templates.TemplateResponse(
-            "edit_question.html",
+        return render_template(
+            templates,
+            _EDIT_TEMPLATE,
             {
                 "request": request,
-                "question": empty_question,
+                "question": _EMPTY_QUESTION,
                 "all_objectives": all_objectives,
                 "is_new": True  # Flag to tell template this is a new question
             },
@@ -67,62 +80,93 @@ async def new_question_page(request: Request):
         raise HTTPException(status_code=500, detail="Could not load new question page.")
 
 
-@router.post("/", response_class=JSONResponse)
+def _insert_question(question_id, question_text, question_html, created_at, answers, associations):
+    """
+    Insert a new question with its answers and objective links in one transaction.
+
+    Runs in a worker thread; ``answers`` holds (id, NewAnswer, html) tuples
+    and ``associations`` holds (id, objective_id) tuples.
+    """
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        
+        # 1. Insert question
+        cursor.execute(
+            "INSERT INTO question (id, question_text, question_text_html, created_at) VALUES (?, ?, ?, ?)",
+            (question_id, question_text, question_html, created_at)
+        )
+        
+        # 2. Insert answers (only ones with text)
+        cursor.executemany(
+            """
+            INSERT INTO answer (id, question_id, text, text_html, is_correct, feedback_text, feedback_approved)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (answer_id, question_id, answer.text, answer_html, answer.is_correct, '', False)
+                for answer_id, answer, answer_html in answers
+            ]
+        )
+        
+        # 3. Insert objective associations
+        cursor.executemany(
+            "INSERT INTO question_objective_association (id, question_id, objective_id) VALUES (?, ?, ?)",
+            [
+                (assoc_id, question_id, obj_id)
+                for assoc_id, obj_id in associations
+            ]
+        )
+
+
+def _replace_objective_associations(question_id, objective_ids):
+    """Replace a question's objective links in one transaction (worker thread)."""
+    with db.transaction() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM question_objective_association WHERE question_id = ?",
+            (question_id,)
+        )
+        
+        # Insert new associations
+        cursor.executemany(
+            "INSERT INTO question_objective_association (id, question_id, objective_id) VALUES (?, ?, ?)",
+            [
+                (assoc_id, question_id, obj_id)
+                for assoc_id, obj_id in zip(new_ids(len(objective_ids)), objective_ids)
+            ]
+        )
+
+
+@router.post("/", response_class=ORJSONResponse)
 async def create_question(data: NewQuestion):
     """
     Creates a new question in the database.
-    Validates that question_text and at least one answer are provided.
+    NewQuestion has already rejected blank question text and questions
+    without any answer text (422).
     """
     logger.info("Creating new question")
     
-    # Validation
-    if not data.question_text or not data.question_text.strip():
-        raise HTTPException(status_code=400, detail="Question text is required")
-    
-    if not data.answers or len(data.answers) == 0:
-        raise HTTPException(status_code=400, detail="At least one answer is required")
-    
-    # Check if any answer text is provided
-    if not any(answer.text.strip() for answer in data.answers):
-        raise HTTPException(status_code=400, detail="At least one answer must have text")
-    
     try:
-        # Create new question with UUID
-        new_question_id = str(uuid.uuid4())
+        answers = [answer for answer in data.answers if answer.text.strip()]  # Only save answers with content
+        objective_ids = [obj_id for obj_id in data.objective_ids or [] if obj_id]
+
+        # One batch of UUIDs for the question, its answers and its links
+        new_question_id, *row_ids = new_ids(1 + len(answers) + len(objective_ids))
+        answer_ids, assoc_ids = row_ids[:len(answers)], row_ids[len(answers):]
+        question_html, *answer_htmls = await markdown_to_html_many(
+            [data.question_text, *(answer.text for answer in answers)]
+        )
         created_at = datetime.now().isoformat()
         
-        with db.get_connection(use_row_factory=False) as conn:
-            cursor = conn.cursor()
-            
-            # 1. Insert question
-            cursor.execute(
-                "INSERT INTO question (id, question_text, created_at) VALUES (?, ?, ?)",
-                (new_question_id, data.question_text, created_at)
-            )
-            
-            # 2. Insert answers (only ones with text)
-            for answer in data.answers:
-                if answer.text.strip():  # Only save answers with content
-                    answer_id = str(uuid.uuid4())
-                    cursor.execute(
-                        """
-                        INSERT INTO answer (id, question_id, text, is_correct, feedback_text, feedback_approved)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """,
-                        (answer_id, new_question_id, answer.text, answer.is_correct, '', False)
-                    )
-            
-            # 3. Insert objective associations
-            if data.objective_ids:
-                for obj_id in data.objective_ids:
-                    if obj_id:
-                        assoc_id = str(uuid.uuid4())
-                        cursor.execute(
-                            "INSERT INTO question_objective_association (id, question_id, objective_id) VALUES (?, ?, ?)",
-                            (assoc_id, new_question_id, obj_id)
-                        )
-            
-            conn.commit()
+        await asyncio.to_thread(
+            _insert_question,
+            new_question_id,
+            data.question_text,
+            question_html,
+            created_at,
+            list(zip(answer_ids, answers, answer_htmls)),
+            list(zip(assoc_ids, objective_ids)),
+        )
         
         logger.info(f"Successfully created question {new_question_id}")
         return {
@@ -142,11 +186,11 @@ async def edit_question_page(request: Request, question_id: str):
     """
     logger.info(f"Loading edit page for question_id: {question_id}")
     try:
-        question_data = db.load_question_details(question_id)
+        question_data = await asyncio.to_thread(db.load_question_details, question_id)
         if not question_data:
             raise HTTPException(status_code=404, detail="Question not found")
         
-        all_objectives = db.list_all_objectives()
+        all_objectives = await asyncio.to_thread(db.list_all_objectives)
         
         # Get associated objectives with full text
         associated_objectives = []
@@ -156,75 +200,83 @@ async def edit_question_page(request: Request, question_id: str):
                 if obj_id in all_objectives_dict:
                     associated_objectives.append(all_objectives_dict[obj_id])
         
-        # --- === 2. THIS IS THE FIX FOR THE BLANK PREVIEW === ---
-        # The template 'edit_question.html' (your original one)
-        # expects HTML-converted text. We must do that conversion here.
-        
-        md = markdown.Markdown(extensions=['fenced_code', 'codehilite'])
-        
-        # 1. Convert the main question text
-        if question_data.get('question_text'):
-            question_data['question_text_html'] = md.convert(question_data['question_text'])
-        else:
-            question_data['question_text_html'] = ''
-
-        # 2. Convert the text for each answer
-        for answer in question_data.get('answers', []):
-            if answer.get('text'):
-                answer['text_html'] = md.convert(answer['text'])
-            else:
-                answer['text_html'] = ''
-        # --- === END OF FIX === ---
+        # The page is a pure function of this data and the template, so a
+        # browser that already has it revalidates with a 304 and skips the
+        # render
+        etag = make_etag(
+            orjson.dumps(
+                [
+                    template_fingerprint(templates, _EDIT_TEMPLATE),
+                    question_data,
+                    all_objectives,
+                ]
+            )
+        )
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        # The template 'edit_question.html' expects HTML-converted text;
+        # question_text_html and each answer's text_html are rendered on
+        # write (and backfilled at startup for older rows).
         
-        return templates.TemplateResponse(
-            "edit_question.html",
+        return render_template(
+            templates,
+            _EDIT_TEMPLATE,
             {
                 "request": request,
                 "question": question_data,  # <-- This dict now has the _html fields
                 "all_objectives": all_objectives,
                 "associated_objectives": associated_objectives,
             },
+            headers=headers,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error loading edit page: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Could not load edit page.")
 
 
-@router.put("/{question_id}", response_class=JSONResponse)
+@router.put("/{question_id}", response_class=ORJSONResponse)
 async def save_question(question_id: str, data: QuestionUpdate, background_tasks: BackgroundTasks):
     """
     Saves updates to a question (auto-save).
     (This is the correct, working version)
     """
     try:
-        success = db.update_question_and_answers(question_id, data)
+        success = await asyncio.to_thread(db.update_question_and_answers, question_id, data)
         if not success:
             raise HTTPException(status_code=404, detail="Question not found")
         
         return {"success": True, "message": "Question updated successfully"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error saving question {question_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to save question.")
 
 
-@router.delete("/{question_id}", response_class=JSONResponse)
+@router.delete("/{question_id}", response_class=ORJSONResponse)
 async def delete_question(question_id: str):
     """
     Deletes a question from the database.
     (This is the correct, working version)
     """
     try:
-        success = db.delete_question(question_id)
+        success = await asyncio.to_thread(db.delete_question, question_id)
         if not success:
             raise HTTPException(status_code=404, detail="Question not found")
         return {"success": True, "message": "Question deleted."}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error deleting question {question_id}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to delete question.")
 
 
-@router.post("/{question_id}/generate-feedback", response_class=JSONResponse)
-async def generate_feedback_for_all_unapproved(question_id: str):
+@router.post("/{question_id}/generate-feedback", response_class=ORJSONResponse)
+async def generate_feedback_for_all_unapproved(question_id: str, background_tasks: BackgroundTasks):
     """
     Generates AI feedback for all unapproved answers for a given question.
     (This is the correct, working version)
@@ -232,29 +284,51 @@ async def generate_feedback_for_all_unapproved(question_id: str):
     logger.info(f"Generating feedback request started for question {question_id}")
     
     try:
-        question = db.load_question_details(question_id)
-        if not question:
+        loaded = await asyncio.to_thread(db.load_unapproved_answers, question_id)
+        if loaded is None:
             raise HTTPException(status_code=404, detail="Question not found")
         
-        updated_answers = []
-        for answer in question.get("answers", []):
-            if not answer.get("feedback_approved", False):
-                logger.info(f"Generating feedback for unapproved answer_id: {answer['id']}")
-                
-                feedback_text = await ai_generator.generate_feedback_for_answer(
-                    question_text=question['question_text'],
+        question_text, unapproved = loaded
+        logger.info(f"Generating feedback for {len(unapproved)} unapproved answers")
+
+        # The AI calls are independent, so they run concurrently, up to
+        # config.AI_FEEDBACK_CONCURRENCY at a time to stay under rate limits
+        semaphore = asyncio.Semaphore(config.AI_FEEDBACK_CONCURRENCY)
+
+        async def generate(answer):
+            async with semaphore:
+                return await ai_generator.generate_feedback_for_answer(
+                    question_text=question_text,
                     answer_text=answer['text'],
                     is_correct=answer['is_correct']
                 )
-                
-                db.update_answer_feedback(answer['id'], feedback_text)
-                updated_answers.append({
-                    "answer_id": answer['id'],
-                    "feedback_text": feedback_text
-                })
+
+        results = await asyncio.gather(
+            *(generate(answer) for answer in unapproved),
+            return_exceptions=True,
+        )
+
+        # Keep the feedback that was generated even if another call failed
+        updated_answers = [
+            {"answer_id": answer['id'], "feedback_text": result}
+            for answer, result in zip(unapproved, results)
+            if not isinstance(result, BaseException)
+        ]
+        feedback = [(item["answer_id"], item["feedback_text"]) for item in updated_answers]
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            # Error responses skip background tasks, so save before raising
+            if feedback:
+                await asyncio.to_thread(db.update_answers_feedback, feedback)
+            raise errors[0]
+        if feedback:
+            # Saved after the response is sent; the client already has the text
+            background_tasks.add_task(db.update_answers_feedback, feedback)
         
         return {"success": True, "message": "Feedback generated.", "updated_answers": updated_answers}
     
+    except HTTPException:
+        raise
     except httpx.HTTPStatusError as e:
         error_message = f"AI Service Error: {e}"
         if e.response.status_code == 429:
@@ -273,14 +347,14 @@ async def generate_feedback_for_all_unapproved(question_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/{question_id}/suggest-objectives", response_class=JSONResponse)
+@router.post("/{question_id}/suggest-objectives", response_class=ORJSONResponse)
 async def suggest_objectives(question_id: str):
     """
     (Req 8.2) Suggests existing objectives for a question using AI.
     (This is the correct, working version)
     """
     try:
-        question = db.load_question_details(question_id)
+        question = await asyncio.to_thread(db.load_question_details, question_id)
         if not question:
             raise HTTPException(status_code=404, detail="Question not found")
         
@@ -289,19 +363,21 @@ async def suggest_objectives(question_id: str):
         )
         
         return {"suggestions": suggestions}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error suggesting objectives: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to suggest objectives.")
 
 
-@router.post("/{question_id}/generate-objective", response_class=JSONResponse)
+@router.post("/{question_id}/generate-objective", response_class=ORJSONResponse)
 async def generate_objective_for_question(question_id: str):
     """
     Generates a learning objective for a question using AI and computes similarity score.
     """
     logger.info(f"Generating learning objective for question_id: {question_id}")
     try:
-        question_data = db.load_question_details(question_id)
+        question_data = await asyncio.to_thread(db.load_question_details, question_id)
         if not question_data:
             raise HTTPException(status_code=404, detail="Question not found")
         
@@ -320,19 +396,21 @@ async def generate_objective_for_question(question_id: str):
             "score": similarity_score,
             "success": True
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating objective: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate objective.")
 
 
-@router.post("/{question_id}/check-objective-similarity", response_class=JSONResponse)
+@router.post("/{question_id}/check-objective-similarity", response_class=ORJSONResponse)
 async def check_objective_similarity(question_id: str, data: dict):
     """
     Computes similarity score between a question and a provided objective text.
     """
     logger.info(f"Checking objective similarity for question_id: {question_id}")
     try:
-        question_data = db.load_question_details(question_id)
+        question_data = await asyncio.to_thread(db.load_question_details, question_id)
         if not question_data:
             raise HTTPException(status_code=404, detail="Question not found")
         
@@ -369,7 +447,7 @@ async def associate_objectives_page(request: Request, question_id: str):
     """
     logger.info(f"Loading associate objectives page for question_id: {question_id}")
     try:
-        question_data = db.load_question_details(question_id)
+        question_data = await asyncio.to_thread(db.load_question_details, question_id)
         if not question_data:
             raise HTTPException(status_code=404, detail="Question not found")
         
@@ -381,12 +459,14 @@ async def associate_objectives_page(request: Request, question_id: str):
                 "current_objective_ids": question_data.get('objective_ids', [])
             },
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error loading associate objectives page: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to load page.")
 
 
-@router.post("/{question_id}/associate-objectives", response_class=JSONResponse)
+@router.post("/{question_id}/associate-objectives", response_class=ORJSONResponse)
 async def save_objective_associations(question_id: str, data: dict):
     """
     Saves the objective associations for a question.
@@ -394,34 +474,22 @@ async def save_objective_associations(question_id: str, data: dict):
     """
     logger.info(f"Saving objective associations for question_id: {question_id}")
     try:
-        question = db.load_question_details(question_id)
+        question = await asyncio.to_thread(db.load_question_details, question_id)
         if not question:
             raise HTTPException(status_code=404, detail="Question not found")
         
         objective_ids = data.get('objective_ids', [])
         logger.info(f"Updating question {question_id} with {len(objective_ids)} objectives")
         
-        # Delete existing associations
-        with db.get_connection(use_row_factory=False) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "DELETE FROM question_objective_association WHERE question_id = ?",
-                (question_id,)
-            )
-            
-            # Insert new associations
-            for obj_id in objective_ids:
-                if obj_id:
-                    cursor.execute(
-                        "INSERT INTO question_objective_association (id, question_id, objective_id) VALUES (?, ?, ?)",
-                        (str(uuid.uuid4()), question_id, obj_id)
-                    )
-            
-            conn.commit()
+        # Replace existing associations
+        objective_ids = [obj_id for obj_id in objective_ids if obj_id]
+        await asyncio.to_thread(_replace_objective_associations, question_id, objective_ids)
         
         logger.info(f"Successfully updated objective associations for question {question_id}")
         return {"success": True, "message": "Objectives updated successfully"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error saving objective associations: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to save objectives.")
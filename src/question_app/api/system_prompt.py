@@ -8,10 +8,9 @@ This module contains all system prompt management functionality including:
 """
 
 from fastapi import APIRouter, Form, HTTPException, Request, Depends
-from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
+from fastapi.responses import HTMLResponse
 
-from ..core import get_logger
+from ..core import ORJSONResponse, get_logger, get_shared_templates
 from ..utils import (
     load_system_prompt,
     save_system_prompt,
@@ -22,10 +21,12 @@ from ..utils import (
 logger = get_logger(__name__)
 
 # Create router for system prompt endpoints
-router = APIRouter(prefix="/system-prompt", tags=["system-prompt"])
+router = APIRouter(
+    prefix="/system-prompt", tags=["system-prompt"], default_response_class=ORJSONResponse
+)
 
 # Templates setup
-templates = Jinja2Templates(directory="templates")
+templates = get_shared_templates("templates")
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -54,6 +55,8 @@ async def save_system_prompt_endpoint(prompt: str = Form(...)):
             return {"success": True, "message": "System prompt saved successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to save system prompt")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error saving system prompt: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -84,6 +87,8 @@ async def save_feedback_prompt_correct_endpoint(prompt: str = Form(...)):
             logger.info("Correct feedback prompt updated")
             return {"success": True, "message": "Correct feedback prompt saved successfully"}
         raise HTTPException(status_code=500, detail="Failed to save correct feedback prompt")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error saving correct feedback prompt: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -108,6 +113,8 @@ async def save_feedback_prompt_incorrect_endpoint(prompt: str = Form(...)):
             logger.info("Incorrect feedback prompt updated")
             return {"success": True, "message": "Incorrect feedback prompt saved successfully"}
         raise HTTPException(status_code=500, detail="Failed to save incorrect feedback prompt")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error saving incorrect feedback prompt: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -7,15 +7,24 @@ It uses ChromaDB as the backend and Ollama for embeddings.
 """
 
 import os
-import httpx
 import logging
 import asyncio # <-- Make sure this is imported
-from typing import List, Dict, Any, Optional, Tuple
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 
-from ..core import config, get_logger
+from ..core import ORJSONResponse, config, get_logger
 from ..models import Question  # Using the Pydantic model
-from ..services.database import DatabaseManager
+from ..services.database import get_database_manager
+from ..services.embeddings import (
+    EMBED_BATCH_SIZE,
+    embedding_batcher,
+    get_ollama_embeddings,
+    load_embedding_dim,
+    record_embedding_dim,
+)
+from ..services.query_cache import query_cache
 from ..services.tutor.interfaces import VectorStoreInterface
 from ..utils import (
     clean_question_text, 
@@ -37,53 +46,12 @@ except ImportError:
 logger = get_logger(__name__)
 
 # Create router
-router = APIRouter(prefix="/vector-store", tags=["vector-store"])
-
-# --- === OLLAMA EMBEDDING FUNCTION === ---
-# This is a helper function that your old file had, which is good.
-# We will keep it but move it to the top for clarity.
-async def get_ollama_embeddings(texts: List[str]) -> List[List[float]]:
-    """
-    Get embeddings from Ollama using the nomic-embed-text model.
-    """
-    embeddings = []
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for i, text in enumerate(texts):
-            try:
-                if not text.strip():
-                    logger.warning(f"Empty text at index {i}, skipping.")
-                    embeddings.append([0.0] * 768) # Default dimension for nomic
-                    continue
-
-                payload = {
-                    "model": config.OLLAMA_EMBEDDING_MODEL,
-                    "prompt": text.strip(),
-                }
-                response = await client.post(
-                    f"{config.OLLAMA_HOST}/api/embeddings", # Using config.OLLAMA_HOST
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                )
-                response.raise_for_status()
-
-                result = response.json()
-                if "embedding" not in result:
-                    logger.error(f"No embedding in response for text {i}: {result}")
-                    embeddings.append([0.0] * 768)
-                    continue
-
-                embeddings.append(result["embedding"])
-                
-                if i < len(texts) - 1:
-                    await asyncio.sleep(0.1)
-
-            except Exception as e:
-                logger.error(f"Error generating embedding for text {i}: {e}")
-                embeddings.append([0.0] * 768)
-
-    logger.info(f"Generated {len(embeddings)} embeddings from {len(texts)} texts")
-    return embeddings
+router = APIRouter(
+    prefix="/vector-store", tags=["vector-store"], default_response_class=ORJSONResponse
+)
 
+# Fields requested from collection.query
+SEARCH_INCLUDE = ["metadatas", "documents", "distances"]
 
 # --- === THIS IS THE CORRECTED SERVICE CLASS === ---
 
@@ -106,6 +74,7 @@ class ChromaVectorStoreService(VectorStoreInterface):
             self.client = chromadb.HttpClient(host=host, port=port)
             self.client.heartbeat() 
             self.collection_name = collection_name
+            self._collection = None
             
             logger.info(f"ChromaDB service initialized for collection '{self.collection_name}'")
 
@@ -114,10 +83,21 @@ class ChromaVectorStoreService(VectorStoreInterface):
             logger.critical(f"Please ensure ChromaDB is running at http://{host}:{port}")
             self.client = None
             self.collection_name = ""
+            self._collection = None
             raise ValueError(
                 f"Could not connect to a Chroma server at http://{host}:{port}. Are you sure it is running?"
             ) from e
 
+    def _get_collection(self) -> Any:
+        """Get the collection handle, fetching it from the server on first use."""
+        if self._collection is None:
+            self._collection = self.client.get_collection(self.collection_name)
+        return self._collection
+
+    def invalidate_collection(self) -> None:
+        """Forget the cached collection handle so the next search re-fetches it."""
+        self._collection = None
+
     async def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
         """
         Perform a semantic search in the vector store.
@@ -126,54 +106,175 @@ class ChromaVectorStoreService(VectorStoreInterface):
         if not self.client:
             logger.error("ChromaDB search failed. Client not initialized.")
             return []
-        
+
+        cached = query_cache.get_exact(query, k)
+        if cached is not None:
+            return cached
+
         try:
-            # --- === THIS IS THE FIX === ---
-            # 1. Get the collection *by name* every time.
+            # 1. Get the (cached) collection handle
             try:
-                collection = self.client.get_collection(self.collection_name)
+                collection = self._collection
+                if collection is None:
+                    collection = await asyncio.to_thread(self._get_collection)
             except Exception as get_e:
                 logger.error(f"Failed to get collection '{self.collection_name}': {get_e}")
                 logger.error("Did you create the vector store yet by clicking the button on the UI?")
                 return []
-            # --- === END OF FIX === ---
 
             logger.debug("Generating ollama embeddings for search...")
-            query_embeddings_list = await get_ollama_embeddings([query])
+            # Concurrent searches share one batched embedding call
+            query_embedding = await embedding_batcher.embed(query)
 
-            if not query_embeddings_list or not query_embeddings_list[0]:
+            if not query_embedding:
                 logger.error("Failed to generate query embeddings for search")
                 return []
             
-            query_vector = [query_embeddings_list[0]] # ChromaDB expects a list
+            cached = query_cache.get_similar(query_embedding, k)
+            if cached is not None:
+                return cached
+
+            query_vector = [query_embedding] # ChromaDB expects a list
             
-            # 2. Use the local 'collection' variable
-            results = collection.query(
+            # 2. Query off the event loop; the Chroma client call blocks
+            results = await asyncio.to_thread(
+                collection.query,
                 query_embeddings = query_vector,
                 n_results = k,
-                include = ["metadatas" , "documents" , "distances"]
+                include = SEARCH_INCLUDE
             )
 
-            if not results.get("documents") or not results.get('distances'):
+            # One query embedding, so every field holds a single result list
+            docs = (results.get("documents") or [[]])[0]
+            if not docs or not results.get("distances"):
                 return []
-                
-            combined_results = []
-            docs = results['documents'][0]
-            metadatas = results['metadatas'][0]
-            distances = results['distances'][0]
-
-            for content, meta, dist in zip(docs , metadatas , distances):
-                chunk = meta
-                chunk['content'] = content
-                chunk['distance'] = dist
-                combined_results.append(chunk)
-            
+
+            combined_results = [
+                {**(meta or {}), "content": content, "distance": dist}
+                for content, meta, dist in zip(
+                    docs, results["metadatas"][0], results["distances"][0]
+                )
+            ]
+
+            query_cache.put(query, k, query_embedding, combined_results)
             return combined_results
 
         except Exception as e:
             logger.error(f"ChromaDB search failed : {e}", exc_info=True)
+            # The collection may have been deleted or recreated elsewhere
+            self.invalidate_collection()
             return []
 
+    def _add_in_batches(
+        self,
+        collection: Any,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+    ) -> None:
+        """
+        Add documents to a collection in ``config.CHROMA_BATCH_SIZE`` batches.
+
+        A failing batch is retried once as two half-size batches.
+        """
+        batch_size = max(1, config.CHROMA_BATCH_SIZE)
+        for start in range(0, len(documents), batch_size):
+            end = min(start + batch_size, len(documents))
+            try:
+                collection.add(
+                    documents=documents[start:end],
+                    embeddings=embeddings[start:end],
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end],
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Adding documents {start}-{end} failed ({e}), retrying at half size"
+                )
+                half = max(1, (end - start) // 2)
+                for retry_start in range(start, end, half):
+                    retry_end = min(retry_start + half, end)
+                    collection.add(
+                        documents=documents[retry_start:retry_end],
+                        embeddings=embeddings[retry_start:retry_end],
+                        metadatas=metadatas[retry_start:retry_end],
+                        ids=ids[retry_start:retry_end],
+                    )
+            logger.debug("Added documents %d-%d of %d", start, end, len(documents))
+
+    async def _embed_batches(
+        self,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        batch_size: int,
+    ) -> AsyncIterator[Tuple[List[str], List[List[float]], List[Dict[str, Any]], List[str]]]:
+        """Yield ``(documents, embeddings, metadatas, ids)`` one batch at a time."""
+        for start in range(0, len(documents), batch_size):
+            end = start + batch_size
+            batch_documents = documents[start:end]
+            embeddings = await get_ollama_embeddings(batch_documents)
+            if start == 0:
+                record_embedding_dim(embeddings)
+            logger.info(
+                "Generated embeddings %d-%d of %d", start, start + len(embeddings), len(documents)
+            )
+            yield batch_documents, embeddings, metadatas[start:end], ids[start:end]
+
+    async def _embed_and_add(
+        self,
+        collection: Any,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+    ) -> None:
+        """
+        Embed documents and add them to ``collection`` as a two-stage pipeline.
+
+        Embedding runs up to two batches ahead of the Chroma writes, so Ollama
+        and ChromaDB work at the same time and only a few batches of
+        embeddings are held in memory.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+        batch_size = EMBED_BATCH_SIZE * config.OLLAMA_CONCURRENCY
+
+        async def produce() -> None:
+            try:
+                async for batch in self._embed_batches(documents, metadatas, ids, batch_size):
+                    await queue.put(batch)
+            except Exception as e:
+                await queue.put(e)
+            else:
+                await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                batch_documents, embeddings, batch_metadatas, batch_ids = item
+                await asyncio.to_thread(
+                    self._add_in_batches,
+                    collection,
+                    batch_documents,
+                    embeddings,
+                    batch_metadatas,
+                    batch_ids,
+                )
+        finally:
+            producer.cancel()
+
+    async def _delete_collection_if_exists(self, name: str) -> None:
+        try:
+            await asyncio.to_thread(self.client.delete_collection, name)
+            logger.info(f"Deleted existing collection: '{name}'")
+        except Exception:
+            logger.info(f"No existing collection '{name}' to delete.")
+
     async def create_vector_store(self) -> Dict[str, Any]:
         """
         Fetch all questions from the SQLite DB, process them,
@@ -184,8 +285,7 @@ class ChromaVectorStoreService(VectorStoreInterface):
             logger.info("Starting to create vector store...")
             
             # 1. Fetch data from SQLite
-            # We must create a new DB manager for this task
-            db_manager = DatabaseManager(config.db_path)
+            db_manager = get_database_manager(config.db_path)
             questions_from_db = db_manager.list_all_questions() # This gets List[Dict]
             
             if not questions_from_db:
@@ -199,50 +299,48 @@ class ChromaVectorStoreService(VectorStoreInterface):
             for q_header in questions_from_db:
                 q_detail = db_manager.load_question_details(q_header['id'])
                 if q_detail:
-                    full_questions_data.append(q_detail)
+                    full_questions_data.append(ChunkQuestion.from_dict(q_detail))
 
             # 2. Prepare data for ChromaDB (using your old file's function)
             logger.info("Creating comprehensive chunks from questions...")
             documents, metadatas, ids = create_comprehensive_chunks(full_questions_data)
             logger.info(f"Created {len(documents)} document chunks")
 
-            # 3. Generate embeddings
-            logger.info("Generating embeddings using Ollama...")
-            embeddings = await get_ollama_embeddings(documents)
-            logger.info(f"Generated {len(embeddings)} embeddings")
-
-            # 4. Add to ChromaDB
-            logger.info(f"Connecting to ChromaDB to create collection...")
-            
-            # Delete existing collection if it exists
-            try:
-                self.client.delete_collection(self.collection_name)
-                logger.info(f"Deleted existing collection: '{self.collection_name}'")
-            except Exception:
-                logger.info(f"No existing collection '{self.collection_name}' to delete.")
-
-            # Create new collection
-            collection = self.client.create_collection(
-                name=self.collection_name,
+            # 3. Build into a staging collection so searches keep using the
+            # live one until the new one is complete
+            staging_name = f"{self.collection_name}_rebuild"
+            logger.info(f"Connecting to ChromaDB to create collection '{staging_name}'...")
+            await self._delete_collection_if_exists(staging_name)
+            collection = await asyncio.to_thread(
+                self.client.create_collection,
+                name=staging_name,
                 metadata={"description": "Quiz questions with comprehensive content", "hnsw:space": "cosine"},
             )
-            
-            logger.info(f"Adding {len(documents)} documents to collection...")
-            collection.add(
-                documents=documents, 
-                embeddings=embeddings, 
-                metadatas=metadatas, 
-                ids=ids
-            )
 
+            # 4. Embed with Ollama and add to ChromaDB, overlapping the two
+            logger.info(f"Embedding and adding {len(documents)} documents to collection...")
+            try:
+                await self._embed_and_add(collection, documents, metadatas, ids)
+            except Exception:
+                await self._delete_collection_if_exists(staging_name)
+                raise
+
+            # Swap the finished collection in under the live name
+            await self._delete_collection_if_exists(self.collection_name)
+            await asyncio.to_thread(collection.modify, name=self.collection_name)
+            self._collection = collection
+            query_cache.clear()
             logger.info("Successfully created/updated vector store.")
             
             # 5. Get stats
-            count = collection.count()
+            count = await asyncio.to_thread(collection.count)
             stats = {
                 "total_documents": count,
                 "collection_name": collection.name,
                 "embedding_model": config.OLLAMA_EMBEDDING_MODEL,
+                "embedding_dim": load_embedding_dim(),
+                "total_questions": len(full_questions_data),
+                **summarize_chunks(metadatas),
             }
             
             return {
@@ -251,46 +349,121 @@ class ChromaVectorStoreService(VectorStoreInterface):
             }
             
         except Exception as e:
+            query_cache.clear()
             logger.error(f"Failed to create vector store: {e}", exc_info=True)
             raise HTTPException(
                 status_code=500, detail=f"Failed to create vector store: {e}"
             )
 
+_shared_service: Optional[ChromaVectorStoreService] = None
+
+
+def get_vector_store_service() -> ChromaVectorStoreService:
+    """
+    Get the process-wide ChromaVectorStoreService, creating it on first use.
+
+    Failed connections are not cached, so a later call retries once the
+    Chroma server is up.
+
+    Returns:
+        Shared ChromaVectorStoreService instance
+
+    Raises:
+        ValueError: If the Chroma server cannot be reached
+    """
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = ChromaVectorStoreService()
+    return _shared_service
+
 # --- (The rest of your file is unchanged, but I've included it for completeness) ---
 
+@dataclass(slots=True)
+class ChunkAnswer:
+    """The answer fields used to build vector store chunks."""
+
+    text: str
+    feedback_text: str
+    is_correct: bool
+
+    @classmethod
+    def from_dict(cls, answer: Dict[str, Any]) -> "ChunkAnswer":
+        get = answer.get
+        return cls(get("text", ""), get("feedback_text", ""), get("is_correct", False))
+
+
+@dataclass(slots=True)
+class ChunkQuestion:
+    """The question fields used to build vector store chunks, with defaults applied."""
+
+    id: str
+    question_text: str
+    neutral_comments: str
+    topic: str
+    tags: str
+    learning_objective: str
+    question_type: str
+    answers: List[ChunkAnswer]
+
+    @classmethod
+    def from_dict(cls, question: Dict[str, Any]) -> "ChunkQuestion":
+        get = question.get
+        return cls(
+            id=str(get("id", "unknown")),
+            question_text=get("question_text", ""),
+            neutral_comments=get("neutral_comments", ""),
+            topic=get("topic", "Web Accessibility"),
+            tags=", ".join(get("tags", [])),
+            learning_objective=get("learning_objective", ""),
+            question_type=get("question_type", "multiple_choice_question"),
+            answers=[ChunkAnswer.from_dict(a) for a in get("answers", ())],
+        )
+
+
 def create_comprehensive_chunks(
-    questions: List[Dict[str, Any]]
+    questions: List[Union[ChunkQuestion, Dict[str, Any]]]
 ) -> Tuple[List[str], List[Dict[str, Any]], List[str]]:
     """
     Create comprehensive chunks from quiz questions for vector store processing.
-    (This function is from your old file)
+
+    Questions may be plain dicts (as loaded from the database) or
+    ChunkQuestion instances already converted at load time.
     """
     documents = []
     metadatas = []
     ids = []
 
+    # Questions share a lot of boilerplate HTML (feedback, answer text), and
+    # clean_question_text parses HTML, so clean each distinct string once
+    cleaned: Dict[str, str] = {}
+
+    def clean(text: str) -> str:
+        result = cleaned.get(text)
+        if result is None:
+            result = cleaned[text] = clean_question_text(text)
+        return result
+
     for question in questions:
-        question_id = str(question.get("id", "unknown"))
-        question_text = clean_question_text(question.get("question_text", ""))
-        
-        # --- (This logic is different from my last version, but let's use yours) ---
-        general_feedback = clean_question_text(
-            question.get("neutral_comments", "") # Your old file used this key
-        )
-        topic = question.get("topic", "Web Accessibility") # Set default
-        tags = ", ".join(question.get("tags", [])) # Handle tags as a list
-        learning_objective = question.get("learning_objective", "")
-        question_type = question.get("question_type", "multiple_choice_question")
+        if not isinstance(question, ChunkQuestion):
+            question = ChunkQuestion.from_dict(question)
+        question_id = question.id
+        question_text = clean(question.question_text)
+        general_feedback = clean(question.neutral_comments)
+        topic = question.topic
+        tags = question.tags
+        learning_objective = question.learning_objective
+        question_type = question.question_type
+        question_header = f"Question: {question_text}"
 
         # Create main question chunk
         if question_text:
-            main_content = f"Question: {question_text}"
+            fragments = [question_header]
             if general_feedback:
-                main_content += f"\n\nGeneral Feedback: {general_feedback}"
+                fragments.append(f"General Feedback: {general_feedback}")
             if learning_objective:
-                main_content += f"\n\nLearning Objective: {learning_objective}"
+                fragments.append(f"Learning Objective: {learning_objective}")
 
-            documents.append(main_content)
+            documents.append("\n\n".join(fragments))
             metadatas.append(
                 {
                     "question_id": question_id,
@@ -304,34 +477,30 @@ def create_comprehensive_chunks(
             ids.append(f"q_{question_id}_main")
 
         # Create answer-specific chunks
-        answers = question.get("answers", [])
-        for i, answer in enumerate(answers):
-            answer_text = clean_question_text(answer.get("text", ""))
-            # Use 'feedback_text' from our new DB model
-            answer_feedback = clean_answer_feedback(answer.get("feedback_text", "")) 
-            answer_feedback = clean_question_text(answer_feedback)
-
-            if answer_text:
-                answer_content = (
-                    f"Question: {question_text}\n\nAnswer {i+1}: {answer_text}"
-                )
-                if answer_feedback:
-                    answer_content += f"\n\nAnswer Feedback: {answer_feedback}"
-
-                documents.append(answer_content)
-                metadatas.append(
-                    {
-                        "question_id": question_id,
-                        "chunk_type": "answer",
-                        "answer_index": i,
-                        "is_correct": answer.get("is_correct", False), # Use new key
-                        "topic": topic,
-                        "tags": tags,
-                        "question_type": question_type,
-                        "learning_objective": learning_objective,
-                    }
-                )
-                ids.append(f"q_{question_id}_answer_{i}")
+        for i, answer in enumerate(question.answers):
+            answer_text = clean(answer.text)
+            if not answer_text:
+                continue
+            answer_feedback = clean(clean_answer_feedback(answer.feedback_text))
+
+            fragments = [question_header, f"Answer {i+1}: {answer_text}"]
+            if answer_feedback:
+                fragments.append(f"Answer Feedback: {answer_feedback}")
+
+            documents.append("\n\n".join(fragments))
+            metadatas.append(
+                {
+                    "question_id": question_id,
+                    "chunk_type": "answer",
+                    "answer_index": i,
+                    "is_correct": answer.is_correct,
+                    "topic": topic,
+                    "tags": tags,
+                    "question_type": question_type,
+                    "learning_objective": learning_objective,
+                }
+            )
+            ids.append(f"q_{question_id}_answer_{i}")
 
     logger.info(
         f"Created {len(documents)} comprehensive chunks from {len(questions)} questions"
@@ -339,6 +508,31 @@ def create_comprehensive_chunks(
     return documents, metadatas, ids
 
 
+def summarize_chunks(metadatas: List[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """
+    Count chunks per topic, question type and tag.
+
+    Args:
+        metadatas: Chunk metadata from create_comprehensive_chunks
+
+    Returns:
+        Dictionary with topic_counts, question_type_counts and tag_counts
+    """
+    topic_counts = Counter(m.get("topic", "unknown") for m in metadatas)
+    question_type_counts = Counter(m.get("question_type", "unknown") for m in metadatas)
+    tag_counts = Counter(
+        tag
+        for m in metadatas
+        for tag in map(str.strip, m.get("tags", "").split(","))
+        if tag
+    )
+    return {
+        "topic_counts": dict(topic_counts),
+        "question_type_counts": dict(question_type_counts),
+        "tag_counts": dict(tag_counts),
+    }
+
+
 # --- === API Endpoints for the /vector-store router === ---
 
 @router.post("/create")
@@ -348,8 +542,7 @@ async def create_vector_store_endpoint(background_tasks: BackgroundTasks):
     """
     logger.info("Received request to create vector store.")
     try:
-        # We must re-create the service here to use it
-        vector_service = ChromaVectorStoreService()
+        vector_service = await asyncio.to_thread(get_vector_store_service)
         result = await vector_service.create_vector_store()
         return result
     except Exception as e:
@@ -365,7 +558,7 @@ async def search_vector_store_endpoint(query: str):
     if not query:
         raise HTTPException(status_code=400, detail="Query cannot be empty.")
     try:
-        vector_service = ChromaVectorStoreService()
+        vector_service = await asyncio.to_thread(get_vector_store_service)
         results = await vector_service.search(query, k=3)
         return {"results": results}
     except Exception as e:
@@ -377,14 +570,17 @@ async def search_vector_store_endpoint(query: str):
 async def get_vector_store_status():
     """Get the current status of the vector store"""
     try:
-        client = chromadb.HttpClient(host = config.CHROMA_HOST , port = config.CHROMA_PORT)
+        client = await asyncio.to_thread(
+            chromadb.HttpClient, host=config.CHROMA_HOST, port=config.CHROMA_PORT
+        )
         try:
-            collection = client.get_collection("quiz_questions")
-            count = collection.count()
+            collection = await asyncio.to_thread(client.get_collection, "quiz_questions")
+            count = await asyncio.to_thread(collection.count)
             return {
                 "success": True, "status": "active",
                 "collection_name": "quiz_questions",
                 "document_count": count,
+                "embedding_dim": load_embedding_dim(),
             }
         except Exception:
             return {
@@ -403,9 +599,14 @@ async def get_vector_store_status():
 async def delete_vector_store():
     """Delete the entire vector store"""
     try:
-        client = chromadb.HttpClient(host = config.CHROMA_HOST , port = config.CHROMA_PORT)
+        client = await asyncio.to_thread(
+            chromadb.HttpClient, host=config.CHROMA_HOST, port=config.CHROMA_PORT
+        )
         try:
-            client.delete_collection("quiz_questions")
+            await asyncio.to_thread(client.delete_collection, "quiz_questions")
+            if _shared_service is not None:
+                _shared_service.invalidate_collection()
+            query_cache.clear()
             logger.info("Vector store collection deleted successfully")
             return {"success": True, "message": "Vector store deleted successfully"}
         except Exception as e:
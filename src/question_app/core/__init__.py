@@ -7,14 +7,46 @@ fundamental components.
 
 from .app import create_app, get_templates, register_routers
 from .config import Config, config
-from .logging import get_logger, setup_logging
+from .http import close_http_client, get_http_client
+from .logging import (
+    RequestIdFilter,
+    TokenBucket,
+    get_logger,
+    log_exception,
+    request_id_var,
+    setup_logging,
+)
+from .responses import ORJSONResponse, etag_matches, make_etag
+from .templating import (
+    create_templates,
+    get_shared_templates,
+    load_template,
+    preload_templates,
+    render_template,
+    template_fingerprint,
+)
 
 __all__ = [
     "config",
     "Config",
     "setup_logging",
     "get_logger",
+    "log_exception",
+    "TokenBucket",
+    "RequestIdFilter",
+    "request_id_var",
     "create_app",
     "register_routers",
     "get_templates",
+    "create_templates",
+    "get_shared_templates",
+    "preload_templates",
+    "load_template",
+    "render_template",
+    "template_fingerprint",
+    "ORJSONResponse",
+    "make_etag",
+    "etag_matches",
+    "get_http_client",
+    "close_http_client",
 ]
@@ -5,16 +5,113 @@ This module centralizes FastAPI application creation, middleware setup,
 and router registration.
 """
 
-from fastapi import FastAPI
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from .config import config
-from .logging import setup_logging
+from .http import close_http_client, get_http_client
+from .logging import request_id_var, setup_logging
+from .templating import get_shared_templates
 
 # Set up logging
 logger = setup_logging()
 
+# Responses smaller than this are sent uncompressed; gzip overhead isn't worth it
+GZIP_MINIMUM_SIZE = 1024
+# zlib level 6 gets most of the size win of 9 for a fraction of the CPU
+GZIP_COMPRESS_LEVEL = 6
+
+
+async def warmup(app: FastAPI) -> None:
+    """
+    Exercise the cold paths of the chat endpoint before serving traffic.
+
+    Runs one embedding + vector search so the first real request per worker
+    does not pay the model-load and Chroma connection costs, and imports the
+    common Pygments lexers used when rendering question Markdown. Templates
+    are already compiled by ``get_shared_templates``. Failures are logged and
+    ignored; the app still starts if Ollama or ChromaDB is unavailable.
+
+    Args:
+        app: FastAPI application instance
+    """
+    from ..utils import preload_lexers
+
+    start = time.perf_counter()
+    tutor_system = getattr(app.state, "tutor_system", None)
+    try:
+        if tutor_system is not None:
+            await tutor_system.vector_store.search("warmup", k=1)
+    except Exception as e:
+        logger.warning(f"Warmup failed: {e}")
+    try:
+        await asyncio.to_thread(preload_lexers)
+    except Exception as e:
+        logger.warning(f"Lexer preload failed: {e}")
+    logger.info("Warmup done in %.2fs", time.perf_counter() - start)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Manage application-wide resources for the lifetime of the app.
+
+    Opens the shared HTTP client, creates the chat tutor system, starts the
+    embedding micro-batcher and warms the chat code paths on startup, and
+    releases resources, including pooled SQLite connections, on shutdown.
+
+    Args:
+        app: FastAPI application instance
+    """
+    from ..api.chat import close_tutor_system, get_tutor_system
+    from ..services.database import close_database_managers
+    from ..services.embeddings import embedding_batcher
+
+    app.state.http = get_http_client()
+    app.state.tutor_system = await asyncio.to_thread(get_tutor_system)
+    await embedding_batcher.start()
+    await warmup(app)
+    try:
+        yield
+    finally:
+        await embedding_batcher.stop()
+        app.state.tutor_system = None
+        await close_tutor_system()
+        await close_http_client()
+        close_database_managers()
+
+
+async def request_id_middleware(request: Request, call_next):
+    """
+    Tag the request with an ID for log correlation.
+
+    Uses the caller's ``X-Request-ID`` header when present (e.g. from a proxy),
+    otherwise generates one. The ID is exposed to log records through
+    ``request_id_var`` and echoed back in the response header.
+
+    Args:
+        request: Incoming request
+        call_next: Next handler in the middleware chain
+
+    Returns:
+        The response with an ``X-Request-ID`` header
+    """
+    request_id = request.headers.get("x-request-id", "")[:64] or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 
 def create_app() -> FastAPI:
     """
@@ -26,11 +123,20 @@ def create_app() -> FastAPI:
     logger.info("Creating FastAPI application")
 
     # Create FastAPI app
-    app = FastAPI(title=config.APP_TITLE)
+    app = FastAPI(title=config.APP_TITLE, lifespan=lifespan)
+    # Added first so it sits inside the request-id middleware and still sees
+    # whole bodies to size up; event streams (chat) opt out by setting
+    # Content-Encoding: identity
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=GZIP_MINIMUM_SIZE,
+        compresslevel=GZIP_COMPRESS_LEVEL,
+    )
+    app.middleware("http")(request_id_middleware)
 
     # Mount static files and templates
     app.mount("/static", StaticFiles(directory="static"), name="static")
-    templates = Jinja2Templates(directory="templates")
+    templates = get_shared_templates("templates")
 
     # Store templates in app state for access in routes
     app.state.templates = templates
@@ -6,7 +6,8 @@ management for the application.
 """
 
 import os
-from typing import Optional
+from types import MappingProxyType
+from typing import Mapping, Optional
 
 from dotenv import load_dotenv
 
@@ -38,22 +39,52 @@ class Config:
         self.AZURE_OPENAI_SUBSCRIPTION_KEY: Optional[str] = os.getenv(
             "AZURE_OPENAI_SUBSCRIPTION_KEY"
         )
+        # Read-only view shared by every tutor system, built once at startup
+        self.azure_openai_config: Mapping[str, Optional[str]] = MappingProxyType(
+            {
+                "api_key": self.AZURE_OPENAI_SUBSCRIPTION_KEY,
+                "endpoint": self.AZURE_OPENAI_ENDPOINT,
+                "deployment_name": self.AZURE_OPENAI_DEPLOYMENT_ID,
+                "api_version": self.AZURE_OPENAI_API_VERSION,
+            }
+        )
+        # Max tutor sessions calling Azure at once, and how long (seconds) a
+        # request may wait for a free slot before getting a 503
+        self.AZURE_MAX_CONCURRENCY: int = int(os.getenv("AZURE_MAX_CONCURRENCY", 8))
+        self.AZURE_QUEUE_TIMEOUT: float = float(os.getenv("AZURE_QUEUE_TIMEOUT", 10))
+        # Max answer-feedback completions in flight per generate-feedback call
+        self.AI_FEEDBACK_CONCURRENCY: int = int(os.getenv("AI_FEEDBACK_CONCURRENCY", 5))
 
         # Ollama Configuration
         self.OLLAMA_HOST: str = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+        # OLLAMA_HOST with a scheme, so bare "host:port" values also work
+        self.OLLAMA_BASE_URL: str = (
+            self.OLLAMA_HOST
+            if self.OLLAMA_HOST.startswith(("http://", "https://"))
+            else f"http://{self.OLLAMA_HOST}"
+        )
         self.OLLAMA_EMBEDDING_MODEL: str = os.getenv(
             "OLLAMA_EMBEDDING_MODEL", "nomic-embed-text"
         )
+        # Max embedding requests in flight per call (match OLLAMA_NUM_PARALLEL)
+        self.OLLAMA_CONCURRENCY: int = int(os.getenv("OLLAMA_CONCURRENCY", 4))
 
         # Application Configuration
         self.APP_TITLE: str = "Canvas Quiz Manager"
         self.LOG_FILE: str = "canvas_app.log"
+        self.DEBUG: bool = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
+        # Compiled template bytecode directory (default: system temp directory)
+        self.TEMPLATE_CACHE_DIR: Optional[str] = os.getenv("TEMPLATE_CACHE_DIR")
 
         #ChromaDB Configuration
         self.CHROMA_HOST : str = os.getenv("CHROMA_HOST" , "localhost")
         self.CHROMA_PORT : int = int(os.getenv("CHROMA_PORT" , 8000))
+        # Documents per collection.add call when building the vector store
+        self.CHROMA_BATCH_SIZE: int = int(os.getenv("CHROMA_BATCH_SIZE", 200))
 
         self.db_path: str = os.path.join(BASE_DIR, "data" , "socratic_tutor.db")
+        # Embedding model/dimension recorded when the vector store is built
+        self.EMBEDDING_META_PATH: str = os.path.join(BASE_DIR, "data", "embedding_meta.json")
 
 
 
@@ -0,0 +1,102 @@
+"""
+Shared HTTP client for the Question App.
+
+This module owns a single process-wide ``httpx.AsyncClient`` so outbound
+calls (Azure OpenAI, Ollama) reuse pooled keep-alive connections instead of
+paying a new TCP/TLS handshake per request. HTTP/2 is used when the optional
+``h2`` package is installed.
+"""
+
+import asyncio
+from typing import Optional, Set
+
+import httpx
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+HTTP_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0
+)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=3.0)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+# Close tasks for clients replaced after a loop change, kept so they finish
+_closing: Set["asyncio.Task[None]"] = set()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def _close_quietly(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except Exception as e:
+        # Its connections may belong to a loop that has already shut down
+        logger.debug(f"Error closing replaced HTTP client: {e}")
+
+
+def _discard_client(
+    client: httpx.AsyncClient, client_loop: Optional[asyncio.AbstractEventLoop]
+) -> None:
+    """Close a replaced client, on its own loop if that is still running."""
+    if client.is_closed:
+        return
+    if client_loop is not None and client_loop.is_running():
+        asyncio.run_coroutine_threadsafe(_close_quietly(client), client_loop)
+        return
+    task = asyncio.get_running_loop().create_task(_close_quietly(client))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared AsyncClient, creating it on first use.
+
+    The client is started by the application lifespan. Pooled connections are
+    bound to the event loop that opened them, so a new client is created if
+    called from a different running loop (e.g. in tests or scripts that run
+    without the lifespan) and the old one is closed in the background.
+
+    Returns:
+        Shared httpx.AsyncClient instance
+    """
+    global _client, _client_loop
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    if (
+        _client is None
+        or _client.is_closed
+        or (loop is not None and loop is not _client_loop)
+    ):
+        if _client is not None:
+            _discard_client(_client, _client_loop)
+        _client = httpx.AsyncClient(
+            http2=_http2_available(), limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT
+        )
+        _client_loop = loop
+        logger.info("Created shared HTTP client")
+
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared AsyncClient, if one was created."""
+    global _client, _client_loop
+
+    client, _client, _client_loop = _client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+        logger.info("Closed shared HTTP client")
@@ -5,10 +5,24 @@ This module centralizes logging configuration and setup for the application.
 """
 
 import logging
+import threading
+import time
+from contextvars import ContextVar
 from typing import Optional
 
 from .config import config
 
+# ID of the request being handled, set by the request-ID middleware
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Copy the current request ID onto every log record as ``request_id``."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
 
 def setup_logging(
     level: int = logging.INFO,
@@ -30,14 +44,14 @@ def setup_logging(
         log_file = config.LOG_FILE
 
     if format_string is None:
-        format_string = "%(asctime)s - %(levelname)s - %(message)s"
+        format_string = "%(asctime)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+    handlers = [logging.FileHandler(log_file), logging.StreamHandler()]
+    for handler in handlers:
+        handler.addFilter(RequestIdFilter())
 
     # Configure logging
-    logging.basicConfig(
-        level=level,
-        format=format_string,
-        handlers=[logging.FileHandler(log_file), logging.StreamHandler()],
-    )
+    logging.basicConfig(level=level, format=format_string, handlers=handlers)
 
     # Get and return the logger
     logger = logging.getLogger(__name__)
@@ -57,3 +71,59 @@ def get_logger(name: str) -> logging.Logger:
         Logger instance
     """
     return logging.getLogger(name)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for rate limiting expensive work such as
+    traceback capture in log records.
+
+    Args:
+        rate: Tokens added per second
+        burst: Maximum number of tokens the bucket can hold
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """
+        Take one token if available.
+
+        Returns:
+            True if a token was taken, False if the bucket is empty
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+def log_exception(
+    logger: logging.Logger, message: str, exc: BaseException, bucket: TokenBucket
+) -> None:
+    """
+    Log an error with its traceback while the bucket allows it.
+
+    Once the bucket is exhausted (e.g. during an upstream outage) only the
+    message and exception text are logged, which bounds the cost of
+    formatting tracebacks on every failing request.
+
+    Args:
+        logger: Logger to write to
+        message: Log message prefix
+        exc: The exception being handled
+        bucket: Token bucket limiting traceback capture
+    """
+    if bucket.try_acquire():
+        logger.error(f"{message}: {exc}", exc_info=exc)
+    else:
+        logger.error(f"{message}: {exc} (traceback suppressed)")
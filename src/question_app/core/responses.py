@@ -0,0 +1,45 @@
+"""
+Response classes for the Question App.
+
+This module provides JSON response classes and ETag helpers shared by the
+API routers.
+"""
+
+import hashlib
+from typing import Any, Union
+
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    orjson serializes in C and emits UTF-8 bytes directly, which is several
+    times faster than the stdlib encoder used by ``JSONResponse`` for large
+    payloads such as tutor session metadata.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def make_etag(value: Union[str, bytes]) -> str:
+    """Strong ETag for a text or bytes payload."""
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return '"' + hashlib.blake2b(value, digest_size=8).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (
+        tag.strip() for tag in if_none_match.split(",")
+    )
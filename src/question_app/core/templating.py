@@ -0,0 +1,178 @@
+"""
+Jinja2 template configuration for the Question App.
+
+This module builds the ``Jinja2Templates`` instances used by the app and its
+routers, tuned so that templates are compiled once per process in production.
+"""
+
+import os
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+from fastapi.responses import HTMLResponse
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache, Template
+from jinja2.utils import LRUCache
+
+from .config import config
+from .logging import get_logger
+from .responses import make_etag
+
+logger = get_logger(__name__)
+
+# Compiled templates kept in memory per environment (Jinja's default is 400;
+# set explicitly so all of the app's templates and includes always fit)
+TEMPLATE_CACHE_SIZE = 400
+
+
+def create_templates(directory: str = "templates") -> Jinja2Templates:
+    """
+    Create a Jinja2Templates instance for the given template directory.
+
+    Outside of debug mode the underlying Jinja environment skips the per-render
+    mtime check (``auto_reload=False``) and stores compiled template bytecode in
+    a filesystem cache (``TEMPLATE_CACHE_DIR``, or the system temp directory),
+    so templates are compiled once and later workers load the bytecode instead
+    of re-parsing the source. Set ``DEBUG=true`` to pick up template edits
+    without restarting the server.
+
+    Args:
+        directory: Path to the template directory
+
+    Returns:
+        Configured Jinja2Templates instance
+    """
+    templates = Jinja2Templates(directory=directory)
+
+    if not config.DEBUG:
+        templates.env.auto_reload = False
+        templates.env.cache = LRUCache(TEMPLATE_CACHE_SIZE)
+        cache_dir = config.TEMPLATE_CACHE_DIR
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        templates.env.bytecode_cache = FileSystemBytecodeCache(directory=cache_dir)
+
+    return templates
+
+
+_shared_templates: Dict[str, Jinja2Templates] = {}
+
+
+def preload_templates(templates: Jinja2Templates) -> int:
+    """
+    Compile every template in the environment's loader.
+
+    Templates that fail to compile are logged and skipped so a broken page
+    does not stop the app from starting; the error resurfaces on render.
+
+    Args:
+        templates: Jinja2Templates instance to warm
+
+    Returns:
+        Number of templates compiled
+    """
+    compiled = 0
+    for name in templates.env.list_templates(extensions=["html"]):
+        try:
+            templates.env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            logger.warning(f"Could not precompile template {name}: {e}")
+    return compiled
+
+
+def get_shared_templates(directory: str = "templates") -> Jinja2Templates:
+    """
+    Get the process-wide Jinja2Templates instance for a template directory.
+
+    The app and all routers render from the same environment, so each
+    template is compiled once per process rather than once per router. The
+    instance is created with ``create_templates`` and every template is
+    compiled on first use, keeping compilation off the request path.
+
+    Args:
+        directory: Path to the template directory
+
+    Returns:
+        Shared Jinja2Templates instance
+    """
+    templates = _shared_templates.get(directory)
+    if templates is None:
+        templates = _shared_templates[directory] = create_templates(directory)
+        count = preload_templates(templates)
+        logger.info(f"Precompiled {count} templates from '{directory}'")
+    return templates
+
+
+def load_template(templates: Jinja2Templates, name: str) -> Union[str, Template]:
+    """
+    Look up a template once so a router can keep it at module scope.
+
+    In debug mode the name is returned instead, so ``render_template``
+    fetches it per call and picks up edits through ``auto_reload``.
+
+    Args:
+        templates: Jinja2Templates instance holding the template
+        name: Template file name
+
+    Returns:
+        The compiled template, or its name in debug mode
+    """
+    if config.DEBUG:
+        return name
+    return templates.get_template(name)
+
+
+def render_template(
+    templates: Jinja2Templates,
+    template: Union[str, Template],
+    context: Mapping[str, Any],
+    headers: Optional[Mapping[str, str]] = None,
+) -> HTMLResponse:
+    """
+    Render a template straight to an HTMLResponse.
+
+    Skips ``TemplateResponse``'s per-call template lookup and context
+    processing; ``context`` must include ``request`` if the template uses
+    ``url_for``.
+
+    Args:
+        templates: Jinja2Templates instance holding the template
+        template: Template from ``load_template``, or a template name
+        context: Template variables
+        headers: Extra response headers
+
+    Returns:
+        HTMLResponse with the rendered page
+    """
+    if isinstance(template, str):
+        template = templates.get_template(template)
+    return HTMLResponse(template.render(context), headers=headers)
+
+
+# Template file -> (mtime_ns, fingerprint), so the source is hashed once per edit
+_fingerprints: Dict[str, Tuple[int, str]] = {}
+
+
+def template_fingerprint(templates: Jinja2Templates, template: Union[str, Template]) -> str:
+    """
+    Fingerprint a template's source for use in page ETags.
+
+    Pages cached by ETag must change it when a deploy changes the template
+    (including its inline scripts), not only when the data changes.
+
+    Args:
+        templates: Jinja2Templates instance holding the template
+        template: Template from ``load_template``, or a template name
+
+    Returns:
+        A short hash of the template file's contents
+    """
+    if isinstance(template, str):
+        template = templates.get_template(template)
+    filename = template.filename
+    mtime = os.stat(filename).st_mtime_ns
+    cached = _fingerprints.get(filename)
+    if cached is None or cached[0] != mtime:
+        with open(filename, "rb") as f:
+            cached = _fingerprints[filename] = (mtime, make_etag(f.read()))
+    return cached[1]
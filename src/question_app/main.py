@@ -42,6 +42,8 @@ Recent Improvements (v0.3.0):
 - Enhanced debugging capabilities
 """
 
+import os
+
 import uvicorn
 from fastapi import HTTPException, Request
 from fastapi.responses import HTMLResponse
@@ -53,7 +55,7 @@ from .core import config, create_app, get_logger, get_templates, register_router
 
 
 #Import DB Manager
-from .services.database import DatabaseManager
+from .services.database import get_database_manager
 
 # TODO: Test fastapi_mpc https://github.com/tadata-org/fastapi_mcp
 # TODO: Offload vector store to S3 Vector Bucket
@@ -64,7 +66,7 @@ logger = get_logger(__name__)
 
 #Initialize DB
 logger.info(f"Initializing Database Manager for main app...")
-db = DatabaseManager(config.db_path)
+db = get_database_manager(config.db_path)
 
 # Create and configure the application
 app = create_app()
@@ -139,6 +141,8 @@ def dev():
         This function is designed to be called from the command line or
         as a Poetry script entry point for development with hot reloading.
     """
+    # Re-read edited templates without a restart (see core.templating)
+    os.environ.setdefault("DEBUG", "true")
     uvicorn.run("question_app.main:app", host="0.0.0.0", port=8080, reload=True)
 
 
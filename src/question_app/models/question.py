@@ -7,7 +7,7 @@ These models have been updated to match the new database schema
 and the data being sent by the new edit_question.html JavaScript.
 """
 
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from typing import List, Optional
 
 # This tells Pydantic V2 to use 'from_attributes' (the new 'orm_mode')
@@ -55,4 +55,13 @@ class NewQuestion(BaseModel):
     
     question_text: str
     objective_ids: List[str] = Field(default_factory=list)
-    answers: List[NewAnswer] = []
\ No newline at end of file
+    answers: List[NewAnswer] = []
+
+    @model_validator(mode="after")
+    def _require_text(self) -> "NewQuestion":
+        """Reject blank questions and questions without a non-blank answer (422)."""
+        if not self.question_text.strip():
+            raise ValueError("Question text is required")
+        if not any(answer.text.strip() for answer in self.answers):
+            raise ValueError("At least one answer must have text")
+        return self
\ No newline at end of file
@@ -6,55 +6,18 @@ AI Response Generator Service
 - Fixes the 'JSONDecodeError' by checking for content filters.
 - RESTORES the high-quality, Socratic feedback prompts.
 """
-import httpx
 import json
-import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import numpy as np 
-import asyncio 
+import orjson
 
-from ..core import config, get_logger
-from ..services.database import DatabaseManager
+from ..core import config, get_http_client, get_logger
+from ..services.database import get_database_manager
+from ..services.embeddings import get_ollama_embeddings
 from ..utils.file_utils import load_feedback_prompt_from_json
 
 logger = get_logger(__name__)
 
-# (This function is correct)
-async def get_ollama_embeddings(texts: List[str]) -> List[List[float]]:
-    """
-    Get embeddings from Ollama using the nomic-embed-text model.
-    """
-    embeddings = []
-    logger.info(f"Generating {len(texts)} embeddings via Ollama...")
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for i, text in enumerate(texts):
-            try:
-                if not text.strip():
-                    logger.warning(f"Empty text at index {i}, skipping.")
-                    embeddings.append([0.0] * 768) 
-                    continue
-                payload = {
-                    "model": config.OLLAMA_EMBEDDING_MODEL,
-                    "prompt": text.strip(),
-                }
-                response = await client.post(
-                    f"{config.OLLAMA_HOST}/api/embeddings",
-                    json=payload,
-                    headers={"Content-Type": "application/json"},
-                )
-                response.raise_for_status()
-                result = response.json()
-                embeddings.append(result["embedding"])
-                
-                if i < len(texts) - 1:
-                    await asyncio.sleep(0.05) 
-            except Exception as e:
-                logger.error(f"Error generating embedding for text {i}: {e}")
-                embeddings.append([0.0] * 768)
-
-    logger.info(f"Successfully generated {len(embeddings)} embeddings.")
-    return embeddings
-
 
 class AIGeneratorService:
     def __init__(self):
@@ -70,7 +33,7 @@ class AIGeneratorService:
             "Content-Type": "application/json",
             "Ocp-Apim-Subscription-Key": config.AZURE_OPENAI_SUBSCRIPTION_KEY,
         }
-        self.db = DatabaseManager(config.db_path)
+        self.db = get_database_manager(config.db_path)
         logger.info("AIGeneratorService initialized.")
         logger.info(f"Target URL: {self.api_url[:50]}...") 
 
@@ -107,30 +70,30 @@ class AIGeneratorService:
             "temperature" : 0.6
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(self.api_url, headers=self.headers, json=payload)
-            response.raise_for_status()
+        client = get_http_client()
+        response = await client.post(self.api_url, headers=self.headers, content=orjson.dumps(payload))
+        response.raise_for_status()
             
-            json_response = response.json()
+        json_response = orjson.loads(response.content)
 
-            # (This is our new, correct error checking)
-            if not json_response.get("choices"):
-                logger.warning(f"AI response had no choices: {json_response}")
-                raise Exception("AI returned an invalid response.")
+        # (This is our new, correct error checking)
+        if not json_response.get("choices"):
+            logger.warning(f"AI response had no choices: {json_response}")
+            raise Exception("AI returned an invalid response.")
 
-            choice = json_response["choices"][0]
-            finish_reason = choice.get("finish_reason")
+        choice = json_response["choices"][0]
+        finish_reason = choice.get("finish_reason")
             
-            if finish_reason == "content_filter":
-                logger.error("AI feedback was blocked by the content filter.")
-                raise Exception("AI response was blocked by the content filter.")
+        if finish_reason == "content_filter":
+            logger.error("AI feedback was blocked by the content filter.")
+            raise Exception("AI response was blocked by the content filter.")
             
-            content = choice["message"].get("content")
-            if not content:
-                logger.error(f"AI returned an empty message. Finish reason: {finish_reason}")
-                raise Exception(f"AI returned an empty response (Reason: {finish_reason}).")
+        content = choice["message"].get("content")
+        if not content:
+            logger.error(f"AI returned an empty message. Finish reason: {finish_reason}")
+            raise Exception(f"AI returned an empty response (Reason: {finish_reason}).")
             
-            return content.strip()
+        return content.strip()
     # --- === END OF RESTORED FUNCTION === ---
 
 
@@ -168,42 +131,43 @@ class AIGeneratorService:
         }
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(self.api_url, headers=self.headers, json=payload)
-                response.raise_for_status()
+            client = get_http_client()
+            response = await client.post(self.api_url, headers=self.headers, content=orjson.dumps(payload), timeout=60.0)
+            response.raise_for_status()
                 
-                json_response = response.json()
+            json_response = orjson.loads(response.content)
 
-                if not json_response.get("choices"):
-                    logger.warning(f"AI response had no choices: {json_response}")
-                    raise Exception("AI returned an invalid response.")
+            if not json_response.get("choices"):
+                logger.warning(f"AI response had no choices: {json_response}")
+                raise Exception("AI returned an invalid response.")
                 
-                choice = json_response["choices"][0]
-                finish_reason = choice.get("finish_reason")
+            choice = json_response["choices"][0]
+            finish_reason = choice.get("finish_reason")
 
-                if finish_reason == "content_filter":
-                    logger.error("AI question generation was blocked by the content filter.")
-                    raise Exception("AI response was blocked by the content filter.")
+            if finish_reason == "content_filter":
+                logger.error("AI question generation was blocked by the content filter.")
+                raise Exception("AI response was blocked by the content filter.")
                 
-                ai_response_text = choice["message"].get("content")
-                if not ai_response_text:
-                    logger.error(f"AI returned an empty message. Finish reason: {finish_reason}")
-                    raise Exception(f"AI returned an empty response (Reason: {finish_reason}).")
+            ai_response_text = choice["message"].get("content")
+            if not ai_response_text:
+                logger.error(f"AI returned an empty message. Finish reason: {finish_reason}")
+                raise Exception(f"AI returned an empty response (Reason: {finish_reason}).")
 
-                start_index = ai_response_text.find('{')
-                end_index = ai_response_text.rfind('}')
+            start_index = ai_response_text.find('{')
+            end_index = ai_response_text.rfind('}')
                 
-                if start_index == -1 or end_index == -1:
-                    logger.error(f"AI response did not contain JSON: {ai_response_text}")
-                    raise Exception("AI did not return a valid JSON object.")
+            if start_index == -1 or end_index == -1:
+                logger.error(f"AI response did not contain JSON: {ai_response_text}")
+                raise Exception("AI did not return a valid JSON object.")
                 
-                json_string = ai_response_text[start_index : end_index + 1]
-                json_data = json.loads(json_string)
+            json_string = ai_response_text[start_index : end_index + 1]
+            json_data = json.loads(json_string)
                 
-                while len(json_data.get("answers", [])) < 4:
-                    json_data.get("answers", []).append({"text": "Another incorrect option.", "is_correct": False})
+            answers = json_data["answers"] = json_data.get("answers") or []
+            while len(answers) < 4:
+                answers.append({"text": "Another incorrect option.", "is_correct": False})
                 
-                return json_data
+            return json_data
         except Exception as e:
             logger.error(f"Error parsing AI response for question gen: {e}")
             raise
@@ -236,31 +200,31 @@ Return only the objective text, starting with action verbs like: Understand, App
                 "temperature": 0.7
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.api_url, headers=self.headers, json=payload)
-                response.raise_for_status()
+            client = get_http_client()
+            response = await client.post(self.api_url, headers=self.headers, content=orjson.dumps(payload))
+            response.raise_for_status()
                 
-                json_response = response.json()
+            json_response = orjson.loads(response.content)
 
-                if not json_response.get("choices"):
-                    logger.warning(f"AI response had no choices: {json_response}")
-                    raise Exception("AI returned an invalid response.")
+            if not json_response.get("choices"):
+                logger.warning(f"AI response had no choices: {json_response}")
+                raise Exception("AI returned an invalid response.")
 
-                choice = json_response["choices"][0]
-                finish_reason = choice.get("finish_reason")
+            choice = json_response["choices"][0]
+            finish_reason = choice.get("finish_reason")
                 
-                if finish_reason == "content_filter":
-                    logger.error("AI objective generation was blocked by the content filter.")
-                    raise Exception("AI response was blocked by the content filter.")
+            if finish_reason == "content_filter":
+                logger.error("AI objective generation was blocked by the content filter.")
+                raise Exception("AI response was blocked by the content filter.")
                 
-                content = choice["message"].get("content")
-                if not content:
-                    logger.error(f"AI returned an empty message. Finish reason: {finish_reason}")
-                    raise Exception(f"AI returned an empty response (Reason: {finish_reason}).")
+            content = choice["message"].get("content")
+            if not content:
+                logger.error(f"AI returned an empty message. Finish reason: {finish_reason}")
+                raise Exception(f"AI returned an empty response (Reason: {finish_reason}).")
                 
-                objective_text = content.strip()
-                logger.info(f"Generated objective: {objective_text}")
-                return objective_text
+            objective_text = content.strip()
+            logger.info(f"Generated objective: {objective_text}")
+            return objective_text
             
         except Exception as e:
             logger.error(f"Error generating objective from question: {e}", exc_info=True)
@@ -274,11 +238,11 @@ Return only the objective text, starting with action verbs like: Understand, App
         logger.info(f"Computing similarity between question and objective...")
         try:
             # Generate embeddings
-            question_embedding = (await get_ollama_embeddings([question_text]))[0]
-            objective_embedding = (await get_ollama_embeddings([objective_text]))[0]
-            
-            q_vec = np.array(question_embedding)
-            o_vec = np.array(objective_embedding)
+            # Embed both texts in one call, as one contiguous float32 matrix
+            q_vec, o_vec = np.asarray(
+                await get_ollama_embeddings([question_text, objective_text]),
+                dtype=np.float32,
+            )
             
             # Normalize vectors with safety checks
             q_norm = np.linalg.norm(q_vec)
@@ -317,12 +281,13 @@ Return only the objective text, starting with action verbs like: Understand, App
                 logger.warning("No objectives found in DB to suggest.")
                 return []
         
-            question_embedding = (await get_ollama_embeddings([question_text]))[0]
             objective_texts = [obj['text'] for obj in all_objectives]
-            objective_embeddings = await get_ollama_embeddings(objective_texts)
-            
-            q_vec = np.array(question_embedding)
-            o_vecs = np.array(objective_embeddings)
+            # Row 0 is the question, the rest are the objectives
+            vectors = np.asarray(
+                await get_ollama_embeddings([question_text, *objective_texts]),
+                dtype=np.float32,
+            )
+            q_vec, o_vecs = vectors[0], vectors[1:]
             
             q_vec_norm = q_vec / np.linalg.norm(q_vec)
             o_vecs_norm = o_vecs / np.linalg.norm(o_vecs, axis=1, keepdims=True)
@@ -345,4 +310,20 @@ Return only the objective text, starting with action verbs like: Understand, App
             return all_suggestions
         except Exception as e:
             logger.error(f"Error in suggest_objectives: {e}", exc_info=True)
-            return []
\ No newline at end of file
+            return []
+
+
+_shared_generator: Optional[AIGeneratorService] = None
+
+
+def get_ai_generator_service() -> AIGeneratorService:
+    """
+    Get the process-wide AIGeneratorService, creating it on first use.
+
+    The questions and objectives routers share it instead of each building
+    their own at import time.
+    """
+    global _shared_generator
+    if _shared_generator is None:
+        _shared_generator = AIGeneratorService()
+    return _shared_generator
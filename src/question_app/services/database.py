@@ -4,9 +4,12 @@ Handles all SQLite database operations for the Socratic Tutor.
 Manages schema and CRUD operations for all data models.
 --- THIS IS THE FULLY UPDATED VERSION ---
 """
+import os
+import queue
 import sqlite3
 import json
 import logging 
+import time
 import uuid 
 from contextlib import contextmanager
 from datetime import datetime
@@ -14,6 +17,7 @@ from typing import List, Dict, Optional, Any, Tuple
 
 # --- Corrected Application Imports ---
 from ..models import QuestionUpdate
+from ..utils.text_utils import markdown_to_html
 from ..models.tutor import (
     StudentProfile, KnowledgeLevel, SessionPhase,
     LearningObjective, Question, Answer
@@ -21,9 +25,38 @@ from ..models.tutor import (
 
 logger = logging.getLogger(__name__)
 
+# Bytes of the database file SQLite may memory-map per connection
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Seconds the objectives dropdown list is reused before it is re-read, as a
+# backstop for edits made to the database outside this manager
+OBJECTIVES_CACHE_TTL = 60.0
+
+# Idle connections kept open per database file; extra ones opened under a
+# burst of concurrent requests are closed when handed back
+POOL_SIZE = 8
+
+def new_ids(count: int) -> List[str]:
+    """
+    Generate ``count`` random (version 4) UUIDs as 32-character hex strings.
+
+    The randomness for the whole batch is read with a single ``os.urandom``
+    call, for inserting a question with all its answers and links at once.
+    """
+    raw = os.urandom(16 * count)
+    return [uuid.UUID(bytes=raw[i:i + 16], version=4).hex for i in range(0, 16 * count, 16)]
+
+
 class DatabaseManager:
     def __init__(self, db_path: str = "data/socratic_tutor.db"):
         self.db_path = db_path
+        # (expires_at, rows) for list_all_objectives; the generation is bumped
+        # on every objective write so an in-flight read cannot store stale rows
+        self._objectives_cache: Optional[Tuple[float, List[Dict]]] = None
+        self._objectives_generation = 0
+        # Connections move between worker threads, but get_connection hands
+        # each one to a single caller at a time
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=POOL_SIZE)
         logger.info(f"Initializing Database Manager for: {db_path}")
         self._init_database() 
 
@@ -32,6 +65,9 @@ class DatabaseManager:
         Initializes all 5 tables in the database.
         """
         with self.get_connection(use_row_factory=False) as conn: 
+            # WAL lets readers run alongside a writer now that requests hit
+            # the database from worker threads; the mode persists in the file
+            conn.execute("PRAGMA journal_mode=WAL;")
             cursor = conn.cursor()
             
             # 1. Student Profiles Table (Unchanged)
@@ -111,23 +147,119 @@ class DatabaseManager:
                 )
             """
             )
+            # Rendered Markdown, filled in on write so the edit page does
+            # not convert on every view; rows that predate it are filled here
+            self._add_column_if_missing(cursor, "question", "question_text_html", "TEXT")
+            self._add_column_if_missing(cursor, "answer", "text_html", "TEXT")
+            self._backfill_html(cursor)
+            # Answers are always fetched per question (and, for feedback
+            # generation, by approval state); links are also looked up and
+            # cascade-deleted by objective. The UNIQUE constraint already
+            # covers lookups by question_id.
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_answer_question "
+                "ON answer (question_id, feedback_approved)"
+            )
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_association_objective "
+                "ON question_objective_association (objective_id)"
+            )
             conn.commit()
             logger.info("Database tables initialized successfully.")
 
+    @staticmethod
+    def _add_column_if_missing(cursor: sqlite3.Cursor, table: str, column: str, decl: str) -> None:
+        """ Adds a column to an existing table created by an older schema. """
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+    @staticmethod
+    def _backfill_html(cursor: sqlite3.Cursor) -> None:
+        """ Renders and stores missing HTML for rows written before it was precomputed. """
+        cursor.execute("SELECT id, question_text FROM question WHERE question_text_html IS NULL")
+        questions = [(markdown_to_html(text or ''), qid) for qid, text in cursor.fetchall()]
+        cursor.executemany("UPDATE question SET question_text_html = ? WHERE id = ?", questions)
+
+        cursor.execute("SELECT id, text FROM answer WHERE text_html IS NULL")
+        answers = [(markdown_to_html(text or ''), aid) for aid, text in cursor.fetchall()]
+        cursor.executemany("UPDATE answer SET text_html = ? WHERE id = ?", answers)
+
+        if questions or answers:
+            logger.info(f"Rendered HTML for {len(questions)} questions and {len(answers)} answers.")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection with the per-connection pragmas applied."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA foreign_keys = ON;")
+            # Safe with WAL: commits skip the fsync, checkpoints still sync
+            conn.execute("PRAGMA synchronous = NORMAL;")
+            # Keep sort/temp tables in memory and read pages through mmap
+            conn.execute("PRAGMA temp_store = MEMORY;")
+            conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE};")
+        except BaseException:
+            conn.close()
+            raise
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, or close it if it can't be reused."""
+        try:
+            # Uncommitted work is discarded, as closing the connection would
+            if conn.in_transaction:
+                conn.rollback()
+            conn.isolation_level = ""
+            self._pool.put_nowait(conn)
+        except (sqlite3.Error, queue.Full):
+            conn.close()
+
     @contextmanager
     def get_connection(self, use_row_factory: bool = True):
         """
         Provides a database connection.
         Uses sqlite3.Row factory by default for dict-like access.
+
+        Connections are borrowed from a small pool, so repeat calls skip
+        opening the file and keep their prepared statement caches.
         """
-        conn = sqlite3.connect(self.db_path)
         try:
-            conn.execute("PRAGMA foreign_keys = ON;")
-            if use_row_factory:
-                conn.row_factory = sqlite3.Row 
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        conn.row_factory = sqlite3.Row if use_row_factory else None
+        try:
             yield conn
         finally:
-            conn.close()
+            self._release(conn)
+
+    def close(self) -> None:
+        """Close the idle pooled connections, e.g. on application shutdown."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    @contextmanager
+    def transaction(self):
+        """
+        Provides a connection inside an explicit write transaction.
+
+        The connection runs in autocommit mode so the sqlite3 module does not
+        inject its own BEGIN before each statement. BEGIN IMMEDIATE takes the
+        write lock up front, and the block is committed on success or rolled
+        back on error.
+        """
+        with self.get_connection(use_row_factory=False) as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
 
     # --- Question & Answer CRUD ---
 
@@ -168,6 +300,39 @@ class DatabaseManager:
             logger.error(f"Error loading question details for {question_id} : {e}" , exc_info=True)
             return None
     
+    def load_unapproved_answers(self, question_id: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Loads just what feedback generation needs: the question text and
+        its answers whose feedback is not yet approved.
+
+        Returns:
+            (question_text, [{id, text, is_correct}, ...]), or None if the
+            question does not exist
+        """
+        try:
+            with self.get_connection() as conn:
+                rows = conn.execute(
+                    """
+                    SELECT q.question_text, a.id, a.text, a.is_correct
+                    FROM question q
+                    LEFT JOIN answer a ON a.question_id = q.id AND a.feedback_approved = 0
+                    WHERE q.id = ?
+                    ORDER BY a.id
+                    """,
+                    (question_id,)
+                ).fetchall()
+        except Exception as e:
+            logger.error(f"Error loading unapproved answers for {question_id} : {e}", exc_info=True)
+            return None
+        if not rows:
+            return None
+        answers = [
+            {"id": row["id"], "text": row["text"], "is_correct": bool(row["is_correct"])}
+            for row in rows
+            if row["id"] is not None
+        ]
+        return rows[0]["question_text"], answers
+
     # --- === THIS IS THE UPDATED `list_all_questions` === ---
     # (Fulfills Req 2.10 for the ⚠️ icon on the home page)
     def list_all_questions(self) -> List[Dict]:
@@ -207,42 +372,45 @@ class DatabaseManager:
     def update_question_and_answers(self, question_id:str , data:QuestionUpdate) -> bool:
         """ Updates a question and its answers from the Pydantic model. """
         try:
-            with self.get_connection(use_row_factory=False) as conn: 
+            with self.transaction() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
-                    "UPDATE question SET question_text = ? WHERE id = ?",
-                    (data.question_text , question_id)
+                    "UPDATE question SET question_text = ?, question_text_html = ? WHERE id = ?",
+                    (data.question_text, markdown_to_html(data.question_text), question_id)
                 )
 
-                for answer in data.answers:
-                    cursor.execute(
-                        """
-                        UPDATE answer 
-                        SET text = ?, is_correct = ?, feedback_text = ?, feedback_approved = ?
-                        WHERE id = ? AND question_id = ?
-                        """,
+                cursor.executemany(
+                    """
+                    UPDATE answer 
+                    SET text = ?, text_html = ?, is_correct = ?, feedback_text = ?, feedback_approved = ?
+                    WHERE id = ? AND question_id = ?
+                    """,
+                    [
                         (
                             answer.text,
+                            markdown_to_html(answer.text),
                             answer.is_correct,
                             answer.feedback_text,
                             answer.feedback_approved,
                             answer.id,
                             question_id
                         )
-                    )
+                        for answer in data.answers
+                    ]
+                )
                 
                 cursor.execute(
                     "DELETE FROM question_objective_association WHERE question_id = ?",
                     (question_id,)
                 )
-                if data.objective_ids:
-                    for obj_id in data.objective_ids:
-                        if obj_id:
-                            cursor.execute(
-                                "INSERT INTO question_objective_association (id, question_id, objective_id) VALUES (?, ?, ?)",
-                                (str(uuid.uuid4()) , question_id , obj_id)
-                            )
-                conn.commit()
+                objective_ids = [obj_id for obj_id in data.objective_ids or [] if obj_id]
+                cursor.executemany(
+                    "INSERT INTO question_objective_association (id, question_id, objective_id) VALUES (?, ?, ?)",
+                    [
+                        (assoc_id, question_id, obj_id)
+                        for assoc_id, obj_id in zip(new_ids(len(objective_ids)), objective_ids)
+                    ]
+                )
                 return True
         except Exception as e:
             logger.error(f"Error updating question {question_id} : {e}" , exc_info=True)
@@ -263,6 +431,23 @@ class DatabaseManager:
             logger.error(f"Error updating feedback for answer {answer_id}: {e}" , exc_info =True)
             return False
 
+    def update_answers_feedback(self, feedback: List[Tuple[str, str]]) -> bool:
+        """ Updates the feedback for several answers in one transaction.
+
+        Args:
+            feedback: (answer_id, feedback_text) pairs
+        """
+        try:
+            with self.transaction() as conn:
+                conn.executemany(
+                    "UPDATE answer SET feedback_text = ? WHERE id = ?",
+                    [(feedback_text, answer_id) for answer_id, feedback_text in feedback]
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error updating feedback for {len(feedback)} answers: {e}", exc_info=True)
+            return False
+
     def delete_question(self, question_id:str) -> bool:
         """ Deletes a question. ON DELETE CASCADE will handle answers/associations. """
         try:
@@ -281,13 +466,31 @@ class DatabaseManager:
     # (These are all the new functions for Phase 1)
 
     def list_all_objectives(self) -> List[Dict]:
-        """ Gets all objectives for dropdowns (a simple list). """
+        """
+        Gets all objectives for dropdowns (a simple list).
+
+        The rows are cached for OBJECTIVES_CACHE_TTL seconds and dropped
+        whenever an objective is created, updated or deleted. The returned
+        dictionaries are shared with the cache and must not be modified.
+        """
+        cached = self._objectives_cache
+        if cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+        generation = self._objectives_generation
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute(
                "SELECT id, text FROM learning_objective ORDER BY text" 
             )
-            return [dict(row) for row in cursor.fetchall()]
+            objectives = [dict(row) for row in cursor.fetchall()]
+        if generation == self._objectives_generation:
+            self._objectives_cache = (time.monotonic() + OBJECTIVES_CACHE_TTL, objectives)
+        return list(objectives)
+
+    def invalidate_objectives_cache(self) -> None:
+        """Drop the cached objectives list so the next read hits the database."""
+        self._objectives_generation += 1
+        self._objectives_cache = None
 
     def list_all_objectives_with_counts(self) -> List[Dict]:
         """
@@ -339,6 +542,7 @@ class DatabaseManager:
                     (new_id, text, created_at, blooms_level, priority)
                 )
                 conn.commit()
+                self.invalidate_objectives_cache()
                 # Return a dict that matches the structure from list_all_objectives_with_counts
                 return {
                     "id": new_id, "text": text, "created_at": created_at,
@@ -374,6 +578,7 @@ class DatabaseManager:
                     (text, blooms_level, priority, obj_id)
                 )
                 conn.commit()
+                self.invalidate_objectives_cache()
                 return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Error updating objective {obj_id}: {e}", exc_info=True)
@@ -386,6 +591,7 @@ class DatabaseManager:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM learning_objective WHERE id = ?", (obj_id,))
                 conn.commit()
+                self.invalidate_objectives_cache()
                 return cursor.rowcount > 0
         except Exception as e:
             logger.error(f"Error deleting objective {obj_id}: {e}", exc_info=True)
@@ -394,36 +600,36 @@ class DatabaseManager:
     def create_question_from_ai(self, question_data: Dict, objective_id: str) -> str:
         """Saves an AI-generated question and its answers to the DB. (Req 7.4)"""
         try:
-            with self.get_connection(use_row_factory=False) as conn:
+            with self.transaction() as conn:
                 cursor = conn.cursor()
                 
                 # 1. Create the Question
-                new_q_id = str(uuid.uuid4())
+                answers = question_data['answers']
+                new_q_id, new_assoc_id, *answer_ids = new_ids(2 + len(answers))
                 created_at = datetime.now().isoformat()
                 cursor.execute(
-                    "INSERT INTO question (id, question_text, created_at) VALUES (?, ?, ?)",
-                    (new_q_id, question_data['question_text'], created_at)
+                    "INSERT INTO question (id, question_text, question_text_html, created_at) VALUES (?, ?, ?, ?)",
+                    (new_q_id, question_data['question_text'], markdown_to_html(question_data['question_text']), created_at)
                 )
                 
                 # 2. Create the Answers
-                for ans in question_data['answers']:
-                    new_a_id = str(uuid.uuid4())
-                    cursor.execute(
-                        """
-                        INSERT INTO answer (id, question_id, text, is_correct, feedback_text, feedback_approved)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """,
-                        (new_a_id, new_q_id, ans['text'], ans['is_correct'], "Generated by AI.", False)
-                    )
+                cursor.executemany(
+                    """
+                    INSERT INTO answer (id, question_id, text, text_html, is_correct, feedback_text, feedback_approved)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (answer_id, new_q_id, ans['text'], markdown_to_html(ans['text']), ans['is_correct'], "Generated by AI.", False)
+                        for answer_id, ans in zip(answer_ids, answers)
+                    ]
+                )
                 
                 # 3. Create the Association
-                new_assoc_id = str(uuid.uuid4())
                 cursor.execute(
                     "INSERT INTO question_objective_association (id, question_id, objective_id) VALUES (?, ?, ?)",
                     (new_assoc_id, new_q_id, objective_id)
                 )
                 
-                conn.commit()
                 logger.info(f"AI-generated question {new_q_id} saved and linked to objective {objective_id}")
                 return new_q_id
         except Exception as e:
@@ -462,6 +668,25 @@ class DatabaseManager:
             logger.error(f"Error loading student profile {student_id}: {e}", exc_info=True)
             return None
     
+    def increment_total_sessions(self, student_id: str) -> bool:
+        """ Bumps a student's session counter without rewriting the whole profile. """
+        try:
+            with self.get_connection(use_row_factory=False) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    UPDATE student_profiles
+                    SET total_sessions = total_sessions + 1, updated_at = ?
+                    WHERE id = ?
+                """,
+                    (datetime.now().isoformat(), student_id),
+                )
+                conn.commit()
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error updating session count for {student_id}: {e}", exc_info=True)
+            return False
+
     def save_student_profile(self, profile: StudentProfile) -> bool:
         try:
             profile.updated_at = datetime.now().isoformat()
@@ -515,4 +740,27 @@ class DatabaseManager:
                 return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error listing students: {e}", exc_info=True)
-            return []
\ No newline at end of file
+            return []
+
+
+# One manager per database file, shared by the routers and tutor systems
+_shared_managers: Dict[str, DatabaseManager] = {}
+
+
+def get_database_manager(db_path: str) -> DatabaseManager:
+    """
+    Get the process-wide DatabaseManager for a database file.
+
+    Creating a manager runs the schema setup, so modules share one instance
+    per path instead of each building their own at import time.
+    """
+    manager = _shared_managers.get(db_path)
+    if manager is None:
+        manager = _shared_managers[db_path] = DatabaseManager(db_path)
+    return manager
+
+
+def close_database_managers() -> None:
+    """Close the pooled connections of every shared DatabaseManager."""
+    for manager in _shared_managers.values():
+        manager.close()
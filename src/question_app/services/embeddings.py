@@ -0,0 +1,400 @@
+"""
+Embedding service for the Question App.
+
+This module owns the Ollama embedding helper used by the vector store,
+an asyncio micro-batcher that coalesces concurrent single-text embedding
+requests (e.g. one per chat message) into a single backend call, and the
+persisted embedding dimension of the configured model.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import List, Optional, Tuple
+
+import httpx
+import orjson
+from tenacity import (
+    before_sleep_log,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+from ..core import config, get_http_client, get_logger
+
+logger = get_logger(__name__)
+
+
+EMBEDDING_DIM = 768  # Default dimension for nomic-embed-text
+EMBED_BATCH_SIZE = 64  # Texts per /api/embed request
+PROGRESS_LOG_INTERVAL = 50  # Texts between INFO progress lines on the legacy endpoint
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """Timeouts, dropped connections, 429s and 5xx responses are worth retrying."""
+    if isinstance(exc, (httpx.TimeoutException, httpx.RemoteProtocolError)):
+        return True
+    return isinstance(exc, httpx.HTTPStatusError) and (
+        exc.response.status_code == 429 or exc.response.status_code >= 500
+    )
+
+
+@retry(
+    retry=retry_if_exception(_is_transient),
+    stop=stop_after_attempt(4),
+    wait=wait_exponential_jitter(multiplier=0.2, max=5.0, jitter=0.2),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
+async def _post_json(
+    client: httpx.AsyncClient, url: str, payload: dict
+) -> httpx.Response:
+    """
+    POST a JSON payload to Ollama, retrying transient failures with backoff.
+
+    Embedding requests are idempotent, so they are safe to repeat. Client
+    errors (4xx other than 429) are returned to the caller without retrying.
+    """
+    response = await client.post(
+        url,
+        content=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+    )
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    return response
+
+
+async def _embed_batch(
+    client: httpx.AsyncClient, texts: List[str]
+) -> Optional[List[List[float]]]:
+    """
+    Embed ``texts`` in one request to Ollama's ``/api/embed`` endpoint.
+
+    Returns:
+        One embedding per text, or None if the server does not support the
+        batch endpoint (older Ollama) or returned an unusable response
+    """
+    response = await _post_json(
+        client,
+        f"{config.OLLAMA_BASE_URL}/api/embed",
+        {"model": config.OLLAMA_EMBEDDING_MODEL, "input": texts},
+    )
+    if response.status_code == 404:
+        logger.info("Ollama /api/embed not available, using /api/embeddings")
+        return None
+    response.raise_for_status()
+
+    embeddings = orjson.loads(response.content).get("embeddings")
+    if not embeddings or len(embeddings) != len(texts):
+        logger.warning("Unexpected /api/embed response, using /api/embeddings")
+        return None
+    return embeddings
+
+
+async def _embed_sequential(
+    client: httpx.AsyncClient, texts: List[str]
+) -> List[List[float]]:
+    """Embed ``texts`` one request at a time via the legacy ``/api/embeddings``."""
+    embeddings = []
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for i, text in enumerate(texts):
+        if debug:
+            logger.debug(
+                "Generating embedding %d/%d (%d chars)", i + 1, len(texts), len(text)
+            )
+        if i and i % PROGRESS_LOG_INTERVAL == 0:
+            logger.info("Embedded %d/%d texts", i, len(texts))
+        try:
+            payload = {
+                "model": config.OLLAMA_EMBEDDING_MODEL,
+                "prompt": text,
+            }
+            response = await _post_json(
+                client, f"{config.OLLAMA_BASE_URL}/api/embeddings", payload
+            )
+            response.raise_for_status()
+
+            result = orjson.loads(response.content)
+            if "embedding" not in result:
+                logger.error(f"No embedding in response for text {i}: {result}")
+                embeddings.append([0.0] * EMBEDDING_DIM)
+                continue
+
+            embeddings.append(result["embedding"])
+
+        except Exception as e:
+            logger.error(f"Error generating embedding for text {i}: {e}")
+            embeddings.append([0.0] * EMBEDDING_DIM)
+    return embeddings
+
+
+async def get_ollama_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Get embeddings from Ollama using the nomic-embed-text model.
+
+    Non-empty texts are split into ``EMBED_BATCH_SIZE`` chunks, each sent as
+    one ``/api/embed`` request; up to ``config.OLLAMA_CONCURRENCY`` chunks are
+    in flight at once. Older Ollama servers fall back to one
+    ``/api/embeddings`` request per text. Timeouts, 429s and 5xx responses
+    are retried with jittered exponential backoff. Empty texts and texts that
+    still fail get a zero vector.
+    """
+    embeddings: List[List[float]] = [[0.0] * EMBEDDING_DIM for _ in texts]
+    indices: List[int] = []
+    stripped: List[str] = []
+    for i, text in enumerate(texts):
+        text = text.strip()
+        if text:
+            indices.append(i)
+            stripped.append(text)
+    if len(stripped) < len(texts):
+        logger.warning("Skipped %d empty texts", len(texts) - len(stripped))
+
+    if stripped:
+        client = get_http_client()
+        semaphore = asyncio.Semaphore(config.OLLAMA_CONCURRENCY)
+
+        async def embed_chunk(chunk: List[str]) -> List[List[float]]:
+            async with semaphore:
+                try:
+                    batch = await _embed_batch(client, chunk)
+                except Exception as e:
+                    # Transient errors were already retried; the legacy
+                    # endpoint would fail the same way, one text at a time
+                    logger.error(f"Batch embedding request failed: {e}")
+                    return [[0.0] * EMBEDDING_DIM for _ in chunk]
+                if batch is None:
+                    batch = await _embed_sequential(client, chunk)
+                return batch
+
+        chunks = [
+            stripped[i : i + EMBED_BATCH_SIZE]
+            for i in range(0, len(stripped), EMBED_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(embed_chunk(chunk) for chunk in chunks))
+
+        batched = (embedding for result in results for embedding in result)
+        for i, embedding in zip(indices, batched):
+            embeddings[i] = embedding
+
+    logger.info("Generated %d embeddings from %d texts", len(embeddings), len(texts))
+    return embeddings
+
+
+# (model, dim) last read from or written to config.EMBEDDING_META_PATH
+_embedding_meta: Optional[Tuple[str, int]] = None
+
+
+def load_embedding_dim() -> Optional[int]:
+    """
+    Get the recorded embedding dimension of the configured model.
+
+    Returns:
+        The dimension, or None if it has not been recorded for this model
+    """
+    global _embedding_meta
+    model = config.OLLAMA_EMBEDDING_MODEL
+    if _embedding_meta is None or _embedding_meta[0] != model:
+        try:
+            with open(config.EMBEDDING_META_PATH, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        dim = meta.get("dim")
+        if meta.get("model") != model or not isinstance(dim, int) or dim <= 0:
+            return None
+        _embedding_meta = (model, dim)
+    return _embedding_meta[1]
+
+
+def save_embedding_dim(dim: int) -> None:
+    """
+    Record the embedding dimension of the configured model.
+
+    Args:
+        dim: Length of the model's embedding vectors
+    """
+    global _embedding_meta
+    model = config.OLLAMA_EMBEDDING_MODEL
+    if _embedding_meta == (model, dim):
+        return
+    path = config.EMBEDDING_META_PATH
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model, "dim": dim}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not save embedding metadata: {e}")
+    _embedding_meta = (model, dim)
+
+
+def record_embedding_dim(embeddings: List[List[float]]) -> None:
+    """
+    Record the dimension from the first real (non-zero) embedding, if any.
+
+    Args:
+        embeddings: Embeddings returned by :func:`get_ollama_embeddings`
+    """
+    for embedding in embeddings:
+        if any(embedding):
+            save_embedding_dim(len(embedding))
+            return
+
+
+async def get_embedding_dim() -> int:
+    """
+    Get the embedding dimension of the configured model.
+
+    Uses the recorded dimension when available, and otherwise probes Ollama
+    with a one-word embedding and records the result.
+
+    Returns:
+        The embedding dimension (``EMBEDDING_DIM`` if Ollama is unreachable)
+    """
+    dim = load_embedding_dim()
+    if dim is not None:
+        return dim
+    probe = await get_ollama_embeddings(["dimension"])
+    if probe and any(probe[0]):
+        save_embedding_dim(len(probe[0]))
+        return len(probe[0])
+    return EMBEDDING_DIM
+
+
+class EmbeddingBatcher:
+    """
+    Coalesce concurrent embedding requests into batched backend calls.
+
+    Callers ``await embed(text)``; a background worker collects every request
+    that arrives within ``max_wait`` seconds of the first one (up to
+    ``max_batch_size`` texts) and resolves them all from a single call to
+    :func:`get_ollama_embeddings`. At most ``max_concurrent_requests`` batches
+    are in flight against the embedding backend at any time.
+
+    The worker is started by the application lifespan, and lazily on first use
+    when no lifespan has run (e.g. in tests or scripts).
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int = 64,
+        max_wait: float = 0.008,
+        max_concurrent_requests: int = 4,
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_concurrent_requests = max_concurrent_requests
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: set = set()
+
+    async def start(self) -> None:
+        """Start the batching worker on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self._pending = set()
+        self._worker = loop.create_task(self._run())
+        logger.info("Embedding batcher started")
+
+    async def stop(self) -> None:
+        """Stop the worker, failing any requests that were not yet dispatched."""
+        worker, self._worker = self._worker, None
+        if worker is None:
+            return
+        worker.cancel()
+        try:
+            await worker
+        except asyncio.CancelledError:
+            pass
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+        logger.info("Embedding batcher stopped")
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed a single text, sharing a backend call with concurrent callers.
+
+        Args:
+            text: The text to embed
+
+        Returns:
+            The embedding vector for ``text``
+        """
+        if (
+            self._worker is None
+            or self._worker.done()
+            or self._loop is not asyncio.get_running_loop()
+        ):
+            await self.start()
+
+        future = self._loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _run(self) -> None:
+        batch: List[Tuple[str, asyncio.Future]] = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                try:
+                    await asyncio.wait_for(self._drain(batch), timeout=self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+                await self._semaphore.acquire()
+                task = asyncio.create_task(self._dispatch(batch))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+                batch = []
+        except asyncio.CancelledError:
+            # Requests taken off the queue but not yet handed to _dispatch
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Embedding batcher stopped"))
+            raise
+
+    async def _drain(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        while len(batch) < self.max_batch_size:
+            batch.append(await self._queue.get())
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            texts = [text for text, _ in batch]
+            logger.debug("Embedding batch of %d texts", len(texts))
+            try:
+                embeddings = await get_ollama_embeddings(texts)
+                if len(embeddings) != len(texts):
+                    raise RuntimeError(
+                        f"Expected {len(texts)} embeddings, got {len(embeddings)}"
+                    )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future), embedding in zip(batch, embeddings):
+                if not future.done():
+                    future.set_result(embedding)
+        finally:
+            self._semaphore.release()
+
+
+# Shared batcher used by the vector store search path
+embedding_batcher = EmbeddingBatcher()
@@ -0,0 +1,156 @@
+"""
+Semantic query cache for vector store searches.
+
+Chat messages are often repeated or reworded slightly ("what is alt text",
+"What is alt-text?"). This module caches search results per query so exact
+repeats skip both the embedding call and the ChromaDB query, and near
+repeats (cosine similarity above a threshold) skip the ChromaDB query.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core import get_logger
+
+logger = get_logger(__name__)
+
+_Entry = Tuple[np.ndarray, List[Dict[str, Any]], float]
+
+
+class SemanticQueryCache:
+    """
+    LRU cache of search results keyed by query hash, with embedding lookup.
+
+    Args:
+        max_entries: Maximum number of cached queries
+        similarity_threshold: Minimum cosine similarity for a near hit
+        scan_limit: Number of most recent entries compared on a near lookup
+        ttl: Seconds before an entry expires
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        similarity_threshold: float = 0.97,
+        scan_limit: int = 64,
+        ttl: float = 3600.0,
+    ):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.scan_limit = scan_limit
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, int], _Entry]" = OrderedDict()
+
+    @staticmethod
+    def _key(query: str, k: int) -> Tuple[str, int]:
+        return hashlib.sha256(query.encode("utf-8")).hexdigest(), k
+
+    def _is_fresh(self, entry: _Entry) -> bool:
+        return time.monotonic() - entry[2] < self.ttl
+
+    def get_exact(self, query: str, k: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up results for exactly this query.
+
+        Args:
+            query: The search query
+            k: Number of results requested
+
+        Returns:
+            A copy of the cached results, or None on a miss
+        """
+        key = self._key(query, k)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._is_fresh(entry):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return [dict(chunk) for chunk in entry[1]]
+
+    def get_similar(
+        self, embedding: List[float], k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up results for a recent query whose embedding is close enough.
+
+        Args:
+            embedding: Embedding of the new query
+            k: Number of results requested
+
+        Returns:
+            A copy of the best matching cached results, or None on a miss
+        """
+        vector = _normalize(embedding)
+        if vector is None:
+            return None
+
+        best_key, best_score = None, self.similarity_threshold
+        for scanned, key in enumerate(reversed(self._entries)):
+            if scanned >= self.scan_limit:
+                break
+            if key[1] != k:
+                continue
+            entry = self._entries[key]
+            if not self._is_fresh(entry) or entry[0].shape != vector.shape:
+                continue
+            score = float(np.dot(entry[0], vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            return None
+        logger.debug("Semantic cache hit (cosine=%.3f)", best_score)
+        self._entries.move_to_end(best_key)
+        return [dict(chunk) for chunk in self._entries[best_key][1]]
+
+    def put(
+        self,
+        query: str,
+        k: int,
+        embedding: List[float],
+        results: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Cache the results of a search.
+
+        Args:
+            query: The search query
+            k: Number of results requested
+            embedding: Embedding of the query
+            results: Results returned by the vector store
+        """
+        vector = _normalize(embedding)
+        if vector is None:
+            return
+        key = self._key(query, k)
+        self._entries[key] = (
+            vector,
+            [dict(chunk) for chunk in results],
+            time.monotonic(),
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all cached results, e.g. after the vector store is rebuilt."""
+        self._entries.clear()
+
+
+def _normalize(embedding: List[float]) -> Optional[np.ndarray]:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if not norm:
+        # Zero vectors are the embedding helper's failure fallback
+        return None
+    return vector / norm
+
+
+# Shared cache used by ChromaVectorStoreService.search
+query_cache = SemanticQueryCache()
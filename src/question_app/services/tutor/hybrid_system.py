@@ -4,19 +4,21 @@ Hybrid CrewAI Socratic System
 (This is the final, corrected version with off-topic detection)
 """
 
+import asyncio
 import json
 import logging
 import os
+import threading
 import uuid
 from dataclasses import asdict
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, Iterator, List, Mapping, Optional, Tuple
 
 from dotenv import load_dotenv
 
+from ..database import get_database_manager
 from .interfaces import VectorStoreInterface
-from question_app.api.vector_store import ChromaVectorStoreService
 
 load_dotenv()
 
@@ -35,6 +37,46 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def iterate_in_thread(iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator in a single worker thread.
+
+    Items are handed to the event loop as soon as they are produced, so the
+    next chunk is generated while the previous one is being sent instead of
+    paying a thread hand-off per item. Exceptions raised by the iterator are
+    re-raised here. If the consumer stops early (e.g. the client
+    disconnects), the worker stops after its current item.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue()
+    stopped = threading.Event()
+
+    def pump() -> None:
+        try:
+            for item in iterator:
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, ("item", item))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", None))
+
+    worker = loop.run_in_executor(None, pump)
+    try:
+        while True:
+            kind, value = await queue.get()
+            if kind == "done":
+                break
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stopped.set()
+        if worker.done():
+            worker.result()
+
+
 def safe_serialize(obj):
     # (This function is unchanged)
     if hasattr(obj, "__class__") and "MagicMock" in str(obj.__class__):
@@ -61,7 +103,7 @@ class SocraticAgent:
         self.client = client
         logger.info(f"Initialized {role} agent")
 
-    def execute_task(self, task_description: str, context: str = "", history : Optional[List[Dict[str , str]]] = None) -> str:
+    def _build_messages(self, task_description: str, context: str = "", history : Optional[List[Dict[str , str]]] = None) -> List[Dict[str, str]]:
         system_prompt = f"""You are a {self.role}.
         Your goal: {self.goal}
         Background: {self.backstory}
@@ -77,6 +119,10 @@ class SocraticAgent:
         if history:
             messages.extend(history[-4:])
         messages.append({"role": "user" , "content": task_description})
+        return messages
+
+    def execute_task(self, task_description: str, context: str = "", history : Optional[List[Dict[str , str]]] = None) -> str:
+        messages = self._build_messages(task_description, context=context, history=history)
         try:
             response = self.client.chat(messages, temperature=0.7)
             logger.info(f"{self.role} completed task successfully")
@@ -85,6 +131,16 @@ class SocraticAgent:
             logger.error(f"{self.role} task failed: {e}")
             return f"Task processing error in {self.role}: {str(e)}"
 
+    def execute_task_stream(self, task_description: str, context: str = "", history : Optional[List[Dict[str , str]]] = None) -> Iterator[str]:
+        """Same as execute_task, but yields the response as it is generated."""
+        messages = self._build_messages(task_description, context=context, history=history)
+        try:
+            yield from self.client.chat_stream(messages, temperature=0.7)
+            logger.info(f"{self.role} completed streamed task successfully")
+        except Exception as e:
+            logger.error(f"{self.role} streamed task failed: {e}")
+            yield f"Task processing error in {self.role}: {str(e)}"
+
 
 class CoordinatorAgent(SocraticAgent):
 
@@ -328,7 +384,40 @@ class SessionOrchestratorAgent(SocraticAgent):
         context : str = "",
         history:Optional[List[Dict[str, str]]] = None
     ) -> str:
-        task_description = f"""Create a complete tutoring response by synthesizing:
+        task_description = self._build_task(analysis, progress, questions, profile)
+        try:
+            response = self.execute_task(task_description , context = context, history=history)
+            if hasattr(response, "__class__") and "MagicMock" in str(response.__class__):
+                return questions 
+            return response
+        except Exception as e:
+            logger.error(f"Session orchestration failed: {e}")
+            return questions
+
+    def orchestrate_response_stream(
+        self,
+        analysis: Dict[str, Any],
+        progress: Dict[str, Any],
+        questions: str,
+        profile: StudentProfile,
+        context : str = "",
+        history:Optional[List[Dict[str, str]]] = None
+    ) -> Iterator[str]:
+        task_description = self._build_task(analysis, progress, questions, profile)
+        try:
+            yield from self.execute_task_stream(task_description , context = context, history=history)
+        except Exception as e:
+            logger.error(f"Session orchestration failed: {e}")
+            yield questions
+
+    def _build_task(
+        self,
+        analysis: Dict[str, Any],
+        progress: Dict[str, Any],
+        questions: str,
+        profile: StudentProfile,
+    ) -> str:
+        return f"""Create a complete tutoring response by synthesizing:
 
 Response Analysis: {json.dumps(analysis, indent=2)}
 Progress Assessment: {json.dumps(progress, indent=2)}
@@ -348,14 +437,6 @@ Create a response that:
 5. Keeps the response natural and conversational
 
 IMPORTANT: Provide direct answers. Do not end with questions."""
-        try:
-            response = self.execute_task(task_description , context = context, history=history)
-            if hasattr(response, "__class__") and "MagicMock" in str(response.__class__):
-                return questions 
-            return response
-        except Exception as e:
-            logger.error(f"Session orchestration failed: {e}")
-            return questions
 
 class CodeAnalyzerAgent(SocraticAgent):
     def __init__(self, client:AzureAPIMClient):
@@ -394,7 +475,7 @@ class CodeAnalyzerAgent(SocraticAgent):
 MIN_COSINE_SIMILARITY = 0.7
 class HybridCrewAISocraticSystem:
     def __init__(
-        self, azure_config: Dict[str, str], vector_store_service : VectorStoreInterface ,db_path: str = "socratic_tutor.db"
+        self, azure_config: Mapping[str, str], vector_store_service : VectorStoreInterface ,db_path: str = "socratic_tutor.db"
     ):
         # (This method is unchanged)
         self.client = AzureAPIMClient(
@@ -405,7 +486,7 @@ class HybridCrewAISocraticSystem:
 
         )
         self.vector_store = vector_store_service
-        self.db = DatabaseManager(db_path)
+        self.db = get_database_manager(db_path)
         self.memory_file = "conversation_memory.json"
         self.conversation_memory : Dict[str, List[Dict[str , str]]] = {}
         self._load_conversation_memory()
@@ -524,6 +605,10 @@ class HybridCrewAISocraticSystem:
         else:
             raise RuntimeError(f"Failed to save student profile for {name}")
 
+    async def aclose(self) -> None:
+        """Release the Azure client's pooled connections on shutdown."""
+        await asyncio.to_thread(self.client.close)
+
         # -----------------------------------------------------------------------
     # MEMORY MANAGEMENT
     # -----------------------------------------------------------------------
@@ -555,22 +640,163 @@ class HybridCrewAISocraticSystem:
 
     async def get_rag_context(self, query:str) -> str:
             # (This method is unchanged)
+            context_for_agents, _ = await self._retrieve(query)
+            return context_for_agents
+
+    async def _retrieve(self, query: str) -> Tuple[str, List[Dict[str, Any]]]:
+            """
+            Retrieve context for the agents plus a summary of its sources.
+
+            Returns the joined high-quality chunks and, for each of them, its
+            question ID, chunk type and similarity (for display to the client).
+            """
             logger.info(f"Retrieving Context for : {query[:50]}...")
             retrieved_chunks_with_scores = await self.vector_store.search(query = query)
             high_quality_chunks = []
+            sources = []
             for chunk in retrieved_chunks_with_scores:
                 distance = chunk.get('distance' , 1)
                 similarity = 1 - distance
                 if similarity >= MIN_COSINE_SIMILARITY:
                     high_quality_chunks.append(chunk.get('content' , ''))
+                    sources.append({
+                        "question_id": chunk.get("question_id"),
+                        "chunk_type": chunk.get("chunk_type"),
+                        "similarity": round(similarity, 3),
+                    })
             if not high_quality_chunks:
                 logger.info(f"No high-quality chunk found for user query. Proceeding without passing context.")
-                return ""
+                return "", []
             context_for_agents = "\n--\n".join(high_quality_chunks)
-            logger.debug(f"Context for agents : \n{context_for_agents}")
-            return context_for_agents
+            logger.debug("Context for agents : \n%s", context_for_agents)
+            return context_for_agents, sources
 
-    async def conduct_socratic_session(self, student_id : str , student_response : str) -> Dict[str, Any]:
+    async def _run_triage(
+        self,
+        profile: StudentProfile,
+        student_response: str,
+        history: List[Dict[str, str]],
+        retrieved: Optional["asyncio.Future[Dict[str, Any]]"] = None,
+    ) -> Dict[str, Any]:
+            """
+            Classify the student's input and run every agent step that comes
+            before the final orchestrated response.
+
+            Returns a dict with the intent, analysis, progress, retrieved context
+            and expert answer. For off-topic input the canned reply is returned as
+            ``final_response`` and no orchestration step is needed.
+
+            If ``retrieved`` is given, it is resolved with the intent and sources
+            as soon as the context is retrieved, before the remaining agent steps.
+            The blocking agent calls run in worker threads so the event loop stays
+            free to send that to the client in the meantime.
+            """
+            def announce(intent: str, sources: List[Dict[str, Any]]) -> None:
+                if retrieved is not None and not retrieved.done():
+                    retrieved.set_result({"intent": intent, "sources": sources})
+
+            # Most messages are conceptual questions that search on the raw
+            # message, so start that search while the intent is classified
+            retrieval = asyncio.create_task(self._retrieve(student_response))
+            try:
+                intent = await asyncio.to_thread(
+                    self.coordinator_agent.decide_intent, student_response, history=history
+                )
+            except BaseException:
+                retrieval.cancel()
+                raise
+
+            analysis = {}
+            progress = {}
+            rag_context = ""
+            sources = []
+            questions = ""
+            final_response = None
+
+            if intent != "conceptual_question":
+                retrieval.cancel()
+
+            if intent == "conceptual_question":
+                logger.info("Executing Workflow A")
+                rag_context, sources = await retrieval
+                announce(intent, sources)
+                analysis = await asyncio.to_thread(
+                    self.response_analyst.analyze_response,
+                    student_response , profile, context=rag_context, history = history
+                )
+                progress = await asyncio.to_thread(
+                    self.progress_tracker.assess_progress,
+                    analysis, profile , context=rag_context, history = history
+                )
+                questions = await asyncio.to_thread(
+                    self.question_generator.generate_questions,
+                    analysis, progress, profile, student_response, context = rag_context, history = history
+                )
+
+            elif intent == "code_analysis_request":
+                logger.info("Executing Workflow B")
+                code_analysis_result = await asyncio.to_thread(
+                    self.code_analyzer.analyze_code_snippet, student_response
+                )
+                search_query = student_response + "\n" + code_analysis_result
+                rag_context, sources = await self._retrieve(search_query)
+                announce(intent, sources)
+                analysis = {
+                    "response_type" : "code_snippet",
+                    "intervention_needed" : "probe_deeper",
+                    "technical_analysis" : code_analysis_result
+                }  
+                progress = {}
+                task_for_questioner = f"""
+                A student provided a code snippet. My analysis found these issues:
+                {code_analysis_result}
+            
+                Here is the relevant context from our knowledge base:
+                {rag_context}
+
+                Your task: Based *only* on the analysis and the context, generate a single
+                Socratic question that will guide the student to discover one
+                of these errors on their own. Do not give the answer.
+                """
+                questions = await asyncio.to_thread(
+                    self.question_generator.execute_task,
+                    task_for_questioner, context=rag_context, history = history
+                )
+            
+            # --- === FIX 3: HANDLE THE NEW 'off_topic' INTENT === ---
+            elif intent == "off_topic":
+                logger.info("Handling 'off_topic' intent. Skipping RAG and AI workflow.")
+                # We skip all AI agents and just give a default response
+                final_response = "That's an interesting question! However, I'm a Socratic tutor focused on web accessibility. Do you have a question related to that topic I can help with?"
+                analysis = {"response_type": "off_topic"}
+                progress = {} # No progress change
+            # --- === END OF FIX 3 === ---
+
+            return {
+                "intent": intent,
+                "analysis": analysis,
+                "progress": progress,
+                "rag_context": rag_context,
+                "sources": sources,
+                "questions": questions,
+                "final_response": final_response,
+            }
+
+    def _finish_session(self, student_id: str, profile: StudentProfile, triage: Dict[str, Any], final_response: str) -> Dict[str, Any]:
+            logger.info(f"Triage session completed successfully for {profile.name}")
+            
+            # Save the updated profile (session count, etc.)
+            self.db.save_student_profile(profile)
+            self.append_to_conversation(student_id, "assistant", final_response)
+
+            return {
+                "session_number" : profile.total_sessions,
+                "intent_executed" : triage["intent"],
+                "analysis" : safe_serialize(triage["analysis"]),
+                "progress" : safe_serialize(triage["progress"]),
+            }
+
+    def _start_session(self, student_id: str, student_response: str):
             profile = self.db.load_student_profile(student_id)
             if not profile:
                 raise ValueError(f"Student {student_id} not found")
@@ -578,78 +804,27 @@ class HybridCrewAISocraticSystem:
             profile.total_sessions +=1 # Moved this here, was incrementing even on "START_SESSION"
             history = self.get_conversation_history(student_id)
             self.append_to_conversation(student_id, "user", student_response)
+            return profile, history
 
-            try:
-                intent = self.coordinator_agent.decide_intent(student_response, history=history)
+    async def conduct_socratic_session(self, student_id : str , student_response : str) -> Dict[str, Any]:
+            profile, history = self._start_session(student_id, student_response)
 
-                final_response = ""
-                analysis = {}
-                progress = {}
-                rag_context = ""
+            try:
+                triage = await self._run_triage(profile, student_response, history)
 
-                if intent == "conceptual_question":
-                    logger.info("Executing Workflow A")
-                    rag_context = await self.get_rag_context(student_response)
-                    analysis = self.response_analyst.analyze_response(
-                        student_response , profile, context=rag_context, history = history
-                    )
-                    progress = self.progress_tracker.assess_progress(
-                        analysis, profile , context=rag_context, history = history
+                final_response = triage["final_response"]
+                if final_response is None:
+                    final_response = self.session_orchestrator.orchestrate_response(
+                        triage["analysis"], triage["progress"], triage["questions"], profile,
+                        context = triage["rag_context"], history = history
                     )
-                    questions = self.question_generator.generate_questions(
-                        analysis, progress, profile, student_response, context = rag_context, history = history
-                    )
-                    final_response = self.session_orchestrator.orchestrate_response( analysis, progress, questions, profile, context = rag_context, history = history)
-
-                elif intent == "code_analysis_request":
-                    logger.info("Executing Workflow B")
-                    code_analysis_result = self.code_analyzer.analyze_code_snippet(student_response)
-                    search_query = student_response + "\n" + code_analysis_result
-                    rag_context = await self.get_rag_context(search_query)
-                    analysis = {
-                        "response_type" : "code_snippet",
-                        "intervention_needed" : "probe_deeper",
-                        "technical_analysis" : code_analysis_result
-                    }  
-                    progress = {}
-                    task_for_questioner = f"""
-                    A student provided a code snippet. My analysis found these issues:
-                    {code_analysis_result}
-                
-                    Here is the relevant context from our knowledge base:
-                    {rag_context}
-
-                    Your task: Based *only* on the analysis and the context, generate a single
-                    Socratic question that will guide the student to discover one
-                    of these errors on their own. Do not give the answer.
-                    """
-                    questions = self.question_generator.execute_task(task_for_questioner, context=rag_context, history = history)
-                    final_response = self.session_orchestrator.orchestrate_response(analysis , progress , questions , profile , context= rag_context, history = history)
-                
-                # --- === FIX 3: HANDLE THE NEW 'off_topic' INTENT === ---
-                elif intent == "off_topic":
-                    logger.info("Handling 'off_topic' intent. Skipping RAG and AI workflow.")
-                    # We skip all AI agents and just give a default response
-                    final_response = "That's an interesting question! However, I'm a Socratic tutor focused on web accessibility. Do you have a question related to that topic I can help with?"
-                    analysis = {"response_type": "off_topic"}
-                    progress = {} # No progress change
-                # --- === END OF FIX 3 === ---
-
-                logger.info(f"Triage session completed successfully for {profile.name}")
-                
-                # Save the updated profile (session count, etc.)
-                self.db.save_student_profile(profile)
-                self.append_to_conversation(student_id, "assistant", final_response)
+
+                session_metadata = self._finish_session(student_id, profile, triage, final_response)
 
                 return {
                     "tutor_response" : final_response,
                     "student_profile" : asdict(profile),
-                    "session_metadata" : {
-                        "session_number" : profile.total_sessions,
-                        "intent_executed" : intent,
-                        "analysis" : safe_serialize(analysis),
-                        "progress" : safe_serialize(progress),
-                    },
+                    "session_metadata" : session_metadata,
                     "status" : "success"
                 }
             except Exception as e:
@@ -658,6 +833,56 @@ class HybridCrewAISocraticSystem:
                     "tutor_response" : "I apologize, but I'm having a small issue. Could you rephrase that?",
                     "error" : str(e) , "fallback" : True , "status" : "error"
                 }
+
+    async def conduct_socratic_session_stream(self, student_id : str , student_response : str) -> AsyncIterator[Dict[str, Any]]:
+            """
+            Streaming variant of :meth:`conduct_socratic_session`.
+
+            Runs the same triage workflow, then streams the orchestrator's reply.
+            Yields a ``{"retrieval": {...}}`` event with the intent and the
+            sources of the retrieved context as soon as retrieval finishes, while
+            the remaining agent steps still run, then ``{"delta": str}`` events
+            as text is generated, followed by a final
+            ``{"session_metadata": {...}}`` event, or ``{"error": str}`` if the
+            session fails.
+            """
+            profile, history = self._start_session(student_id, student_response)
+
+            retrieved = asyncio.get_running_loop().create_future()
+            triage_task = asyncio.create_task(
+                self._run_triage(profile, student_response, history, retrieved)
+            )
+            try:
+                await asyncio.wait({triage_task, retrieved}, return_when=asyncio.FIRST_COMPLETED)
+                if retrieved.done():
+                    yield {"retrieval": retrieved.result()}
+                triage = await triage_task
+                if not retrieved.done():
+                    # Workflows without retrieval (e.g. off-topic) finish first
+                    yield {"retrieval": {"intent": triage["intent"], "sources": triage["sources"]}}
+
+                if triage["final_response"] is not None:
+                    final_response = triage["final_response"]
+                    yield {"delta": final_response}
+                else:
+                    stream = self.session_orchestrator.orchestrate_response_stream(
+                        triage["analysis"], triage["progress"], triage["questions"], profile,
+                        context = triage["rag_context"], history = history
+                    )
+                    parts = []
+                    # The Azure client is blocking; it runs in one worker thread
+                    # while chunks are sent to the client as they arrive
+                    async for delta in iterate_in_thread(stream):
+                        parts.append(delta)
+                        yield {"delta": delta}
+                    final_response = "".join(parts).strip()
+
+                yield {"session_metadata": self._finish_session(student_id, profile, triage, final_response)}
+            except Exception as e:
+                logger.error(f"Triage Session execution failed : {e}", exc_info=True)
+                yield {"error": str(e)}
+            finally:
+                triage_task.cancel()
     
     def _update_student_profile(
         self,
@@ -42,7 +42,7 @@ for the Hybrid CrewAI system and can be used independently for basic tutoring.
 :version: 1.0.0
 :license: MIT
 """
-from ..database import DatabaseManager
+from ..database import DatabaseManager, get_database_manager
 from ...models.tutor import StudentProfile, KnowledgeLevel, SessionPhase
 
 
@@ -58,8 +58,9 @@ from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
+import orjson
 import requests
 
 # Load environment variables
@@ -143,6 +144,13 @@ class AzureAPIMClient:
         self.api_key = api_key
         self.api_version = api_version
 
+        # Reuse pooled keep-alive connections across calls instead of a new
+        # TCP/TLS handshake per agent request
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
     def chat(
         self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 1000
     ) -> str:
@@ -200,21 +208,97 @@ class AzureAPIMClient:
         }
 
         try:
-            response = requests.post(
-                url, headers=headers, params=params, json=data, timeout=60
+            response = self.session.post(
+                url, headers=headers, params=params, data=orjson.dumps(data), timeout=60
             )
             response.raise_for_status()
 
-            result = response.json()
+            result = orjson.loads(response.content)
             return result["choices"][0]["message"]["content"].strip()
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Azure APIM request failed: {e}")
             return "I apologize, but I'm having trouble connecting right now. Please try again."
-        except (KeyError, IndexError) as e:
+        except (ValueError, KeyError, IndexError) as e:
             logger.error(f"Invalid response format: {e}")
             return "I received an unexpected response format. Please try again."
 
+    def chat_stream(
+        self, messages: List[Dict], temperature: float = 0.7, max_tokens: int = 1000
+    ) -> Iterator[str]:
+        """
+        Stream a chat completion from Azure OpenAI as it is generated.
+
+        Sends the same request as :meth:`chat` with ``stream=True`` and yields
+        each content delta from the server-sent event stream.
+
+        Args:
+            messages (List[Dict]): List of message dictionaries with 'role' and 'content'
+            temperature (float, optional): Controls response randomness (0.0-1.0)
+                (default: 0.7)
+            max_tokens (int, optional): Maximum number of tokens in response
+                (default: 1000)
+
+        Yields:
+            str: Successive pieces of the AI model's response text. If the
+            request fails before any text is produced, a single user-friendly
+            error message is yielded instead.
+
+        Example:
+            >>> for delta in client.chat_stream(messages):
+            ...     print(delta, end="")
+        """
+        url = f"{self.endpoint}/deployments/{self.deployment}/chat/completions"
+
+        headers = {
+            "Content-Type": "application/json",
+            "Ocp-Apim-Subscription-Key": self.api_key,
+        }
+
+        params = {"api-version": self.api_version}
+
+        data = {
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+
+        try:
+            with self.session.post(
+                url,
+                headers=headers,
+                params=params,
+                data=orjson.dumps(data),
+                timeout=60,
+                stream=True,
+            ) as response:
+                response.raise_for_status()
+
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        break
+                    choices = orjson.loads(payload).get("choices") or []
+                    if not choices:
+                        continue
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Azure APIM streaming request failed: {e}")
+            yield "I apologize, but I'm having trouble connecting right now. Please try again."
+        except (ValueError, KeyError, IndexError) as e:
+            logger.error(f"Invalid streaming response format: {e}")
+            yield "I received an unexpected response format. Please try again."
+
+    def close(self) -> None:
+        """Close the pooled HTTP session."""
+        self.session.close()
+
     def make_request(self, prompt: str) -> Dict[str, Any]:
         """Make a request - test interface method"""
         try:
@@ -541,7 +625,7 @@ class SimpleSocraticSystem:
         )
 
         # Initialize database
-        self.db = DatabaseManager(db_path)
+        self.db = get_database_manager(db_path)
         self.db_path = db_path
 
         # Initialize tutoring engine
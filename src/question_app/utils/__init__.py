@@ -6,6 +6,7 @@ functionality used across the application.
 """
 
 from .file_utils import (
+    cached_questions_count,
     get_default_chat_system_prompt,
     get_default_welcome_message,
     load_chat_system_prompt,
@@ -13,6 +14,7 @@ from .file_utils import (
     load_feedback_prompt_incorrect,
     load_objectives,
     load_questions,
+    load_questions_by_id,
     load_system_prompt,
     load_welcome_message,
     save_chat_system_prompt,
@@ -29,6 +31,9 @@ from .text_utils import (
     clean_question_text,
     extract_topic_from_text,
     get_all_existing_tags,
+    markdown_to_html,
+    markdown_to_html_many,
+    preload_lexers,
 )
 
 from .file_utils import (
@@ -39,6 +44,8 @@ from .file_utils import (
 __all__ = [
     # File utilities
     "load_questions",
+    "load_questions_by_id",
+    "cached_questions_count",
     "save_questions",
     "load_objectives",
     "save_objectives",
@@ -56,4 +63,7 @@ __all__ = [
     "clean_answer_feedback",
     "get_all_existing_tags",
     "extract_topic_from_text",
+    "markdown_to_html",
+    "markdown_to_html_many",
+    "preload_lexers",
 ]
@@ -8,7 +8,9 @@ including questions, objectives, and configuration files.
 import json
 import logging
 import os
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +24,53 @@ FEEDBACK_PROMPT_CORRECT_FILE = "config/feedback_prompt_correct.txt"
 FEEDBACK_PROMPT_INCORRECT_FILE = "config/feedback_prompt_incorrect.txt"
 SYSTEM_PROMPTS_JSON = "data/system_prompts.json"
 
+# Parsed file contents keyed by path, with the (mtime_ns, size) they were read at
+_file_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+
+def _read_cached(path: str, parse: Callable[[Any], Any]) -> Any:
+    """
+    Read and parse a file, reusing the last result while it is unchanged.
+
+    The file is re-read when its modification time or size changes, so edits
+    made outside the app are still picked up. If the file cannot be stat'ed
+    it is read without caching.
+
+    Args:
+        path: Path of the file to read
+        parse: Function turning the open text file into a value
+
+    Returns:
+        The parsed file contents
+    """
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stamp = None
+
+    cached = _file_cache.get(path)
+    if stamp is not None and cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        value = parse(f)
+    if stamp is not None:
+        _file_cache[path] = (stamp, value)
+    return value
+
+
+def _read_text(f) -> str:
+    return f.read().strip()
+
+
+def clear_file_cache() -> None:
+    """Forget all cached file contents."""
+    global _questions_index
+
+    _file_cache.clear()
+    _questions_index = (None, {})
+
 
 def load_questions() -> List[Dict[str, Any]]:
     """
@@ -41,6 +90,9 @@ def load_questions() -> List[Dict[str, Any]]:
     Note:
         The function handles file I/O errors gracefully and logs any issues.
         If the file doesn't exist, an empty list is returned rather than an error.
+        The parsed file is cached until it changes on disk, so the question
+        dictionaries are shared between callers and must not be modified in
+        place; copy a question before editing it.
 
     Example:
         >>> questions = load_questions()
@@ -52,16 +104,65 @@ def load_questions() -> List[Dict[str, Any]]:
         ...     print("No questions found, starting with empty list")
         ...     questions = []
     """
+    return list(_load_question_list())
+
+
+def _load_question_list() -> List[Dict[str, Any]]:
+    """Return the cached question list itself, for read-only use."""
     try:
         if os.path.exists(DATA_FILE):
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return _read_cached(DATA_FILE, json.load)
         return []
     except Exception as e:
         logger.error(f"Error loading questions: {e}")
         return []
 
 
+def cached_questions_count() -> Optional[int]:
+    """
+    Count the questions in the data file.
+
+    Uses the same cache as :func:`load_questions`, so an unchanged file
+    costs a single ``os.stat`` and no copy of the question list.
+
+    Returns:
+        Optional[int]: Number of questions, 0 if the file cannot be parsed,
+        or None if the file does not exist.
+    """
+    try:
+        return len(_read_cached(DATA_FILE, json.load))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Error counting questions: {e}")
+        return 0
+
+
+# Id index of the question list it was built from
+_questions_index: Tuple[Any, Dict[Any, Dict[str, Any]]] = (None, {})
+
+
+def load_questions_by_id() -> Dict[Any, Dict[str, Any]]:
+    """
+    Load questions indexed by their ``id``.
+
+    The index is rebuilt only when the questions file changes, so a lookup by
+    id costs one dict access instead of a scan over every question.
+
+    Returns:
+        Dict[Any, Dict[str, Any]]: Mapping of question id to question. Like
+        :func:`load_questions`, the questions must not be modified in place.
+    """
+    global _questions_index
+
+    questions = _load_question_list()
+    source, index = _questions_index
+    if source is not questions:
+        index = {question.get("id"): question for question in questions}
+        _questions_index = (questions, index)
+    return index
+
+
 def save_questions(questions: List[Dict[str, Any]]) -> bool:
     """
     Save questions to the JSON data file.
@@ -99,8 +200,12 @@ def save_questions(questions: List[Dict[str, Any]]) -> bool:
         :func:`load_questions`: Load questions from the JSON file
     """
     try:
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(questions, f, indent=2, ensure_ascii=False)
+        # The file is only ever replaced wholesale by a Canvas import, so
+        # serialize it in one pass and hand it to the OS in a single write.
+        data = orjson.dumps(questions, option=orjson.OPT_INDENT_2)
+        _file_cache.pop(DATA_FILE, None)
+        with open(DATA_FILE, "wb") as f:
+            f.write(data)
         return True
     except Exception as e:
         logger.error(f"Error saving questions: {e}")
@@ -117,11 +222,12 @@ def load_objectives() -> List[Dict[str, Any]]:
 
     Note:
         The function handles file I/O errors gracefully and logs any issues.
+        Like :func:`load_questions`, the parsed file is cached until it
+        changes, so the returned dictionaries must not be modified in place.
     """
     try:
         if os.path.exists(OBJECTIVES_FILE):
-            with open(OBJECTIVES_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return list(_read_cached(OBJECTIVES_FILE, json.load))
         return []
     except Exception as e:
         logger.error(f"Error loading objectives: {e}")
@@ -142,6 +248,7 @@ def save_objectives(objectives: List[Dict[str, Any]]) -> bool:
         The function handles file I/O errors gracefully and logs any issues.
     """
     try:
+        _file_cache.pop(OBJECTIVES_FILE, None)
         with open(OBJECTIVES_FILE, "w", encoding="utf-8") as f:
             json.dump(objectives, f, indent=2, ensure_ascii=False)
         return True
@@ -163,8 +270,7 @@ def load_system_prompt() -> str:
     """
     try:
         if os.path.exists(SYSTEM_PROMPT_FILE):
-            with open(SYSTEM_PROMPT_FILE, "r", encoding="utf-8") as f:
-                return f.read().strip()
+            return _read_cached(SYSTEM_PROMPT_FILE, _read_text)
         return ""
     except Exception as e:
         logger.error(f"Error loading system prompt: {e}")
@@ -185,6 +291,7 @@ def save_system_prompt(prompt: str) -> bool:
         The function handles file I/O errors gracefully and logs any issues.
     """
     try:
+        _file_cache.pop(SYSTEM_PROMPT_FILE, None)
         with open(SYSTEM_PROMPT_FILE, "w", encoding="utf-8") as f:
             f.write(prompt)
         return True
@@ -206,8 +313,7 @@ def load_chat_system_prompt() -> str:
     """
     try:
         if os.path.exists(CHAT_SYSTEM_PROMPT_FILE):
-            with open(CHAT_SYSTEM_PROMPT_FILE, "r", encoding="utf-8") as f:
-                return f.read().strip()
+            return _read_cached(CHAT_SYSTEM_PROMPT_FILE, _read_text)
         return get_default_chat_system_prompt()
     except Exception as e:
         logger.error(f"Error loading chat system prompt: {e}")
@@ -228,6 +334,7 @@ def save_chat_system_prompt(prompt: str) -> bool:
         The function handles file I/O errors gracefully and logs any issues.
     """
     try:
+        _file_cache.pop(CHAT_SYSTEM_PROMPT_FILE, None)
         with open(CHAT_SYSTEM_PROMPT_FILE, "w", encoding="utf-8") as f:
             f.write(prompt)
         return True
@@ -249,8 +356,7 @@ def load_welcome_message() -> str:
     """
     try:
         if os.path.exists(WELCOME_MESSAGE_FILE):
-            with open(WELCOME_MESSAGE_FILE, "r", encoding="utf-8") as f:
-                return f.read().strip()
+            return _read_cached(WELCOME_MESSAGE_FILE, _read_text)
         return get_default_welcome_message()
     except Exception as e:
         logger.error(f"Error loading welcome message: {e}")
@@ -271,6 +377,7 @@ def save_welcome_message(message: str) -> bool:
         The function handles file I/O errors gracefully and logs any issues.
     """
     try:
+        _file_cache.pop(WELCOME_MESSAGE_FILE, None)
         with open(WELCOME_MESSAGE_FILE, "w", encoding="utf-8") as f:
             f.write(message)
         return True
@@ -408,12 +515,15 @@ Feel free to ask me anything about the quiz questions or educational content. I'
 
 
 def load_feedback_prompt_from_json(prompt_type: str) -> str:
-    """Generic loader for feedback prompts (correct/incorrect) from a single JSON file."""
+    """Generic loader for feedback prompts (correct/incorrect) from a single JSON file.
+
+    Called once per answer when generating feedback, so the parsed file is
+    cached until it changes on disk.
+    """
     try:
         if os.path.exists(SYSTEM_PROMPTS_JSON):
-            with open(SYSTEM_PROMPTS_JSON, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get(prompt_type, "").strip()
+            data = _read_cached(SYSTEM_PROMPTS_JSON, json.load)
+            return data.get(prompt_type, "").strip()
         return ""
     except Exception as e:
         logger.error(f"Error loading feedback prompt ({prompt_type}): {e}")
@@ -429,6 +539,7 @@ def save_feedback_prompt_to_json(prompt_type: str, prompt_text: str) -> bool:
             with open(SYSTEM_PROMPTS_JSON, "r", encoding="utf-8") as f:
                 data = json.load(f)
         data[prompt_type] = prompt_text
+        _file_cache.pop(SYSTEM_PROMPTS_JSON, None)
         with open(SYSTEM_PROMPTS_JSON, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         return True
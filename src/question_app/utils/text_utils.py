@@ -5,11 +5,27 @@ This module contains functions for cleaning and processing text content,
 including HTML cleaning, text normalization, and feedback processing.
 """
 
+import asyncio
 import re
+import threading
+from functools import lru_cache
 from typing import List
 from bs4 import BeautifulSoup, Comment, CData
 import html
 
+import markdown
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.util import ClassNotFound
+
+try:
+    # Optional C renderer (cmark-gfm); python-markdown is used without it
+    import cmarkgfm
+    from cmarkgfm.cmark import Options as CmarkOptions
+except ImportError:
+    cmarkgfm = None
+
 """
 Text utility functions for the Canvas Quiz Manager.
 
@@ -352,3 +368,108 @@ def extract_topic_from_text(text: str) -> str:
         return "content"
 
     return "general"
+
+
+# Fallback renderer when cmarkgfm is not installed. Building a Markdown
+# instance loads its extensions, so one is shared and reset between
+# documents. Markdown objects are stateful, hence the lock.
+_MD = markdown.Markdown(extensions=['fenced_code', 'codehilite'])
+_md_lock = threading.Lock()
+
+# One line of letters, digits and a few punctuation marks that neither
+# renderer treats as syntax, like most answer options ("42", "True"). It
+# must not start like an ordered list item ("1. ", "2)") or begin or end
+# with a space, so both renderers just wrap it in a paragraph.
+_PLAIN_TEXT_RE = re.compile(r"(?!\d+[.)](?: |$))[^\W_](?:[^\W_]|[ ,.;?!'()%/+=-])*(?<! )")
+
+
+@lru_cache(maxsize=4096)
+def markdown_to_html(text: str) -> str:
+    """
+    Render question or answer Markdown to HTML for the edit page preview.
+
+    Uses cmark-gfm when installed (native code, much faster on long text)
+    and python-markdown otherwise. Plain one-line text skips both parsers.
+    Conversion is deterministic, so results are cached by the text itself.
+
+    Args:
+        text: Markdown source
+
+    Returns:
+        Rendered HTML
+    """
+    if _PLAIN_TEXT_RE.fullmatch(text):
+        # The character set above needs no escaping
+        paragraph = f"<p>{text}</p>"
+        return paragraph + "\n" if cmarkgfm is not None else paragraph
+
+    if cmarkgfm is not None:
+        rendered = cmarkgfm.markdown_to_html_with_extensions(
+            text,
+            options=CmarkOptions.CMARK_OPT_UNSAFE,  # keep inline HTML, as python-markdown does
+            extensions=['table', 'strikethrough', 'autolink'],
+        )
+        return _CODE_BLOCK_RE.sub(_highlight_code_block, rendered)
+
+    with _md_lock:
+        _MD.reset()
+        return _MD.convert(text)
+
+
+async def markdown_to_html_many(texts: List[str]) -> List[str]:
+    """
+    Render several Markdown texts, in parallel when that actually helps.
+
+    cmark-gfm runs in C without the GIL, so each text is converted on its
+    own worker thread. python-markdown holds the GIL (and a lock), so its
+    conversions stay serial on the calling thread. Plain one-line texts
+    never reach a parser, so they are not worth a thread hop either.
+
+    Args:
+        texts: Markdown sources
+
+    Returns:
+        Rendered HTML, in the same order as ``texts``
+    """
+    if cmarkgfm is None:
+        return [markdown_to_html(text) for text in texts]
+    parsed = [i for i, text in enumerate(texts) if not _PLAIN_TEXT_RE.fullmatch(text)]
+    if len(parsed) < 2:
+        return [markdown_to_html(text) for text in texts]
+    results = [markdown_to_html(text) if _PLAIN_TEXT_RE.fullmatch(text) else "" for text in texts]
+    rendered = await asyncio.gather(*(asyncio.to_thread(markdown_to_html, texts[i]) for i in parsed))
+    for i, html_text in zip(parsed, rendered):
+        results[i] = html_text
+    return results
+
+
+# Fenced blocks with a language, as emitted by cmark-gfm
+_CODE_BLOCK_RE = re.compile(
+    r'<pre><code class="language-([\w+#.-]+)">(.*?)</code></pre>', re.DOTALL
+)
+# Same markup as the codehilite extension, so the page CSS applies to both
+_CODEHILITE_FORMATTER = HtmlFormatter(cssclass="codehilite")
+
+
+# Languages worth importing up front; anything else loads on first use
+PRELOADED_LEXERS = ("python", "bash", "javascript", "html", "css", "sql", "json", "yaml", "text")
+
+
+def preload_lexers() -> None:
+    """
+    Import the Pygments lexers for common code fence languages.
+
+    Pygments imports each lexer module on first lookup, so without this the
+    first question containing, say, a ``python`` fence pays that cost.
+    """
+    for name in PRELOADED_LEXERS:
+        get_lexer_by_name(name)
+
+
+def _highlight_code_block(match: "re.Match[str]") -> str:
+    """Highlight one rendered code block with Pygments, leaving unknown languages as-is."""
+    try:
+        lexer = get_lexer_by_name(match.group(1))
+    except ClassNotFound:
+        return match.group(0)
+    return highlight(html.unescape(match.group(2)), lexer, _CODEHILITE_FORMATTER)
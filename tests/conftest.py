@@ -21,6 +21,32 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "slow: mark test as slow")
 
 
+@pytest.fixture(autouse=True)
+def clear_response_caches():
+    """Reset in-process caches so patched loaders are seen by every test"""
+    from question_app.api import chat
+    from question_app.services.query_cache import query_cache
+    from question_app.utils.file_utils import clear_file_cache
+
+    caches = [
+        chat._cached_default_prompt,
+        chat._cached_default_welcome_message,
+    ]
+    for cache in caches:
+        cache.cache_clear()
+    query_cache.clear()
+    clear_file_cache()
+    chat._known_students.clear()
+    chat._recent_replies.clear()
+    yield
+    for cache in caches:
+        cache.cache_clear()
+    query_cache.clear()
+    clear_file_cache()
+    chat._known_students.clear()
+    chat._recent_replies.clear()
+
+
 @pytest.fixture
 def client():
     """Create a test client for the FastAPI app."""
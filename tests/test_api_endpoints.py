@@ -1,13 +1,16 @@
 """
 Tests for API endpoints
 """
+import asyncio
+import copy
 import json
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 from fastapi.testclient import TestClient
 
+from question_app.api.chat import get_tutor
 from question_app.main import app
 
 
@@ -17,6 +20,15 @@ def client():
     return TestClient(app)
 
 
+@pytest.fixture
+def mock_tutor():
+    """Serve a mock tutor system through the get_tutor dependency"""
+    tutor = MagicMock()
+    app.dependency_overrides[get_tutor] = lambda: tutor
+    yield tutor
+    app.dependency_overrides.pop(get_tutor, None)
+
+
 class TestHomeEndpoint:
     """
     Test the home page endpoint.
@@ -179,6 +191,45 @@ class TestQuestionCRUD:
             assert response.status_code == 200
             assert "text/html" in response.headers["content-type"]
 
+    def test_edit_page_revalidates_with_etag(self, client):
+        """Test that an unchanged edit page is answered with 304 and not re-rendered"""
+        from question_app.api import questions
+
+        mock_db = MagicMock()
+        mock_db.load_question_details.side_effect = lambda _: {
+            "id": "q1",
+            "question_text": "Q?",
+            "question_text_html": "<p>Q?</p>",
+            "answers": [],
+            "objective_ids": [],
+        }
+        mock_db.list_all_objectives.return_value = [{"id": "o1", "text": "Objective"}]
+
+        with patch("question_app.api.questions.db", mock_db), patch(
+            "question_app.api.questions.render_template", wraps=questions.render_template
+        ) as render:
+            first = client.get("/questions/q1")
+            second = client.get(
+                "/questions/q1", headers={"If-None-Match": first.headers["etag"]}
+            )
+            mock_db.list_all_objectives.return_value = [{"id": "o1", "text": "Changed"}]
+            third = client.get(
+                "/questions/q1", headers={"If-None-Match": first.headers["etag"]}
+            )
+            with patch(
+                "question_app.api.questions.template_fingerprint", return_value='"new"'
+            ):
+                fourth = client.get(
+                    "/questions/q1", headers={"If-None-Match": third.headers["etag"]}
+                )
+
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert third.status_code == 200
+        assert third.headers["etag"] != first.headers["etag"]
+        assert fourth.status_code == 200
+        assert render.call_count == 3
+
     def test_get_question_edit_page_not_found(self, client):
         """Test getting non-existent question edit page"""
         with patch("question_app.main.load_questions", return_value=[]):
@@ -192,6 +243,26 @@ class TestQuestionCRUD:
             assert response.status_code == 200
             assert "text/html" in response.headers["content-type"]
 
+    def test_new_question_page_renders_shared_blank_question(self, client):
+        """Test that the new question page renders the module-level blank question"""
+        from question_app.api import questions
+
+        mock_db = MagicMock()
+        mock_db.list_all_objectives.return_value = []
+        blank = copy.deepcopy(questions._EMPTY_QUESTION)
+
+        with patch("question_app.api.questions.db", mock_db), patch(
+            "question_app.api.questions.render_template", wraps=questions.render_template
+        ) as render:
+            first = client.get("/questions/new")
+            second = client.get("/questions/new")
+
+        assert first.status_code == second.status_code == 200
+        contexts = [call.args[2] for call in render.call_args_list]
+        assert all(c["question"] is questions._EMPTY_QUESTION for c in contexts)
+        assert questions._EMPTY_QUESTION == blank
+        assert [a["id"] for a in blank["answers"]] == ["new_1", "new_2", "new_3", "new_4"]
+
     def test_create_new_question_success(self, client):
         """Test successful new question creation"""
         question_data = {
@@ -233,6 +304,203 @@ class TestQuestionCRUD:
                 assert data["success"] is True
                 assert "question_id" in data
 
+    def test_create_question_batches_rows(self, client, tmp_path):
+        """Test that new answers and objective links are written in one batch each"""
+        from question_app.services.database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            conn.executemany(
+                "INSERT INTO learning_objective (id, text) VALUES (?, ?)",
+                [("o1", "First"), ("o2", "Second")],
+            )
+            conn.commit()
+
+        with patch("question_app.api.questions.db", db):
+            response = client.post(
+                "/questions/",
+                json={
+                    "question_text": "Which is a landmark?",
+                    "objective_ids": ["o1", "", "o2"],
+                    "answers": [
+                        {"text": "<nav>", "is_correct": True},
+                        {"text": "  ", "is_correct": False},
+                        {"text": "<div>", "is_correct": False},
+                    ],
+                },
+            )
+
+        assert response.status_code == 200
+        details = db.load_question_details(response.json()["question_id"])
+        assert sorted(a["text"] for a in details["answers"]) == ["<div>", "<nav>"]
+        assert sorted(details["objective_ids"]) == ["o1", "o2"]
+
+    def test_objective_associations_are_written_off_the_event_loop(self, client, tmp_path):
+        """Test that associate-objectives replaces the links from a worker thread"""
+        from question_app.services.database import DatabaseManager
+
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO question (id, question_text) VALUES ('q1', 'Q1')")
+            conn.executemany(
+                "INSERT INTO learning_objective (id, text) VALUES (?, ?)",
+                [("o1", "First"), ("o2", "Second")],
+            )
+            conn.execute(
+                "INSERT INTO question_objective_association (id, question_id, objective_id) "
+                "VALUES ('a1', 'q1', 'o1')"
+            )
+            conn.commit()
+
+        on_loop = []
+        transaction = db.transaction
+
+        def recording_transaction():
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return transaction()
+
+        with patch("question_app.api.questions.db", db), patch.object(
+            db, "transaction", side_effect=recording_transaction
+        ):
+            response = client.post(
+                "/questions/q1/associate-objectives", json={"objective_ids": ["o2", ""]}
+            )
+
+        assert response.status_code == 200
+        assert db.load_question_details("q1")["objective_ids"] == ["o2"]
+        assert on_loop == [False]
+
+    def test_missing_question_returns_404_not_500(self, client):
+        """Test that not-found errors raised inside the handlers keep their status"""
+        mock_db = MagicMock()
+        mock_db.load_question_details.return_value = None
+        mock_db.load_unapproved_answers.return_value = None
+        mock_db.update_question_and_answers.return_value = False
+        mock_db.delete_question.return_value = False
+
+        with patch("question_app.api.questions.db", mock_db):
+            responses = [
+                client.get("/questions/missing"),
+                client.put("/questions/missing", json={"question_text": "Q", "answers": []}),
+                client.delete("/questions/missing"),
+                client.post("/questions/missing/generate-feedback"),
+                client.post("/questions/missing/suggest-objectives"),
+            ]
+
+        assert [r.status_code for r in responses] == [404] * len(responses)
+        assert all(r.json()["detail"] == "Question not found" for r in responses)
+
+    def test_generate_feedback_runs_concurrently(self, client):
+        """Test that unapproved answers get feedback concurrently and are saved in one batch"""
+        running = 0
+        peak = 0
+
+        async def fake_feedback(question_text, answer_text, is_correct):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            if answer_text == "bad":
+                raise RuntimeError("AI down")
+            return f"feedback for {answer_text}"
+
+        mock_db = MagicMock()
+        mock_db.load_unapproved_answers.return_value = (
+            "Q?",
+            [
+                {"id": "a1", "text": "one", "is_correct": True},
+                {"id": "a3", "text": "three", "is_correct": False},
+            ],
+        )
+
+        with patch("question_app.api.questions.db", mock_db), patch(
+            "question_app.api.questions.ai_generator.generate_feedback_for_answer",
+            side_effect=fake_feedback,
+        ):
+            response = client.post("/questions/q1/generate-feedback")
+
+            assert response.status_code == 200
+            assert [a["answer_id"] for a in response.json()["updated_answers"]] == ["a1", "a3"]
+            assert peak == 2
+            mock_db.update_answers_feedback.assert_called_once_with(
+                [("a1", "feedback for one"), ("a3", "feedback for three")]
+            )
+
+            mock_db.reset_mock()
+            mock_db.load_unapproved_answers.return_value[1][1]["text"] = "bad"
+            response = client.post("/questions/q1/generate-feedback")
+
+        assert response.status_code == 500
+        mock_db.update_answers_feedback.assert_called_once_with([("a1", "feedback for one")])
+
+    def test_generate_feedback_respects_concurrency_limit(self, client):
+        """Test that no more than AI_FEEDBACK_CONCURRENCY AI calls run at once"""
+        running = 0
+        peak = 0
+
+        async def fake_feedback(question_text, answer_text, is_correct):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return f"feedback for {answer_text}"
+
+        mock_db = MagicMock()
+        mock_db.load_unapproved_answers.return_value = (
+            "Q?",
+            [{"id": f"a{i}", "text": str(i), "is_correct": False} for i in range(7)],
+        )
+
+        with patch("question_app.api.questions.db", mock_db), patch(
+            "question_app.api.questions.ai_generator.generate_feedback_for_answer",
+            side_effect=fake_feedback,
+        ), patch("question_app.api.questions.config.AI_FEEDBACK_CONCURRENCY", 3):
+            response = client.post("/questions/q1/generate-feedback")
+
+        assert response.status_code == 200
+        assert len(response.json()["updated_answers"]) == 7
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_generate_feedback_saves_after_response(self):
+        """Test that successful feedback is persisted by a background task"""
+        from fastapi import BackgroundTasks
+
+        from question_app.api import questions
+
+        mock_db = MagicMock()
+        mock_db.load_unapproved_answers.return_value = (
+            "Q?", [{"id": "a1", "text": "one", "is_correct": True}]
+        )
+        background_tasks = BackgroundTasks()
+
+        with patch("question_app.api.questions.db", mock_db), patch(
+            "question_app.api.questions.ai_generator.generate_feedback_for_answer",
+            AsyncMock(return_value="Nice"),
+        ):
+            await questions.generate_feedback_for_all_unapproved("q1", background_tasks)
+
+        mock_db.update_answers_feedback.assert_not_called()
+        await background_tasks()
+        mock_db.update_answers_feedback.assert_called_once_with([("a1", "Nice")])
+
+    def test_create_question_rejects_blank_answers(self, client):
+        """Test that a question without answer text is rejected before the database"""
+        with patch("question_app.api.questions.db") as mock_db:
+            response = client.post(
+                "/questions/",
+                json={"question_text": "Q?", "answers": [{"text": "  "}]},
+            )
+
+        assert response.status_code == 422
+        mock_db.get_connection.assert_not_called()
+
     def test_update_question_success(self, client, sample_questions):
         """Test successful question update"""
         question_data = {
@@ -381,10 +649,218 @@ class TestChatAPI:
         )
         assert response.status_code == 200  # Should default to 3
 
+    def test_chat_message_whitespace_only(self, client):
+        """Test that whitespace-only messages are stripped and rejected"""
+        response = client.post("/chat/message", json={"message": "   \n"})
+        assert response.status_code == 400
+
+    def test_chat_message_too_long(self, client):
+        """Test that oversized messages are rejected before reaching the tutor"""
+        response = client.post("/chat/message", json={"message": "a" * 8193})
+        assert response.status_code == 422
+
+    def test_chat_message_busy_returns_503(self, client, mock_tutor):
+        """Test that saturated tutor slots return 503 with Retry-After"""
+        with patch(
+            "question_app.api.chat._azure_semaphore", asyncio.Semaphore(0)
+        ), patch("question_app.api.chat.config.AZURE_QUEUE_TIMEOUT", 0.01):
+            response = client.post(
+                "/chat/message", json={"message": "Hello", "student_id": "s1"}
+            )
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        mock_tutor.conduct_socratic_session.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_identical_concurrent_messages_share_one_session(self):
+        """Test that identical in-flight requests are coalesced into one session"""
+        from question_app.api import chat
+
+        async def slow_session(student_id, student_response):
+            await asyncio.sleep(0.05)
+            return {"final_response": "Hi", "session_metadata": {}}
+
+        mock_tutor = MagicMock()
+        mock_tutor.conduct_socratic_session = MagicMock(side_effect=slow_session)
+
+        with patch("question_app.api.chat._azure_semaphore", asyncio.Semaphore(1)):
+            first, second = await asyncio.gather(
+                chat._run_session_coalesced(mock_tutor, "s1", "Hello"),
+                chat._run_session_coalesced(mock_tutor, "s1", "Hello"),
+            )
+
+        assert first == second == {"final_response": "Hi", "session_metadata": {}}
+        mock_tutor.conduct_socratic_session.assert_called_once()
+        assert chat._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_joined_session(self):
+        """Test that the first caller going away leaves the shared session running"""
+        from question_app.api import chat
+
+        async def slow_session(student_id, student_response):
+            await asyncio.sleep(0.05)
+            return {"final_response": "Hi", "session_metadata": {}}
+
+        mock_tutor = MagicMock()
+        mock_tutor.conduct_socratic_session = MagicMock(side_effect=slow_session)
+
+        with patch("question_app.api.chat._azure_semaphore", asyncio.Semaphore(1)):
+            owner = asyncio.create_task(chat._run_session_coalesced(mock_tutor, "s1", "Hello"))
+            await asyncio.sleep(0)
+            joiner = asyncio.create_task(chat._run_session_coalesced(mock_tutor, "s1", "Hello"))
+            await asyncio.sleep(0)
+            owner.cancel()
+
+            assert await joiner == {"final_response": "Hi", "session_metadata": {}}
+            assert chat._azure_semaphore._value == 1
+
+        assert owner.cancelled()
+        mock_tutor.conduct_socratic_session.assert_called_once()
+        assert chat._inflight == {}
+
+    def test_start_session_bumps_counter_after_response(self, client, mock_tutor):
+        """Test that START_SESSION updates only the session counter"""
+        mock_tutor.get_student_profile.return_value = MagicMock(total_sessions=4)
+
+        with patch(
+            "question_app.api.chat.load_welcome_message", return_value="Hi!"
+        ):
+            response = client.post(
+                "/chat/message", json={"message": "START_SESSION", "student_id": "s1"}
+            )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["response"] == "Hi!"
+        assert data["session_metadata"] == {
+            "session_number": 5,
+            "intent_executed": "start_session",
+            "analysis": {},
+            "progress": {},
+        }
+        mock_tutor.db.increment_total_sessions.assert_called_once_with("s1")
+        mock_tutor.db.save_student_profile.assert_not_called()
+
+    def test_known_student_skips_profile_lookup(self, client, mock_tutor):
+        """Test that only the first message from a student loads the profile"""
+        mock_tutor.conduct_socratic_session = AsyncMock(
+            return_value={"final_response": "Hi", "session_metadata": {}}
+        )
+
+        for message in ("Hello", "What is alt text?", "Thanks"):
+            response = client.post(
+                "/chat/message", json={"message": message, "student_id": "s1"}
+            )
+            assert response.status_code == 200
+
+        mock_tutor.get_student_profile.assert_called_once_with("s1")
+        assert mock_tutor.conduct_socratic_session.await_count == 3
+
+    def test_repeated_message_reuses_recent_reply(self, client, mock_tutor):
+        """Test that a quick resend of the same message does not start a new session"""
+        mock_tutor.conduct_socratic_session = AsyncMock(
+            return_value={"tutor_response": "Hi", "session_metadata": {}}
+        )
+
+        replies = [
+            client.post(
+                "/chat/message", json={"message": message, "student_id": "s1"}
+            ).json()["response"]
+            for message in ("Hello", "Hello", "Something else")
+        ]
+
+        assert replies == ["Hi", "Hi", "Hi"]
+        assert mock_tutor.conduct_socratic_session.await_count == 2
+
+    def test_chat_message_stream(self, client, mock_tutor):
+        """Test that ?stream=1 returns the reply as server-sent events"""
+
+        async def fake_stream(student_id, student_response):
+            yield {"delta": "Hello"}
+            yield {"delta": " there"}
+            yield {"session_metadata": {"session_number": 2}}
+
+        mock_tutor.conduct_socratic_session_stream = fake_stream
+
+        response = client.post(
+            "/chat/message?stream=1",
+            json={"message": "What is alt text?", "student_id": "s1"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            json.loads(line[len("data: "):])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert events == [
+            {"delta": "Hello"},
+            {"delta": " there"},
+            {"student_id": "s1", "session_metadata": {"session_number": 2}},
+        ]
+
+    def test_chat_message_stream_is_not_gzipped(self, client, mock_tutor):
+        """Test that a streamed reply is not buffered by the gzip middleware"""
+
+        async def fake_stream(student_id, student_response):
+            yield {"delta": "x" * 4096}
+
+        mock_tutor.conduct_socratic_session_stream = fake_stream
+
+        response = client.post(
+            "/chat/message?stream=1",
+            json={"message": "What is alt text?", "student_id": "s1"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers.get("content-encoding") != "gzip"
+        assert "x" * 4096 in response.text
+
+    @pytest.mark.asyncio
+    async def test_aborted_stream_releases_tutor_slot(self):
+        """Test that a stream closed mid-way (client disconnect) frees its slot"""
+        from starlette.requests import Request
+
+        from question_app.api import chat
+
+        async def fake_stream(student_id, student_response):
+            yield {"delta": "Hello"}
+            yield {"delta": " there"}
+
+        tutor = MagicMock()
+        tutor.conduct_socratic_session_stream = fake_stream
+        semaphore = asyncio.Semaphore(2)
+        request = Request({"type": "http", "method": "POST", "headers": []})
+
+        with patch("question_app.api.chat._azure_semaphore", semaphore):
+            response = await chat.handle_chat_message(
+                chat.ChatMessage(message="Hi", student_id="s1"), request, True, tutor
+            )
+            assert semaphore._value == 1
+            body = response.body_iterator
+            await body.__anext__()
+            await body.aclose()  # what an aborted response leaves behind
+            assert semaphore._value == 2
+
+            # The background task must not release the slot a second time
+            await response.background()
+            assert semaphore._value == 2
 
 class TestObjectivesAPI:
     """Test learning objectives API endpoints"""
 
+    def test_routers_share_one_ai_generator(self):
+        """Test that the questions and objectives routers use the same AI service"""
+        from question_app.api import objectives, questions
+        from question_app.services.ai_service import get_ai_generator_service
+
+        assert questions.ai_generator is objectives.ai_generator
+        assert get_ai_generator_service() is questions.ai_generator
+
     def test_objectives_page_loads(self, client, sample_objectives):
         """Test that objectives page loads successfully"""
         with patch(
@@ -426,6 +902,29 @@ class TestObjectivesAPI:
             response = client.post("/objectives", json=objectives_data)
             assert response.status_code == 500
 
+    @pytest.mark.asyncio
+    async def test_concurrent_draft_requests_share_one_generation(self):
+        """Test that identical in-flight draft generations are coalesced"""
+        from question_app.api import objectives
+
+        async def slow_draft(objective_text):
+            await asyncio.sleep(0.05)
+            return {"question_text": objective_text, "answers": []}
+
+        mock_generate = AsyncMock(side_effect=slow_draft)
+
+        with patch.object(
+            objectives.ai_generator, "generate_question_from_objective", mock_generate
+        ):
+            first, second = await asyncio.gather(
+                objectives._generate_draft_coalesced("o1", "Alt text"),
+                objectives._generate_draft_coalesced("o1", "Alt text"),
+            )
+
+        assert first == second == {"question_text": "Alt text", "answers": []}
+        mock_generate.assert_awaited_once()
+        assert objectives._draft_inflight == {}
+
 
 class TestDebugEndpoints:
     """Test debug endpoints"""
@@ -435,18 +934,22 @@ class TestDebugEndpoints:
         with patch(
             "question_app.api.debug.load_system_prompt", return_value="Test prompt"
         ):
-            with patch("question_app.api.debug.load_questions", return_value=[]):
-                with patch("os.path.exists", return_value=True):
-                    response = client.get("/debug/config")
-                    assert response.status_code == 200
-                    data = response.json()
-                    assert "canvas_configured" in data
-                    assert "azure_configured" in data
+            with patch(
+                "question_app.api.debug.cached_questions_count", return_value=0
+            ):
+                response = client.get("/debug/config")
+                assert response.status_code == 200
+                data = response.json()
+                assert "canvas_configured" in data
+                assert "azure_configured" in data
+                assert data["data_file_exists"] is True
+                assert data["questions_count"] == 0
 
     def test_debug_question(self, client, sample_questions):
         """Test debug question endpoint"""
         with patch(
-            "question_app.api.debug.load_questions", return_value=sample_questions
+            "question_app.api.debug.load_questions_by_id",
+            return_value={q["id"]: q for q in sample_questions},
         ):
             response = client.get("/debug/question/1")
             assert response.status_code == 200
@@ -455,7 +958,7 @@ class TestDebugEndpoints:
 
     def test_debug_question_not_found(self, client):
         """Test debug question endpoint with non-existent question"""
-        with patch("question_app.api.debug.load_questions", return_value=[]):
+        with patch("question_app.api.debug.load_questions_by_id", return_value={}):
             response = client.get("/debug/question/999")
             assert response.status_code == 200
             data = response.json()
@@ -485,6 +988,22 @@ class TestDebugEndpoints:
             assert "nomic-embed-text" in data["available_models"]
             assert data["embedding_model_available"] is True
 
+    def test_debug_ollama_test_models_sorted(self, client):
+        """Test that model names are de-duplicated, sorted and tolerate a null list"""
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.side_effect = [
+            {"models": [{"name": "mistral"}, {"name": "llama2"}, {"name": "mistral"}]},
+            {"models": None},
+        ]
+
+        with patch("httpx.AsyncClient.get", return_value=mock_response):
+            first = client.get("/debug/ollama-test").json()
+            second = client.get("/debug/ollama-test").json()
+
+        assert first["available_models"] == ["llama2", "mistral"]
+        assert second["available_models"] == []
+        assert second["embedding_model_available"] is False
+
     @pytest.mark.asyncio
     async def test_debug_ollama_test_connection_error(self, client):
         """Test Ollama connection test with connection error"""
@@ -511,6 +1030,18 @@ class TestDebugEndpoints:
             assert data["ollama_connected"] is False
             assert "Ollama returned status 500" in data["error"]
 
+    def test_debug_ollama_test_uses_shared_client(self, client):
+        """Test that the connection test reuses the shared HTTP client"""
+        mock_client = MagicMock()
+        mock_client.get = AsyncMock(return_value=MagicMock(status_code=500))
+
+        with patch(
+            "question_app.api.debug.get_http_client", return_value=mock_client
+        ):
+            client.get("/debug/ollama-test")
+
+        mock_client.get.assert_awaited_once()
+
 
 class TestChatSystemPromptAPI:
     """Test chat system prompt API endpoints"""
@@ -529,6 +1060,23 @@ class TestChatSystemPromptAPI:
                 assert response.status_code == 200
                 assert "text/html" in response.headers["content-type"]
 
+    def test_get_default_chat_system_prompt_etag(self, client):
+        """Test that a matching If-None-Match returns 304 without a body"""
+        with patch(
+            "question_app.api.chat.get_default_chat_system_prompt",
+            return_value="Default prompt",
+        ) as mock_default:
+            response = client.get("/chat/system-prompt/default")
+            etag = response.headers["etag"]
+            assert response.headers["cache-control"] == "public, max-age=60"
+
+            response = client.get(
+                "/chat/system-prompt/default", headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 304
+            assert response.content == b""
+            assert mock_default.call_count == 1
+
     def test_save_chat_system_prompt_success(self, client):
         """Test successful chat system prompt save"""
         with patch("question_app.api.chat.save_chat_system_prompt", return_value=True):
@@ -578,6 +1126,32 @@ class TestChatWelcomeMessageAPI:
             data = response.json()
             assert data["welcome_message"] == "Welcome to the chat!"
 
+    def test_get_chat_welcome_message_etag(self, client):
+        """Test that the ETag follows the saved welcome message"""
+        with patch(
+            "question_app.api.chat.load_welcome_message",
+            return_value="Welcome to the chat!",
+        ):
+            response = client.get("/chat/welcome-message")
+            etag = response.headers["etag"]
+            assert response.headers["cache-control"] == "no-cache"
+
+            response = client.get(
+                "/chat/welcome-message", headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 304
+            assert response.content == b""
+
+        with patch(
+            "question_app.api.chat.load_welcome_message",
+            return_value="A new welcome",
+        ):
+            response = client.get(
+                "/chat/welcome-message", headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 200
+            assert response.json()["welcome_message"] == "A new welcome"
+
     def test_save_chat_welcome_message_json_success(self, client):
         """Test successful chat welcome message save with JSON"""
         with patch("question_app.api.chat.save_welcome_message", return_value=True):
@@ -594,7 +1168,8 @@ class TestChatWelcomeMessageAPI:
         """Test successful chat welcome message save with form data"""
         with patch("question_app.api.chat.save_welcome_message", return_value=True):
             response = client.post(
-                "/chat/welcome-message", data={"welcome_message": "New welcome message"}
+                "/chat/welcome-message/form",
+                data={"welcome_message": "New welcome message"},
             )
             assert response.status_code == 200
             data = response.json()
@@ -613,6 +1188,13 @@ class TestChatWelcomeMessageAPI:
             )
             assert response.status_code == 500
 
+    def test_save_chat_welcome_message_no_body(self, client):
+        """Test chat welcome message save with an empty request body"""
+        with patch("question_app.api.chat.save_welcome_message") as mock_save:
+            response = client.post("/chat/welcome-message", content=b"")
+            assert response.status_code == 400
+            mock_save.assert_not_called()
+
     def test_get_default_chat_welcome_message(self, client):
         """Test getting default chat welcome message"""
         with patch(
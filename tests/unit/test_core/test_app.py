@@ -1,11 +1,12 @@
 """
 Unit tests for core app functionality
 """
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
 from fastapi.testclient import TestClient
 
-from question_app.core.app import create_app, register_routers
+from question_app.core.app import create_app, register_routers, warmup
 from question_app.main import app
 
 
@@ -19,6 +20,59 @@ class TestAppCreation:
         assert hasattr(test_app, "title")
         assert test_app.title == "Canvas Quiz Manager"
 
+    def test_routes_are_registered_once(self):
+        """Test that no path and method is served by two routes"""
+        from question_app.api import (
+            canvas_router,
+            chat_router,
+            debug_router,
+            objectives_router,
+            questions_router,
+            system_prompt_router,
+            vector_store_router,
+        )
+
+        routers = [
+            canvas_router,
+            chat_router,
+            debug_router,
+            objectives_router,
+            questions_router,
+            system_prompt_router,
+            vector_store_router,
+        ]
+        # Included routers are not flattened into app.routes, so walk them
+        routes = [route for router in routers for route in router.routes]
+        routes += [route for route in app.routes if hasattr(route, "path")]
+        seen = set()
+        for route in routes:
+            for method in getattr(route, "methods", None) or {None}:
+                key = (route.path, method)
+                assert key not in seen, key
+                seen.add(key)
+        assert ("/system-prompt/", "GET") in seen
+
+    def test_large_responses_are_gzipped(self):
+        """Test that big JSON bodies are compressed and small ones are not"""
+        test_app = create_app()
+
+        @test_app.get("/big")
+        async def big():
+            return {"text": "feedback " * 500}
+
+        @test_app.get("/small")
+        async def small():
+            return {"ok": True}
+
+        client = TestClient(test_app)
+        headers = {"Accept-Encoding": "gzip"}
+        big_response = client.get("/big", headers=headers)
+        small_response = client.get("/small", headers=headers)
+
+        assert big_response.headers["content-encoding"] == "gzip"
+        assert big_response.json() == {"text": "feedback " * 500}
+        assert "content-encoding" not in small_response.headers
+
     def test_register_routers(self):
         """Test router registration"""
         test_app = create_app()
@@ -56,3 +110,80 @@ class TestAppCreation:
             200,
             500,
         ]  # 200 if template exists, 500 if error
+
+
+class TestRequestIdMiddleware:
+    """Test request ID propagation"""
+
+    def test_echoes_incoming_request_id(self):
+        """Test that a caller-supplied X-Request-ID is returned unchanged"""
+        client = TestClient(app)
+        response = client.get("/chat/welcome-message/default", headers={"X-Request-ID": "req-42"})
+        assert response.headers["x-request-id"] == "req-42"
+
+    def test_generates_request_id(self):
+        """Test that a request ID is generated when none is supplied"""
+        client = TestClient(app)
+        response = client.get("/chat/welcome-message/default")
+        assert len(response.headers["x-request-id"]) == 32
+
+
+class TestWarmup:
+    """Test startup warmup of the chat code paths"""
+
+    @pytest.mark.asyncio
+    async def test_warmup_runs_search(self):
+        """Test that warmup issues one search"""
+        mock_tutor = MagicMock()
+        mock_tutor.vector_store.search = AsyncMock(return_value=[])
+        test_app = create_app()
+        test_app.state.tutor_system = mock_tutor
+
+        await warmup(test_app)
+
+        mock_tutor.vector_store.search.assert_awaited_once_with("warmup", k=1)
+
+    @pytest.mark.asyncio
+    async def test_warmup_tolerates_failures(self):
+        """Test that a failing backend does not abort startup"""
+        mock_tutor = MagicMock()
+        mock_tutor.vector_store.search = AsyncMock(side_effect=RuntimeError("down"))
+
+        test_app = create_app()
+        test_app.state.tutor_system = mock_tutor
+
+        await warmup(test_app)
+
+
+    @pytest.mark.asyncio
+    async def test_warmup_preloads_lexers(self):
+        """Test that warmup imports the common Pygments lexers"""
+        test_app = create_app()
+        test_app.state.tutor_system = None
+
+        with patch("question_app.utils.preload_lexers") as preload:
+            await warmup(test_app)
+
+        preload.assert_called_once_with()
+
+class TestLifespan:
+    """Test resources managed by the application lifespan"""
+
+    def test_tutor_system_created_at_startup_and_closed(self):
+        """Test that the tutor system is built once on startup and closed on shutdown"""
+        mock_tutor = MagicMock()
+        mock_tutor.vector_store.search = AsyncMock(return_value=[])
+        mock_tutor.aclose = AsyncMock()
+
+        with patch("question_app.api.chat._tutor_system", None), patch(
+            "question_app.api.chat.get_vector_store_service"
+        ), patch(
+            "question_app.api.chat.HybridCrewAISocraticSystem", return_value=mock_tutor
+        ) as factory:
+            test_app = create_app()
+            with TestClient(test_app):
+                assert test_app.state.tutor_system is mock_tutor
+
+        factory.assert_called_once()
+        mock_tutor.aclose.assert_awaited_once()
+        assert test_app.state.tutor_system is None
@@ -4,6 +4,8 @@ Unit tests for core configuration
 import os
 from unittest.mock import patch
 
+import pytest
+
 from question_app.core.config import Config
 
 
@@ -77,3 +79,28 @@ class TestConfig:
         config = Config()
         result = config.validate_azure_openai_config()
         assert isinstance(result, bool)
+
+    def test_azure_openai_config_is_read_only(self):
+        """Test that the shared Azure OpenAI config mapping cannot be mutated"""
+        with patch.dict(
+            os.environ,
+            {"AZURE_OPENAI_DEPLOYMENT_ID": "gpt-4o", "AZURE_OPENAI_SUBSCRIPTION_KEY": "key"},
+        ):
+            config = Config()
+        assert config.azure_openai_config["deployment_name"] == "gpt-4o"
+        assert config.azure_openai_config["api_key"] == "key"
+        with pytest.raises(TypeError):
+            config.azure_openai_config["api_key"] = "other"  # type: ignore[index]
+
+    @pytest.mark.parametrize(
+        "host, expected",
+        [
+            ("http://ollama:11434", "http://ollama:11434"),
+            ("https://ollama.example.com", "https://ollama.example.com"),
+            ("ollama:11434", "http://ollama:11434"),
+        ],
+    )
+    def test_ollama_base_url_has_scheme(self, host, expected):
+        """Test that OLLAMA_BASE_URL adds http:// to a bare host"""
+        with patch.dict(os.environ, {"OLLAMA_HOST": host}):
+            assert Config().OLLAMA_BASE_URL == expected
@@ -0,0 +1,49 @@
+"""
+Unit tests for the shared HTTP client
+"""
+import asyncio
+
+import pytest
+
+from question_app.core import http
+from question_app.core.http import close_http_client, get_http_client
+
+
+class TestSharedHttpClient:
+    """Test the process-wide httpx.AsyncClient"""
+
+    @pytest.mark.asyncio
+    async def test_client_is_reused_within_a_loop(self):
+        """Test that repeated calls share one pooled client"""
+        client = get_http_client()
+        assert get_http_client() is client
+        await close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_close_releases_client(self):
+        """Test that closing the client makes the next call create a new one"""
+        client = get_http_client()
+        await close_http_client()
+        assert client.is_closed
+        new_client = get_http_client()
+        assert new_client is not client
+        await close_http_client()
+
+    def test_client_from_another_loop_is_closed_when_replaced(self):
+        """Test that a loop change closes the old client instead of leaking it"""
+
+        async def get_client():
+            return get_http_client()
+
+        async def replace_client():
+            client = get_http_client()
+            await asyncio.gather(*http._closing)
+            return client
+
+        old_client = asyncio.run(get_client())
+        new_client = asyncio.run(replace_client())
+
+        assert new_client is not old_client
+        assert old_client.is_closed
+        assert not new_client.is_closed
+        asyncio.run(close_http_client())
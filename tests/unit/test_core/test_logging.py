@@ -0,0 +1,70 @@
+"""
+Unit tests for core logging helpers
+"""
+import logging
+from unittest.mock import MagicMock, patch
+
+from question_app.core.logging import (
+    RequestIdFilter,
+    TokenBucket,
+    log_exception,
+    request_id_var,
+)
+
+
+class TestTokenBucket:
+    """Test the token bucket rate limiter"""
+
+    def test_burst_then_empty(self):
+        """Test that the bucket allows a burst and then refuses"""
+        with patch("question_app.core.logging.time.monotonic", return_value=100.0):
+            bucket = TokenBucket(rate=1, burst=3)
+            assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+
+    def test_refills_over_time(self):
+        """Test that tokens are replenished at the configured rate"""
+        with patch("question_app.core.logging.time.monotonic") as mock_time:
+            mock_time.return_value = 100.0
+            bucket = TokenBucket(rate=2, burst=1)
+            assert bucket.try_acquire() is True
+            assert bucket.try_acquire() is False
+            mock_time.return_value = 100.5
+            assert bucket.try_acquire() is True
+
+
+class TestLogException:
+    """Test rate-limited exception logging"""
+
+    def test_suppresses_traceback_when_bucket_empty(self):
+        """Test that tracebacks are only attached while tokens remain"""
+        logger = MagicMock(spec=logging.Logger)
+        bucket = TokenBucket(rate=0, burst=1)
+        error = ValueError("boom")
+
+        log_exception(logger, "Request failed", error, bucket)
+        log_exception(logger, "Request failed", error, bucket)
+
+        first, second = logger.error.call_args_list
+        assert first.kwargs["exc_info"] is error
+        assert "exc_info" not in second.kwargs
+        assert "traceback suppressed" in second.args[0]
+
+
+class TestRequestIdFilter:
+    """Test tagging log records with the current request ID"""
+
+    def test_copies_current_request_id(self):
+        """Test that the filter stamps the context's request ID on the record"""
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "msg", None, None)
+        token = request_id_var.set("abc123")
+        try:
+            assert RequestIdFilter().filter(record)
+        finally:
+            request_id_var.reset(token)
+        assert record.request_id == "abc123"
+
+    def test_default_outside_request(self):
+        """Test that records logged outside a request get a placeholder"""
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "msg", None, None)
+        RequestIdFilter().filter(record)
+        assert record.request_id == "-"
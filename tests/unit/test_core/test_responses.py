@@ -0,0 +1,65 @@
+"""
+Unit tests for core response classes
+"""
+import json
+from unittest.mock import MagicMock
+
+from question_app.core.responses import ORJSONResponse, etag_matches, make_etag
+
+
+class TestORJSONResponse:
+    """Test the orjson-backed JSON response"""
+
+    def test_renders_utf8_json(self):
+        """Test that content is rendered as compact UTF-8 JSON"""
+        response = ORJSONResponse({"message": "café", "count": 2})
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == {"message": "café", "count": 2}
+        assert "café".encode("utf-8") in response.body
+
+    def test_renders_non_string_keys(self):
+        """Test that integer keys are accepted like the stdlib encoder"""
+        response = ORJSONResponse({1: "a"})
+        assert json.loads(response.body) == {"1": "a"}
+
+    def test_json_routers_default_to_orjson(self):
+        """Test that every JSON router renders with orjson"""
+        from fastapi.responses import HTMLResponse
+
+        from question_app.api import (
+            canvas,
+            chat,
+            debug,
+            objectives,
+            questions,
+            system_prompt,
+            vector_store,
+        )
+
+        for module in (canvas, chat, debug, objectives, questions, system_prompt, vector_store):
+            for route in module.router.routes:
+                response_class = route.response_class
+                if hasattr(response_class, "value"):  # DefaultPlaceholder
+                    response_class = response_class.value
+                assert response_class in (ORJSONResponse, HTMLResponse), route.path
+
+
+class TestETags:
+    """Test the shared ETag helpers"""
+
+    def test_text_and_bytes_agree(self):
+        """Test that str and its UTF-8 bytes give the same quoted ETag"""
+        etag = make_etag("café")
+        assert etag == make_etag("café".encode("utf-8"))
+        assert etag.startswith('"') and etag.endswith('"')
+
+    def test_if_none_match_list_and_wildcard(self):
+        """Test matching against a list of ETags and against *"""
+        etag = make_etag("a")
+        request = MagicMock()
+        request.headers = {"if-none-match": f'"x", {etag}'}
+        assert etag_matches(request, etag)
+        request.headers = {"if-none-match": "*"}
+        assert etag_matches(request, etag)
+        request.headers = {}
+        assert not etag_matches(request, etag)
@@ -0,0 +1,111 @@
+"""
+Unit tests for core template configuration
+"""
+import os
+from unittest.mock import patch
+
+from question_app.core.templating import (
+    create_templates,
+    get_shared_templates,
+    load_template,
+    preload_templates,
+    render_template,
+    template_fingerprint,
+)
+
+
+class TestCreateTemplates:
+    """Test Jinja2 template environment configuration"""
+
+    def test_production_disables_auto_reload(self):
+        """Test that templates are compiled once outside debug mode"""
+        with patch("question_app.core.templating.config.DEBUG", False):
+            templates = create_templates("templates")
+        assert templates.env.auto_reload is False
+        assert templates.env.bytecode_cache is not None
+
+    def test_debug_keeps_auto_reload(self):
+        """Test that debug mode still picks up template edits"""
+        with patch("question_app.core.templating.config.DEBUG", True):
+            templates = create_templates("templates")
+        assert templates.env.auto_reload is True
+        assert templates.env.bytecode_cache is None
+
+    def test_production_uses_configured_bytecode_dir(self, tmp_path):
+        """Test that compiled bytecode goes to TEMPLATE_CACHE_DIR when set"""
+        cache_dir = tmp_path / "j2cache"
+        with patch("question_app.core.templating.config.DEBUG", False), patch(
+            "question_app.core.templating.config.TEMPLATE_CACHE_DIR", str(cache_dir)
+        ):
+            templates = create_templates("templates")
+            templates.get_template("chat.html")
+
+        assert templates.env.cache.capacity == 400
+        assert any(cache_dir.iterdir())
+
+
+class TestSharedTemplates:
+    """Test the process-wide template instance"""
+
+    def test_shared_instance_is_reused(self):
+        """Test that every caller gets the same environment"""
+        assert get_shared_templates("templates") is get_shared_templates("templates")
+
+    def test_shared_instance_is_precompiled(self):
+        """Test that templates are compiled before the first render"""
+        templates = get_shared_templates("templates")
+        with patch.object(
+            templates.env.loader, "load", side_effect=AssertionError("recompiled")
+        ):
+            templates.get_template("chat.html")
+
+    def test_preload_skips_broken_templates(self, tmp_path):
+        """Test that a template with a syntax error does not abort the preload"""
+        (tmp_path / "good.html").write_text("<p>{{ name }}</p>")
+        (tmp_path / "bad.html").write_text("{% if %}")
+
+        assert preload_templates(create_templates(str(tmp_path))) == 1
+
+
+class TestRenderTemplate:
+    """Test rendering module-level templates without TemplateResponse"""
+
+    def test_renders_loaded_template_with_headers(self, tmp_path):
+        """Test that a preloaded template renders to an HTMLResponse"""
+        (tmp_path / "page.html").write_text("<p>{{ name }}</p>")
+        with patch("question_app.core.templating.config.DEBUG", False):
+            templates = create_templates(str(tmp_path))
+            template = load_template(templates, "page.html")
+
+        response = render_template(templates, template, {"name": "Ada"}, headers={"ETag": '"1"'})
+
+        assert response.body == b"<p>Ada</p>"
+        assert response.headers["etag"] == '"1"'
+        assert response.media_type == "text/html"
+
+    def test_debug_looks_template_up_per_render(self, tmp_path):
+        """Test that debug mode re-reads edited templates"""
+        page = tmp_path / "page.html"
+        page.write_text("old")
+        with patch("question_app.core.templating.config.DEBUG", True):
+            templates = create_templates(str(tmp_path))
+            template = load_template(templates, "page.html")
+            assert render_template(templates, template, {}).body == b"old"
+            page.write_text("new!")
+            assert render_template(templates, template, {}).body == b"new!"
+
+    def test_fingerprint_follows_template_source(self, tmp_path):
+        """Test that editing a template changes its fingerprint"""
+        page = tmp_path / "page.html"
+        page.write_text("<script>v1</script>")
+        with patch("question_app.core.templating.config.DEBUG", False):
+            templates = create_templates(str(tmp_path))
+            template = load_template(templates, "page.html")
+
+        first = template_fingerprint(templates, template)
+        assert template_fingerprint(templates, template) == first
+
+        page.write_text("<script>v2</script>")
+        stat = page.stat()
+        os.utime(page, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert template_fingerprint(templates, template) != first
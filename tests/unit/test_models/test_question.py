@@ -0,0 +1,32 @@
+"""
+Unit tests for question models
+"""
+import pytest
+from pydantic import ValidationError
+
+from question_app.models import NewQuestion
+
+
+class TestNewQuestion:
+    """Test validation of new questions"""
+
+    def test_valid_question(self):
+        """Test that a question with text and one answer is accepted"""
+        question = NewQuestion(
+            question_text="What is alt text?",
+            answers=[{"text": ""}, {"text": "A description", "is_correct": True}],
+        )
+        assert len(question.answers) == 2
+
+    @pytest.mark.parametrize(
+        "payload, message",
+        [
+            ({"question_text": "  ", "answers": [{"text": "A"}]}, "Question text is required"),
+            ({"question_text": "Q?", "answers": []}, "At least one answer must have text"),
+            ({"question_text": "Q?", "answers": [{"text": " "}]}, "At least one answer must have text"),
+        ],
+    )
+    def test_blank_input_is_rejected(self, payload, message):
+        """Test that blank questions and answer lists fail validation"""
+        with pytest.raises(ValidationError, match=message):
+            NewQuestion(**payload)
@@ -0,0 +1,288 @@
+"""
+Unit tests for the SQLite database manager
+"""
+import sqlite3
+import uuid
+from unittest.mock import patch
+
+from question_app.models import QuestionUpdate
+from question_app.services.database import (
+    MMAP_SIZE,
+    DatabaseManager,
+    get_database_manager,
+    new_ids,
+)
+
+
+class TestDatabaseManager:
+    """Test database setup and targeted updates"""
+
+    def test_database_uses_wal_journal(self, tmp_path):
+        """Test that the database file is switched to WAL mode on init"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_increment_total_sessions(self, tmp_path):
+        """Test that the session counter is bumped in place"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO student_profiles (id, name, total_sessions) VALUES (?, ?, ?)",
+                ("s1", "Student", 2),
+            )
+            conn.commit()
+
+        assert db.increment_total_sessions("s1") is True
+        assert db.increment_total_sessions("missing") is False
+        with db.get_connection() as conn:
+            row = conn.execute(
+                "SELECT total_sessions FROM student_profiles WHERE id = ?", ("s1",)
+            ).fetchone()
+        assert row["total_sessions"] == 3
+
+    def test_shared_manager_per_path(self, tmp_path):
+        """Test that each database file gets a single shared manager"""
+        first = get_database_manager(str(tmp_path / "a.db"))
+        assert get_database_manager(str(tmp_path / "a.db")) is first
+        assert get_database_manager(str(tmp_path / "b.db")) is not first
+
+    def test_connection_pragmas(self, tmp_path):
+        """Test that connections relax fsync under WAL and use memory for temp data"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            # 1 == NORMAL
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+            # 2 == MEMORY
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+            assert conn.execute("PRAGMA mmap_size").fetchone()[0] == MMAP_SIZE
+
+    def test_answer_lookups_use_an_index(self, tmp_path):
+        """Test that the unapproved-answers query searches an index, not the table"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            plan = " ".join(
+                row["detail"]
+                for row in conn.execute(
+                    "EXPLAIN QUERY PLAN SELECT id FROM answer "
+                    "WHERE question_id = ? AND feedback_approved = 0",
+                    ("q1",),
+                )
+            )
+        assert "idx_answer_question" in plan
+
+    def test_connections_are_pooled(self, tmp_path):
+        """Test that a released connection is reused with fresh per-call settings"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as first:
+            assert first.row_factory is sqlite3.Row
+        with db.get_connection(use_row_factory=False) as second:
+            assert second is first
+            assert second.row_factory is None
+        with db.transaction():
+            pass
+        with db.get_connection() as third:
+            assert third is first
+            assert third.isolation_level == ""
+
+    def test_uncommitted_work_is_rolled_back_on_release(self, tmp_path):
+        """Test that a pooled connection does not carry an open transaction"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO question (id, question_text) VALUES ('q1', 'Q1')")
+        with db.get_connection() as conn:
+            assert not conn.in_transaction
+            assert conn.execute("SELECT COUNT(*) FROM question").fetchone()[0] == 0
+
+    def test_concurrent_borrowers_get_separate_connections(self, tmp_path):
+        """Test that the pool never hands one connection to two callers"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as outer, db.get_connection() as inner:
+            assert outer is not inner
+        db.close()
+        with db.get_connection() as conn:
+            assert conn is not outer and conn is not inner
+
+    def test_create_question_from_ai_inserts_all_answers(self, tmp_path):
+        """Test that generated answers are batch-inserted with the question"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO learning_objective (id, text) VALUES (?, ?)", ("o1", "Objective")
+            )
+            conn.commit()
+
+        question_id = db.create_question_from_ai(
+            {
+                "question_text": "Q?",
+                "answers": [
+                    {"text": "A", "is_correct": True},
+                    {"text": "B", "is_correct": False},
+                    {"text": "C", "is_correct": False},
+                ],
+            },
+            "o1",
+        )
+
+        answers = db.get_answers_for_questions(question_id)
+        assert sorted(a["text"] for a in answers) == ["A", "B", "C"]
+
+    def test_html_is_rendered_on_write(self, tmp_path):
+        """Test that question and answer HTML is stored when they are saved"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            conn.execute(
+                "INSERT INTO learning_objective (id, text) VALUES (?, ?)", ("o1", "Objective")
+            )
+            conn.commit()
+        question_id = db.create_question_from_ai(
+            {"question_text": "Q?", "answers": [{"text": "*A*", "is_correct": True}]}, "o1"
+        )
+        answer_id = db.get_answers_for_questions(question_id)[0]["id"]
+
+        db.update_question_and_answers(
+            question_id,
+            QuestionUpdate(
+                question_text="**Q2**",
+                answers=[
+                    {"id": answer_id, "text": "`B`", "is_correct": True, "feedback_approved": False}
+                ],
+                objective_ids=["o1"],
+            ),
+        )
+
+        with db.get_connection() as conn:
+            question = conn.execute("SELECT * FROM question").fetchone()
+            answer = conn.execute("SELECT * FROM answer").fetchone()
+        assert question["question_text_html"] == "<p><strong>Q2</strong></p>"
+        assert answer["text_html"] == "<p><code>B</code></p>"
+
+    def test_legacy_rows_are_upgraded_and_backfilled(self, tmp_path):
+        """Test that databases without the HTML columns are migrated and filled on startup"""
+        path = str(tmp_path / "tutor.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(
+            """
+            CREATE TABLE question (id TEXT PRIMARY KEY, question_text TEXT NOT NULL, created_at TEXT);
+            CREATE TABLE answer (
+                id TEXT PRIMARY KEY, question_id TEXT NOT NULL, text TEXT NOT NULL,
+                is_correct BOOLEAN NOT NULL DEFAULT 0, feedback_text TEXT,
+                feedback_approved BOOLEAN NOT NULL DEFAULT 0
+            );
+            INSERT INTO question (id, question_text) VALUES ('q1', '*Q*');
+            INSERT INTO answer (id, question_id, text) VALUES ('a1', 'q1', 'A');
+            """
+        )
+        conn.close()
+
+        db = DatabaseManager(path)
+
+        with db.get_connection() as conn:
+            assert conn.execute("SELECT question_text_html FROM question").fetchone()[0] == "<p><em>Q</em></p>"
+            assert conn.execute("SELECT text_html FROM answer").fetchone()[0] == "<p>A</p>"
+        details = db.load_question_details("q1")
+        assert details["question_text_html"] == "<p><em>Q</em></p>"
+        assert details["answers"][0]["text_html"] == "<p>A</p>"
+
+    def test_update_answers_feedback(self, tmp_path):
+        """Test that feedback for several answers is written in one transaction"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            conn.execute("INSERT INTO question (id, question_text) VALUES ('q1', 'Q')")
+            conn.executemany(
+                "INSERT INTO answer (id, question_id, text) VALUES (?, 'q1', ?)",
+                [("a1", "A"), ("a2", "B")],
+            )
+            conn.commit()
+
+        with patch.object(db, "transaction", wraps=db.transaction) as transaction:
+            assert db.update_answers_feedback([("a1", "Good"), ("a2", "Bad")]) is True
+        transaction.assert_called_once_with()
+        assert {a["id"]: a["feedback_text"] for a in db.get_answers_for_questions("q1")} == {
+            "a1": "Good",
+            "a2": "Bad",
+        }
+
+    def test_load_unapproved_answers(self, tmp_path):
+        """Test the slim feedback query, including questions with nothing to do"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        with db.get_connection() as conn:
+            conn.executemany(
+                "INSERT INTO question (id, question_text) VALUES (?, ?)",
+                [("q1", "Q1"), ("q2", "Q2")],
+            )
+            conn.executemany(
+                "INSERT INTO answer (id, question_id, text, is_correct, feedback_approved) VALUES (?, ?, ?, ?, ?)",
+                [("a1", "q1", "A", 1, 0), ("a2", "q1", "B", 0, 1), ("a3", "q2", "C", 0, 1)],
+            )
+            conn.commit()
+
+        assert db.load_unapproved_answers("q1") == (
+            "Q1", [{"id": "a1", "text": "A", "is_correct": True}]
+        )
+        assert db.load_unapproved_answers("q2") == ("Q2", [])
+        assert db.load_unapproved_answers("missing") is None
+
+    def test_transaction_commits_or_rolls_back(self, tmp_path):
+        """Test that the explicit transaction is all-or-nothing"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+
+        with db.transaction() as conn:
+            assert conn.in_transaction
+            conn.execute("INSERT INTO question (id, question_text) VALUES ('q1', 'Q1')")
+        try:
+            with db.transaction() as conn:
+                conn.execute("INSERT INTO question (id, question_text) VALUES ('q2', 'Q2')")
+                conn.execute("INSERT INTO question (id, question_text) VALUES ('q1', 'dup')")
+        except sqlite3.IntegrityError:
+            pass
+
+        with db.get_connection() as conn:
+            ids = [row["id"] for row in conn.execute("SELECT id FROM question")]
+        assert ids == ["q1"]
+
+
+    def test_objectives_list_is_cached_until_changed(self, tmp_path):
+        """Test that the dropdown list is reused and refreshed on writes"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        created = db.create_objective("Alpha", "understand", "high")
+        assert [o["text"] for o in db.list_all_objectives()] == ["Alpha"]
+
+        # A direct write is not seen while the cached list is fresh
+        with db.get_connection() as conn:
+            conn.execute("UPDATE learning_objective SET text = 'Hidden'")
+            conn.commit()
+        assert [o["text"] for o in db.list_all_objectives()] == ["Alpha"]
+
+        db.update_objective(created["id"], "Beta", "apply", "low")
+        assert [o["text"] for o in db.list_all_objectives()] == ["Beta"]
+        db.create_objective("Alpha", "understand", "high")
+        assert [o["text"] for o in db.list_all_objectives()] == ["Alpha", "Beta"]
+        db.delete_objective(created["id"])
+        assert [o["text"] for o in db.list_all_objectives()] == ["Alpha"]
+
+    def test_objectives_cache_expires(self, tmp_path, monkeypatch):
+        """Test that the cached list is re-read once its TTL has passed"""
+        db = DatabaseManager(str(tmp_path / "tutor.db"))
+        db.create_objective("Alpha", "understand", "high")
+        db.list_all_objectives()
+        with db.get_connection() as conn:
+            conn.execute("UPDATE learning_objective SET text = 'Beta'")
+            conn.commit()
+
+        monkeypatch.setattr(
+            "question_app.services.database.OBJECTIVES_CACHE_TTL", 0.0
+        )
+        db.invalidate_objectives_cache()
+        db.list_all_objectives()
+        with db.get_connection() as conn:
+            conn.execute("UPDATE learning_objective SET text = 'Gamma'")
+            conn.commit()
+        assert [o["text"] for o in db.list_all_objectives()] == ["Gamma"]
+
+def test_new_ids_are_unique_uuid4_hex():
+    """Test that batched ids are distinct version 4 UUIDs in hex form"""
+    ids = new_ids(5)
+    assert len(set(ids)) == 5
+    assert all(len(i) == 32 and uuid.UUID(hex=i).version == 4 for i in ids)
+    assert new_ids(0) == []
@@ -0,0 +1,251 @@
+"""
+Unit tests for the embedding service
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import orjson
+import pytest
+from tenacity import wait_none
+
+from question_app.services import embeddings
+from question_app.services.embeddings import (
+    EmbeddingBatcher,
+    get_embedding_dim,
+    get_ollama_embeddings,
+    load_embedding_dim,
+    record_embedding_dim,
+)
+
+
+def _response(status_code, payload):
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = orjson.dumps(payload)
+    return response
+
+
+class TestGetOllamaEmbeddings:
+    """Test the Ollama embedding helper"""
+
+    @pytest.mark.asyncio
+    async def test_uses_batch_endpoint(self):
+        """Test that all texts are embedded in one /api/embed request"""
+        mock_post = AsyncMock(
+            return_value=_response(200, {"embeddings": [[0.1], [0.2]]})
+        )
+
+        with patch("httpx.AsyncClient.post", mock_post):
+            result = await get_ollama_embeddings(["a", " ", "b"])
+
+        assert result[0] == [0.1]
+        assert result[1] == [0.0] * 768
+        assert result[2] == [0.2]
+        mock_post.assert_awaited_once()
+        assert mock_post.await_args.args[0].endswith("/api/embed")
+        assert orjson.loads(mock_post.await_args.kwargs["content"])["input"] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_objective_suggestions_use_one_batch_request(self):
+        """Test that the AI service embeds a question and its objectives together"""
+        from question_app.services.ai_service import AIGeneratorService
+
+        service = AIGeneratorService.__new__(AIGeneratorService)
+        service.db = MagicMock()
+        service.db.list_all_objectives.return_value = [
+            {"id": "o1", "text": "Alt text"},
+            {"id": "o2", "text": "Contrast"},
+        ]
+        mock_post = AsyncMock(
+            return_value=_response(200, {"embeddings": [[1.0, 0.0], [1.0, 0.0], [0.0, 1.0]]})
+        )
+
+        with patch("httpx.AsyncClient.post", mock_post):
+            suggestions = await service.suggest_objectives_for_question("Question")
+
+        mock_post.assert_awaited_once()
+        assert mock_post.await_args.args[0].endswith("/api/embed")
+        assert {s["id"]: s["score"] for s in suggestions} == {"o1": 100.0, "o2": 0.0}
+
+    @pytest.mark.asyncio
+    async def test_empty_texts_log_one_warning(self, caplog):
+        """Test that skipped empty texts are reported in a single warning"""
+        mock_post = AsyncMock(return_value=_response(200, {"embeddings": [[0.1]]}))
+
+        with patch("httpx.AsyncClient.post", mock_post), caplog.at_level(
+            "WARNING", logger=embeddings.logger.name
+        ):
+            await get_ollama_embeddings(["", "a", " "])
+
+        warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+        assert len(warnings) == 1
+        assert warnings[0].getMessage() == "Skipped 2 empty texts"
+
+    @pytest.mark.asyncio
+    async def test_large_inputs_are_split_into_chunks(self):
+        """Test that inputs larger than EMBED_BATCH_SIZE use several requests"""
+
+        async def fake_post(url, content, headers):
+            texts = orjson.loads(content)["input"]
+            return _response(200, {"embeddings": [[float(t)] for t in texts]})
+
+        mock_post = AsyncMock(side_effect=fake_post)
+        texts = [str(i) for i in range(5)]
+
+        with patch("httpx.AsyncClient.post", mock_post), patch(
+            "question_app.services.embeddings.EMBED_BATCH_SIZE", 2
+        ):
+            result = await get_ollama_embeddings(texts)
+
+        assert result == [[float(i)] for i in range(5)]
+        assert mock_post.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried(self):
+        """Test that timeouts and 5xx responses are retried"""
+        failed = _response(503, {})
+        failed.raise_for_status.side_effect = httpx.HTTPStatusError(
+            "unavailable", request=MagicMock(), response=failed
+        )
+        mock_post = AsyncMock(
+            side_effect=[
+                httpx.ReadTimeout("slow"),
+                failed,
+                _response(200, {"embeddings": [[0.1]]}),
+            ]
+        )
+
+        with patch("httpx.AsyncClient.post", mock_post), patch.object(
+            embeddings._post_json.retry, "wait", wait_none()
+        ):
+            result = await get_ollama_embeddings(["a"])
+
+        assert result == [[0.1]]
+        assert mock_post.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        """Test that a 4xx response (e.g. unknown model) is not retried"""
+        bad_request = _response(400, {})
+        bad_request.raise_for_status.side_effect = httpx.HTTPStatusError(
+            "bad request", request=MagicMock(), response=bad_request
+        )
+        mock_post = AsyncMock(return_value=bad_request)
+
+        with patch("httpx.AsyncClient.post", mock_post):
+            result = await get_ollama_embeddings(["a"])
+
+        assert result == [[0.0] * 768]
+        mock_post.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_legacy_endpoint_on_404(self):
+        """Test that older Ollama servers are embedded one text at a time"""
+        mock_post = AsyncMock(
+            side_effect=[
+                _response(404, {}),
+                _response(200, {"embedding": [0.1]}),
+                _response(200, {"embedding": [0.2]}),
+            ]
+        )
+
+        with patch("httpx.AsyncClient.post", mock_post):
+            result = await get_ollama_embeddings(["a", "b"])
+
+        assert result == [[0.1], [0.2]]
+        assert mock_post.await_args.args[0].endswith("/api/embeddings")
+
+
+class TestEmbeddingBatcher:
+    """Test the asyncio embedding micro-batcher"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_call(self):
+        """Test that requests arriving together are embedded in one batch"""
+        batcher = EmbeddingBatcher(max_wait=0.05)
+        mock_embed = AsyncMock(side_effect=lambda texts: [[float(len(t))] for t in texts])
+
+        with patch("question_app.services.embeddings.get_ollama_embeddings", mock_embed):
+            results = await asyncio.gather(
+                batcher.embed("a"), batcher.embed("bb"), batcher.embed("ccc")
+            )
+            await batcher.stop()
+
+        assert results == [[1.0], [2.0], [3.0]]
+        mock_embed.assert_awaited_once_with(["a", "bb", "ccc"])
+
+    @pytest.mark.asyncio
+    async def test_batch_size_is_capped(self):
+        """Test that batches never exceed max_batch_size"""
+        batcher = EmbeddingBatcher(max_batch_size=2, max_wait=0.05)
+        mock_embed = AsyncMock(side_effect=lambda texts: [[0.0] for _ in texts])
+
+        with patch("question_app.services.embeddings.get_ollama_embeddings", mock_embed):
+            await asyncio.gather(*(batcher.embed(str(i)) for i in range(5)))
+            await batcher.stop()
+
+        assert all(len(call.args[0]) <= 2 for call in mock_embed.await_args_list)
+        assert sum(len(call.args[0]) for call in mock_embed.await_args_list) == 5
+
+    @pytest.mark.asyncio
+    async def test_backend_error_propagates_to_callers(self):
+        """Test that a failed batch raises in every waiting caller"""
+        batcher = EmbeddingBatcher(max_wait=0.01)
+        mock_embed = AsyncMock(side_effect=RuntimeError("backend down"))
+
+        with patch("question_app.services.embeddings.get_ollama_embeddings", mock_embed):
+            with pytest.raises(RuntimeError, match="backend down"):
+                await batcher.embed("query")
+            await batcher.stop()
+
+    @pytest.mark.asyncio
+    async def test_stop_fails_batch_waiting_for_a_slot(self):
+        """Test that a collected batch blocked on the semaphore is failed on stop"""
+        batcher = EmbeddingBatcher(max_wait=0.01, max_concurrent_requests=1)
+        await batcher.start()
+        await batcher._semaphore.acquire()  # Occupy the only backend slot
+
+        pending = asyncio.create_task(batcher.embed("query"))
+        await asyncio.sleep(0.05)
+        assert batcher._queue.empty() and not pending.done()
+
+        await batcher.stop()
+
+        with pytest.raises(RuntimeError, match="Embedding batcher stopped"):
+            await asyncio.wait_for(pending, timeout=1)
+
+
+class TestEmbeddingDim:
+    """Test the persisted embedding dimension"""
+
+    @pytest.fixture(autouse=True)
+    def meta_path(self, tmp_path):
+        path = tmp_path / "embedding_meta.json"
+        with patch.object(embeddings.config, "EMBEDDING_META_PATH", str(path)), patch.object(
+            embeddings, "_embedding_meta", None
+        ):
+            yield path
+
+    def test_record_skips_zero_vectors(self, meta_path):
+        """Test that failed (all-zero) embeddings are not recorded"""
+        record_embedding_dim([[0.0, 0.0, 0.0], [0.1, 0.2]])
+        assert load_embedding_dim() == 2
+        assert '"dim": 2' in meta_path.read_text()
+
+    def test_model_change_invalidates_dim(self, meta_path):
+        """Test that a dimension recorded for another model is ignored"""
+        meta_path.write_text('{"model": "other-model", "dim": 1024}')
+        assert load_embedding_dim() is None
+
+    @pytest.mark.asyncio
+    async def test_get_probes_once_then_reads_file(self, meta_path):
+        """Test that Ollama is only probed when no dimension is recorded"""
+        mock_embed = AsyncMock(return_value=[[0.1, 0.2, 0.3]])
+
+        with patch("question_app.services.embeddings.get_ollama_embeddings", mock_embed):
+            assert await get_embedding_dim() == 3
+            embeddings._embedding_meta = None  # simulate a restart
+            assert await get_embedding_dim() == 3
+
+        mock_embed.assert_awaited_once()
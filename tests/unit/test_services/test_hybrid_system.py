@@ -0,0 +1,171 @@
+"""
+Unit tests for the hybrid Socratic tutor system
+"""
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from question_app.services.tutor.hybrid_system import (
+    HybridCrewAISocraticSystem,
+    iterate_in_thread,
+)
+
+
+@pytest.fixture
+def system():
+    """A tutor system with its agents and storage replaced by mocks"""
+    system = HybridCrewAISocraticSystem.__new__(HybridCrewAISocraticSystem)
+    system._start_session = MagicMock(return_value=(MagicMock(), []))
+    system._finish_session = MagicMock(return_value={"session_number": 1})
+    system.session_orchestrator = MagicMock()
+    system.session_orchestrator.orchestrate_response_stream.return_value = iter(["Hi", "!"])
+    system._run_triage = AsyncMock(
+        return_value={
+            "intent": "conceptual_question",
+            "analysis": {},
+            "progress": {},
+            "rag_context": "ctx",
+            "sources": [{"question_id": "1", "chunk_type": "question", "similarity": 0.9}],
+            "questions": "",
+            "final_response": None,
+        }
+    )
+    return system
+
+
+class TestConductSocraticSessionStream:
+    """Test the streamed tutor session events"""
+
+    @pytest.mark.asyncio
+    async def test_retrieval_event_precedes_deltas(self, system):
+        """Test that retrieval metadata is sent before any reply text"""
+        events = [
+            event async for event in system.conduct_socratic_session_stream("s1", "What is alt text?")
+        ]
+
+        assert events[0] == {
+            "retrieval": {
+                "intent": "conceptual_question",
+                "sources": [{"question_id": "1", "chunk_type": "question", "similarity": 0.9}],
+            }
+        }
+        assert events[1:3] == [{"delta": "Hi"}, {"delta": "!"}]
+        assert events[-1] == {"session_metadata": {"session_number": 1}}
+        system._finish_session.assert_called_once()
+        assert system._finish_session.call_args.args[-1] == "Hi!"
+
+
+    @pytest.mark.asyncio
+    async def test_retrieval_event_is_sent_before_agents_finish(self, system):
+        """Test that sources are streamed while the analysis agents still run"""
+        release = threading.Event()
+        analyzed = []
+
+        def analyze_response(*args, **kwargs):
+            release.wait(5)
+            analyzed.append(True)
+            return {}
+
+        system.coordinator_agent = MagicMock()
+        system.coordinator_agent.decide_intent.return_value = "conceptual_question"
+        system._retrieve = AsyncMock(return_value=("ctx", [{"question_id": "1"}]))
+        system.response_analyst = MagicMock()
+        system.response_analyst.analyze_response.side_effect = analyze_response
+        system.progress_tracker = MagicMock()
+        system.question_generator = MagicMock()
+        del system._run_triage  # Use the real triage workflow
+
+        stream = system.conduct_socratic_session_stream("s1", "What is alt text?")
+        try:
+            first = await asyncio.wait_for(stream.__anext__(), timeout=2)
+            assert first == {
+                "retrieval": {"intent": "conceptual_question", "sources": [{"question_id": "1"}]}
+            }
+            assert not analyzed
+        finally:
+            release.set()
+        events = [event async for event in stream]
+
+        assert events[-1] == {"session_metadata": {"session_number": 1}}
+
+
+class TestRetrieve:
+    """Test context retrieval and source summaries"""
+
+    @pytest.mark.asyncio
+    async def test_low_similarity_chunks_are_dropped(self, system):
+        """Test that only chunks above the similarity floor are used"""
+        system.vector_store = MagicMock()
+        system.vector_store.search = AsyncMock(
+            return_value=[
+                {"content": "good", "distance": 0.1, "question_id": "1", "chunk_type": "question"},
+                {"content": "bad", "distance": 0.99, "question_id": "2", "chunk_type": "answer"},
+            ]
+        )
+
+        context, sources = await system._retrieve("alt text")
+
+        assert context == "good"
+        assert sources == [{"question_id": "1", "chunk_type": "question", "similarity": 0.9}]
+
+
+class TestRunTriage:
+    """Test the triage workflow that runs before the final response"""
+
+    @pytest.fixture
+    def triage_system(self):
+        system = HybridCrewAISocraticSystem.__new__(HybridCrewAISocraticSystem)
+        system.coordinator_agent = MagicMock()
+        system.response_analyst = MagicMock()
+        system.progress_tracker = MagicMock()
+        system.question_generator = MagicMock()
+        system._retrieve = AsyncMock(return_value=("ctx", [{"question_id": "1"}]))
+        return system
+
+    @pytest.mark.asyncio
+    async def test_retrieval_overlaps_intent_classification(self, triage_system):
+        """Test that conceptual questions use the search started before classification"""
+        triage_system.coordinator_agent.decide_intent.return_value = "conceptual_question"
+
+        triage = await triage_system._run_triage(MagicMock(), "What is alt text?", [])
+
+        assert triage["rag_context"] == "ctx"
+        assert triage["sources"] == [{"question_id": "1"}]
+        triage_system._retrieve.assert_awaited_once_with("What is alt text?")
+        triage_system.response_analyst.analyze_response.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_off_topic_skips_retrieved_context(self, triage_system):
+        """Test that off-topic messages ignore the speculative search"""
+        triage_system.coordinator_agent.decide_intent.return_value = "off_topic"
+
+        triage = await triage_system._run_triage(MagicMock(), "Best pizza?", [])
+
+        assert triage["rag_context"] == ""
+        assert triage["final_response"] is not None
+        triage_system.response_analyst.analyze_response.assert_not_called()
+
+
+class TestIterateInThread:
+    """Test driving a blocking iterator from the event loop"""
+
+    @pytest.mark.asyncio
+    async def test_yields_items_in_order(self):
+        """Test that every item arrives in order"""
+        assert [item async for item in iterate_in_thread(iter(range(5)))] == list(range(5))
+
+    @pytest.mark.asyncio
+    async def test_reraises_iterator_errors(self):
+        """Test that an error in the iterator reaches the consumer"""
+
+        def failing():
+            yield "a"
+            raise RuntimeError("stream broke")
+
+        received = []
+        with pytest.raises(RuntimeError, match="stream broke"):
+            async for item in iterate_in_thread(failing()):
+                received.append(item)
+        assert received == ["a"]
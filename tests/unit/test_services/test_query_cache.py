@@ -0,0 +1,56 @@
+"""
+Unit tests for the semantic query cache
+"""
+from unittest.mock import patch
+
+from question_app.services.query_cache import SemanticQueryCache
+
+
+class TestSemanticQueryCache:
+    """Test exact and near-duplicate lookups"""
+
+    def test_exact_hit_returns_copy(self):
+        """Test that an identical query returns the cached results"""
+        cache = SemanticQueryCache()
+        cache.put("what is alt text", 3, [1.0, 0.0], [{"content": "a"}])
+
+        hit = cache.get_exact("what is alt text", 3)
+        assert hit == [{"content": "a"}]
+        hit[0]["content"] = "changed"
+        assert cache.get_exact("what is alt text", 3) == [{"content": "a"}]
+        assert cache.get_exact("what is alt text", 5) is None
+
+    def test_similar_hit_above_threshold(self):
+        """Test that a near-identical embedding reuses cached results"""
+        cache = SemanticQueryCache(similarity_threshold=0.97)
+        cache.put("what is alt text", 3, [1.0, 0.0], [{"content": "a"}])
+
+        assert cache.get_similar([0.99, 0.05], 3) == [{"content": "a"}]
+        assert cache.get_similar([0.5, 0.5], 3) is None
+
+    def test_zero_embeddings_are_not_cached(self):
+        """Test that failed (all-zero) embeddings never produce hits"""
+        cache = SemanticQueryCache()
+        cache.put("q", 3, [0.0, 0.0], [{"content": "a"}])
+
+        assert cache.get_exact("q", 3) is None
+        assert cache.get_similar([0.0, 0.0], 3) is None
+
+    def test_evicts_least_recently_used(self):
+        """Test that the cache is bounded by max_entries"""
+        cache = SemanticQueryCache(max_entries=2)
+        cache.put("a", 3, [1.0, 0.0], [])
+        cache.put("b", 3, [0.0, 1.0], [])
+        cache.get_exact("a", 3)
+        cache.put("c", 3, [1.0, 1.0], [])
+
+        assert cache.get_exact("a", 3) == []
+        assert cache.get_exact("b", 3) is None
+
+    def test_entries_expire(self):
+        """Test that entries older than the TTL are dropped"""
+        cache = SemanticQueryCache(ttl=10)
+        with patch("question_app.services.query_cache.time.monotonic", return_value=0.0):
+            cache.put("a", 3, [1.0, 0.0], [])
+        with patch("question_app.services.query_cache.time.monotonic", return_value=11.0):
+            assert cache.get_exact("a", 3) is None
@@ -0,0 +1,245 @@
+"""
+Unit tests for the ChromaDB vector store service
+"""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from question_app.api.vector_store import (
+    ChromaVectorStoreService,
+    ChunkQuestion,
+    create_comprehensive_chunks,
+    summarize_chunks,
+)
+
+
+@pytest.fixture
+def service():
+    """A service instance that does not connect to a Chroma server"""
+    service = ChromaVectorStoreService.__new__(ChromaVectorStoreService)
+    service.client = MagicMock()
+    service.collection_name = "quiz_questions"
+    service._collection = None
+    return service
+
+
+def _docs(n):
+    return (
+        [f"doc {i}" for i in range(n)],
+        [[float(i)] for i in range(n)],
+        [{"i": i} for i in range(n)],
+        [f"id{i}" for i in range(n)],
+    )
+
+
+class TestAddInBatches:
+    """Test batched inserts into a collection"""
+
+    def test_adds_in_configured_batch_size(self, service):
+        """Test that documents are split into CHROMA_BATCH_SIZE batches"""
+        collection = MagicMock()
+
+        with patch("question_app.api.vector_store.config.CHROMA_BATCH_SIZE", 2):
+            service._add_in_batches(collection, *_docs(5))
+
+        sizes = [len(call.kwargs["ids"]) for call in collection.add.call_args_list]
+        assert sizes == [2, 2, 1]
+
+    def test_failed_batch_is_retried_at_half_size(self, service):
+        """Test that a failing batch is re-sent as two smaller batches"""
+        collection = MagicMock()
+        collection.add.side_effect = [RuntimeError("too big"), None, None]
+
+        with patch("question_app.api.vector_store.config.CHROMA_BATCH_SIZE", 4):
+            service._add_in_batches(collection, *_docs(4))
+
+        ids = [call.kwargs["ids"] for call in collection.add.call_args_list]
+        assert ids[1:] == [["id0", "id1"], ["id2", "id3"]]
+
+
+class TestEmbedAndAdd:
+    """Test the embed -> insert pipeline used to build the vector store"""
+
+    @pytest.fixture(autouse=True)
+    def no_embedding_meta(self):
+        with patch("question_app.api.vector_store.record_embedding_dim"):
+            yield
+
+    @pytest.mark.asyncio
+    async def test_every_document_is_embedded_and_added(self, service):
+        """Test that documents flow through the pipeline in order"""
+        documents, _, metadatas, ids = _docs(5)
+        collection = MagicMock()
+        mock_embed = AsyncMock(side_effect=lambda texts: [[0.5] for _ in texts])
+
+        with patch("question_app.api.vector_store.get_ollama_embeddings", mock_embed), patch(
+            "question_app.api.vector_store.EMBED_BATCH_SIZE", 1
+        ), patch("question_app.api.vector_store.config.OLLAMA_CONCURRENCY", 2):
+            await service._embed_and_add(collection, documents, metadatas, ids)
+
+        assert mock_embed.await_count == 3
+        added = [i for call in collection.add.call_args_list for i in call.kwargs["ids"]]
+        assert added == ids
+
+    @pytest.mark.asyncio
+    async def test_embedding_failure_propagates(self, service):
+        """Test that an embedding error aborts the build"""
+        documents, _, metadatas, ids = _docs(2)
+        mock_embed = AsyncMock(side_effect=RuntimeError("ollama down"))
+
+        with patch("question_app.api.vector_store.get_ollama_embeddings", mock_embed):
+            with pytest.raises(RuntimeError, match="ollama down"):
+                await service._embed_and_add(MagicMock(), documents, metadatas, ids)
+
+
+class TestCreateVectorStore:
+    """Test rebuilding the collection without exposing a partial one"""
+
+    @pytest.fixture
+    def rebuild(self, service):
+        db = MagicMock()
+        db.list_all_questions.return_value = [{"id": "q1"}]
+        db.load_question_details.return_value = {"id": "q1", "question_text": "Q", "answers": []}
+        with patch(
+            "question_app.api.vector_store.get_database_manager", return_value=db
+        ), patch("question_app.api.vector_store.load_embedding_dim", return_value=1):
+            yield service
+
+    @pytest.mark.asyncio
+    async def test_collection_is_swapped_in_after_embedding(self, rebuild):
+        """Test that the live collection is only replaced once the build succeeds"""
+        live = MagicMock()
+        rebuild._collection = live
+        staging = rebuild.client.create_collection.return_value
+        staging.count.return_value = 1
+
+        async def embed_and_add(collection, *args):
+            assert rebuild._collection is live
+            rebuild.client.delete_collection.assert_called_once_with("quiz_questions_rebuild")
+
+        with patch.object(rebuild, "_embed_and_add", side_effect=embed_and_add), patch(
+            "question_app.api.vector_store.query_cache"
+        ) as mock_cache:
+            await rebuild.create_vector_store()
+
+        assert rebuild.client.create_collection.call_args.kwargs["name"] == "quiz_questions_rebuild"
+        rebuild.client.delete_collection.assert_called_with("quiz_questions")
+        staging.modify.assert_called_once_with(name="quiz_questions")
+        assert rebuild._collection is staging
+        mock_cache.clear.assert_called_once_with()
+
+    @pytest.mark.asyncio
+    async def test_failed_build_keeps_live_collection(self, rebuild):
+        """Test that an embedding failure drops the staging collection only"""
+        live = MagicMock()
+        rebuild._collection = live
+
+        with patch.object(
+            rebuild, "_embed_and_add", AsyncMock(side_effect=RuntimeError("ollama down"))
+        ), patch("question_app.api.vector_store.query_cache") as mock_cache:
+            with pytest.raises(HTTPException):
+                await rebuild.create_vector_store()
+
+        deleted = [call.args[0] for call in rebuild.client.delete_collection.call_args_list]
+        assert deleted == ["quiz_questions_rebuild", "quiz_questions_rebuild"]
+        assert rebuild._collection is live
+        mock_cache.clear.assert_called_once_with()
+
+
+class TestSearch:
+    """Test semantic search against a cached collection handle"""
+
+    @pytest.mark.asyncio
+    async def test_collection_handle_is_reused(self, service):
+        """Test that the collection is fetched once across searches"""
+        collection = service.client.get_collection.return_value
+        collection.query.return_value = {
+            "documents": [["doc"]],
+            "metadatas": [[{"question_id": 1}]],
+            "distances": [[0.1]],
+        }
+
+        with patch(
+            "question_app.api.vector_store.embedding_batcher.embed",
+            AsyncMock(side_effect=[[1.0, 0.0], [0.0, 1.0]]),
+        ):
+            first = await service.search("first query")
+            await service.search("second query")
+
+        assert first == [{"question_id": 1, "content": "doc", "distance": 0.1}]
+        service.client.get_collection.assert_called_once_with("quiz_questions")
+
+    @pytest.mark.asyncio
+    async def test_failed_query_invalidates_handle(self, service):
+        """Test that a failing query forces the handle to be re-fetched"""
+        service.client.get_collection.return_value.query.side_effect = RuntimeError("gone")
+
+        with patch(
+            "question_app.api.vector_store.embedding_batcher.embed",
+            AsyncMock(return_value=[1.0, 0.0]),
+        ):
+            assert await service.search("query") == []
+
+        assert service._collection is None
+
+
+class TestCreateComprehensiveChunks:
+    """Test building vector store documents from questions"""
+
+    def test_shared_html_is_cleaned_once(self):
+        """Test that identical strings are only parsed once"""
+        questions = [
+            {
+                "id": n,
+                "question_text": f"Question {n}",
+                "answers": [{"text": "Yes", "feedback_text": "<p>Shared</p>"}],
+            }
+            for n in range(3)
+        ]
+
+        with patch(
+            "question_app.api.vector_store.clean_question_text",
+            side_effect=lambda text: text,
+        ) as mock_clean:
+            documents, _, ids = create_comprehensive_chunks(questions)
+
+        assert len(documents) == 6
+        assert documents[1] == "Question: Question 0\n\nAnswer 1: Yes\n\nAnswer Feedback: <p>Shared</p>"
+        assert ids[:2] == ["q_0_main", "q_0_answer_0"]
+        # 3 question texts + empty comments + "Yes" + shared feedback
+        assert mock_clean.call_count == 6
+
+    def test_accepts_preconverted_questions(self):
+        """Test that ChunkQuestion input gives the same chunks as dict input"""
+        question = {
+            "id": 7,
+            "question_text": "What is ARIA?",
+            "tags": ["aria", "wcag"],
+            "answers": [{"text": "Roles", "is_correct": True}],
+        }
+
+        converted = ChunkQuestion.from_dict(question)
+
+        assert converted.id == "7"
+        assert converted.tags == "aria, wcag"
+        assert converted.topic == "Web Accessibility"
+        assert create_comprehensive_chunks([converted]) == create_comprehensive_chunks([question])
+
+
+class TestSummarizeChunks:
+    """Test vector store summary statistics"""
+
+    def test_counts_topics_types_and_tags(self):
+        """Test that chunks are counted per topic, type and tag"""
+        metadatas = [
+            {"topic": "aria", "question_type": "mc", "tags": "wcag, aria"},
+            {"topic": "aria", "question_type": "tf", "tags": "wcag"},
+            {"question_type": "mc", "tags": ""},
+        ]
+
+        summary = summarize_chunks(metadatas)
+
+        assert summary["topic_counts"] == {"aria": 2, "unknown": 1}
+        assert summary["question_type_counts"] == {"mc": 2, "tf": 1}
+        assert summary["tag_counts"] == {"wcag": 2, "aria": 1}
@@ -7,12 +7,16 @@ from unittest.mock import mock_open, patch
 import pytest
 
 from question_app.utils import (
+    cached_questions_count,
     load_chat_system_prompt,
+    load_feedback_prompt_from_json,
     load_objectives,
     load_questions,
+    load_questions_by_id,
     load_system_prompt,
     load_welcome_message,
     save_chat_system_prompt,
+    save_feedback_prompt_to_json,
     save_objectives,
     save_questions,
     save_system_prompt,
@@ -176,3 +180,79 @@ class TestFileOperations:
             result = save_welcome_message(message)
             assert result is True
             mock_file.assert_called_once()
+
+
+class TestFileCache:
+    """Test the mtime-checked cache behind the loaders"""
+
+    @pytest.fixture
+    def questions_file(self, tmp_path):
+        path = tmp_path / "quiz_questions.json"
+        path.write_text(json.dumps([{"id": 1}]), encoding="utf-8")
+        with patch("question_app.utils.file_utils.DATA_FILE", str(path)):
+            yield path
+
+    def test_unchanged_file_is_parsed_once(self, questions_file):
+        """Test that repeat loads reuse the parsed file"""
+        with patch("question_app.utils.file_utils.json.load", wraps=json.load) as mock_load:
+            assert load_questions() == [{"id": 1}]
+            assert load_questions() == [{"id": 1}]
+        assert mock_load.call_count == 1
+
+    def test_changed_file_is_reloaded(self, questions_file):
+        """Test that an edit made outside the app is picked up"""
+        assert load_questions() == [{"id": 1}]
+        questions_file.write_text(json.dumps([{"id": 1}, {"id": 2}]), encoding="utf-8")
+        assert len(load_questions()) == 2
+
+    def test_save_invalidates_cache(self, questions_file):
+        """Test that saving replaces the cached questions"""
+        load_questions()
+        save_questions([{"id": 3}])
+        assert load_questions() == [{"id": 3}]
+
+    def test_save_keeps_readable_layout(self, questions_file):
+        """Test that saved questions stay indented and keep non-ASCII text"""
+        save_questions([{"id": 3, "question_text": "¿Qué es ARIA?"}])
+        text = questions_file.read_text(encoding="utf-8")
+        assert "¿Qué es ARIA?" in text
+        assert '\n  {' in text
+        assert load_questions() == [{"id": 3, "question_text": "¿Qué es ARIA?"}]
+
+    def test_returned_list_is_a_copy(self, questions_file):
+        """Test that appending to a loaded list does not change the cache"""
+        load_questions().append({"id": 2})
+        assert load_questions() == [{"id": 1}]
+
+    def test_questions_by_id_is_rebuilt_on_change(self, questions_file):
+        """Test that the id index follows the questions file"""
+        index = load_questions_by_id()
+        assert index == {1: {"id": 1}}
+        assert load_questions_by_id() is index
+
+        save_questions([{"id": 1}, {"id": 2}])
+        assert set(load_questions_by_id()) == {1, 2}
+
+    def test_cached_questions_count(self, questions_file):
+        """Test that the count distinguishes a missing file from an empty one"""
+        assert cached_questions_count() == 1
+        questions_file.write_text("[]", encoding="utf-8")
+        assert cached_questions_count() == 0
+        questions_file.unlink()
+        assert cached_questions_count() is None
+
+    def test_feedback_prompts_are_cached_until_saved(self, tmp_path):
+        """Test that the feedback prompt JSON is parsed once and refreshed on save"""
+        path = tmp_path / "system_prompts.json"
+        path.write_text(json.dumps({"feedback_correct": " Well done "}), encoding="utf-8")
+        with patch("question_app.utils.file_utils.SYSTEM_PROMPTS_JSON", str(path)):
+            with patch(
+                "question_app.utils.file_utils.json.load", wraps=json.load
+            ) as mock_load:
+                assert load_feedback_prompt_from_json("feedback_correct") == "Well done"
+                assert load_feedback_prompt_from_json("feedback_incorrect") == ""
+            assert mock_load.call_count == 1
+
+            assert save_feedback_prompt_to_json("feedback_incorrect", "Try again")
+            assert load_feedback_prompt_from_json("feedback_incorrect") == "Try again"
+            assert load_feedback_prompt_from_json("feedback_correct") == "Well done"
@@ -3,6 +3,10 @@ Unit tests for text utility functions
 """
 import pytest
 import re
+import threading
+from unittest.mock import MagicMock, patch
+
+from pygments.lexers import get_lexer_by_name
 
 from question_app.utils import (
     clean_answer_feedback,
@@ -10,6 +14,8 @@ from question_app.utils import (
     clean_question_text,
     extract_topic_from_text,
     get_all_existing_tags,
+    markdown_to_html,
+    markdown_to_html_many,
 )
 
 
@@ -373,3 +379,132 @@ class TestTagExtraction:
         result = get_all_existing_tags(questions)
         expected_tags = ["accessibility", "web"]
         assert sorted(result) == sorted(expected_tags)
+
+
+class TestMarkdownToHtml:
+    """Test Markdown rendering for the question edit page"""
+
+    @pytest.fixture(autouse=True)
+    def python_markdown(self):
+        """Use the python-markdown fallback whether or not cmarkgfm is installed"""
+        markdown_to_html.cache_clear()
+        with patch("question_app.utils.text_utils.cmarkgfm", None):
+            yield
+        markdown_to_html.cache_clear()
+
+    def test_preload_lexers_resolves_every_name(self):
+        """Test that every preloaded language is a known Pygments lexer"""
+        from question_app.utils.text_utils import PRELOADED_LEXERS, preload_lexers
+
+        with patch(
+            "question_app.utils.text_utils.get_lexer_by_name", wraps=get_lexer_by_name
+        ) as lookup:
+            preload_lexers()
+        assert [c.args[0] for c in lookup.call_args_list] == list(PRELOADED_LEXERS)
+
+    def test_rendering_is_cached(self):
+        """Test that unchanged text is rendered once"""
+        first = markdown_to_html("What is **alt** text?")
+        second = markdown_to_html("What is **alt** text?")
+
+        assert first == second == "<p>What is <strong>alt</strong> text?</p>"
+        info = markdown_to_html.cache_info()
+        assert (info.misses, info.hits) == (1, 1)
+
+    def test_markdown_instance_is_reset_between_documents(self):
+        """Test that the shared Markdown instance does not leak state across texts"""
+        with patch("markdown.Markdown") as mock_markdown:
+            fenced = markdown_to_html("```\ncode\n```")
+            emphasis = markdown_to_html("plain *text*")
+
+        mock_markdown.assert_not_called()
+        assert "<code>code" in fenced
+        assert emphasis == "<p>plain <em>text</em></p>"
+
+    def test_plain_text_skips_the_parser(self):
+        """Test that one-line plain answers are wrapped without running a renderer"""
+        from question_app.utils.text_utils import _MD
+
+        with patch.object(_MD, "convert") as convert:
+            assert markdown_to_html("42") == "<p>42</p>"
+            assert markdown_to_html("It's 50% off (maybe)") == "<p>It's 50% off (maybe)</p>"
+        convert.assert_not_called()
+
+        cmark = MagicMock()
+        with patch("question_app.utils.text_utils.cmarkgfm", cmark):
+            assert markdown_to_html("True") == "<p>True</p>\n"
+        cmark.markdown_to_html_with_extensions.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "text", ["1. item", "2) item", "AT&T", "a_b", "x  ", "see www:x", 'say "hi"', "a\nb"]
+    )
+    def test_markdown_like_text_is_parsed(self, text):
+        """Test that anything a renderer could treat as syntax takes the full path"""
+        from question_app.utils.text_utils import _MD
+
+        with patch.object(_MD, "convert", return_value="parsed") as convert:
+            assert markdown_to_html(text) == "parsed"
+        convert.assert_called_once_with(text)
+
+    def test_cmark_code_blocks_are_highlighted(self):
+        """Test that cmark-gfm code blocks get codehilite markup for known languages"""
+        from question_app.utils.text_utils import _CODE_BLOCK_RE, _highlight_code_block
+
+        rendered = (
+            '<pre><code class="language-python">x = &quot;a&quot;\n</code></pre>'
+            '<pre><code class="language-nope">y</code></pre>'
+        )
+        result = _CODE_BLOCK_RE.sub(_highlight_code_block, rendered)
+
+        assert result.startswith('<div class="codehilite">')
+        assert '<span class="s2">&quot;a&quot;</span>' in result
+        assert result.endswith('<pre><code class="language-nope">y</code></pre>')
+
+    @pytest.mark.asyncio
+    async def test_many_stays_serial_with_python_markdown(self):
+        """Test that GIL-bound python-markdown conversions run on the calling thread"""
+        caller = threading.get_ident()
+        threads = []
+
+        def render(text):
+            threads.append(threading.get_ident())
+            return text.upper()
+
+        with patch("question_app.utils.text_utils.markdown_to_html", side_effect=render):
+            assert await markdown_to_html_many(["a", "b"]) == ["A", "B"]
+        assert threads == [caller, caller]
+
+    @pytest.mark.asyncio
+    async def test_many_uses_threads_with_cmark(self):
+        """Test that conversions are spread over worker threads when cmark-gfm is used"""
+        caller = threading.get_ident()
+        threads = []
+
+        def render(text):
+            threads.append(threading.get_ident())
+            return text.upper()
+
+        with patch("question_app.utils.text_utils.cmarkgfm", object()), patch(
+            "question_app.utils.text_utils.markdown_to_html", side_effect=render
+        ):
+            assert await markdown_to_html_many(["*a*", "*b*", "*c*"]) == ["*A*", "*B*", "*C*"]
+        assert caller not in threads
+
+    @pytest.mark.asyncio
+    async def test_many_renders_plain_text_inline_with_cmark(self):
+        """Test that plain answers skip the thread hop and keep their position"""
+        caller = threading.get_ident()
+        threads = {}
+
+        def render(text):
+            threads[text] = threading.get_ident()
+            return text.upper()
+
+        with patch("question_app.utils.text_utils.cmarkgfm", object()), patch(
+            "question_app.utils.text_utils.markdown_to_html", side_effect=render
+        ):
+            result = await markdown_to_html_many(["*q*", "42", "`x`", "True"])
+
+        assert result == ["*Q*", "42", "`X`", "TRUE"]
+        assert threads["42"] == threads["True"] == caller
+        assert caller not in (threads["*q*"], threads["`x`"])